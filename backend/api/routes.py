@@ -1,61 +1,111 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from loguru import logger
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
 from backend.api.schemas import (
+    ExportCursorResponse,
+    FeedCreateRequest,
+    FeedResponse,
     MediaCreateRequest,
     MediaResponse,
+    ReprocessCreateRequest,
+    ReprocessJobResponse,
+    SearchResponse,
+    SpeakerEnrollRequest,
+    SpeakerEnrollResponse,
+    SpeakerResponse,
+    SummaryDeriveResponse,
     SummaryResponse,
     TranscriptResponse,
+    VoiceprintResponse,
 )
 from backend.core.database import get_session
-from backend.core.queue import get_redis_pool
-from backend.models import SourceMedia, Summary, TranscriptSegment
+from backend.core.metrics import inject_context, tracer
+from backend.core.queue import enqueue_media, get_redis_pool
+from backend.models import TITLE_PLACEHOLDER, ExportCursor, Feed, ReprocessJob, SourceMedia, Speaker, SpeakerVoiceprint, Summary, TranscriptSegment
+from backend.services.admission import IN_FLIGHT_STATUSES, AdmissionController
 from backend.services.url_parser import URLParser
 
 router = APIRouter()
 
 
+@lru_cache(maxsize=None)
+def get_search_service():
+    """搜索服务按需构造，避免 API 启动时加载 numpy / 向量库"""
+    from backend.services.search import SearchService
+
+    return SearchService()
+
+
+@lru_cache(maxsize=None)
+def get_speaker_index():
+    """声纹库按需构造 (登记 / 回填只读写向量，不加载声纹模型)"""
+    from backend.services.speaker_index import SpeakerIndex
+
+    return SpeakerIndex()
+
+
 @router.post("/media/", response_model=MediaResponse)
 async def create_media_task(request: MediaCreateRequest, session: Session = Depends(get_session)):
     """
-    提交 URL -> 清洗 -> 查重 -> 入库 -> 推送 Redis 队列
+    提交 URL -> 清洗 -> 查重 -> 准入控制 -> 入库 -> 推送 Redis 队列
+    队列积压超过阈值时按优先级返回 429 + Retry-After；Redis 不可用时照常入库，由对账任务稍后补推
     """
     clean_url = URLParser.clean_url(str(request.url))
     platform = URLParser.detect_platform(clean_url)
 
     statement = select(SourceMedia).where(SourceMedia.original_url == clean_url)
     existing_media = session.exec(statement).first()
+    if existing_media and existing_media.status != "failed":
+        return await _media_response(session, existing_media)
+
+    redis = None
+    try:
+        redis = await get_redis_pool()
+    except Exception as e:
+        logger.warning(f"⚠️ Redis 连接失败: {e}")
+
+    eta = None
+    if redis is not None and not request.live:
+        admission = AdmissionController(redis)
+        try:
+            eta = await admission.estimate(session, existing_media.duration if existing_media else None)
+        except Exception as e:
+            logger.warning(f"⚠️ [Admission] ETA 估算失败: {e}")
+        retry_after = admission.retry_after(eta, request.priority) if eta else None
+        if retry_after:
+            logger.info(f"🚦 [Admission] 队列积压约 {eta.wait_seconds}s，拒绝 {request.priority} 优先级提交")
+            raise HTTPException(status_code=429, detail=f"处理队列积压，预计需等待 {eta.wait_seconds // 60} 分钟，请稍后重试", headers={"Retry-After": str(retry_after)})
 
     if existing_media:
-        if existing_media.status == "failed":
-            existing_media.status = "pending"
-            existing_media.error_msg = None
-            session.add(existing_media)
-            session.commit()
-            session.refresh(existing_media)
-        else:
-            return existing_media
+        existing_media.status = "pending"
+        existing_media.error_msg = None
+        existing_media.is_live = request.live
     else:
         existing_media = SourceMedia(
             original_url=clean_url,
             platform=platform,
-            title="获取中...",
+            title=TITLE_PLACEHOLDER,
             status="pending",
+            is_live=request.live,
         )
-        session.add(existing_media)
-        session.commit()
-        session.refresh(existing_media)
+    session.add(existing_media)
+    session.commit()
+    session.refresh(existing_media)
 
-    try:
-        redis = await get_redis_pool()
-        await redis.enqueue_job("process_media_task", existing_media.id)
-    except Exception as e:
-        logger.warning(f"⚠️ Redis 连接失败: {e}")
+    if redis is not None:
+        try:
+            with tracer.start_as_current_span("enqueue_media", attributes={"media_id": existing_media.id}):
+                await enqueue_media(redis, existing_media, trace_ctx=inject_context())
+        except Exception as e:
+            logger.warning(f"⚠️ Redis 入队失败，等待对账任务补推: {e}")
 
-    return existing_media
+    response = MediaResponse.model_validate(existing_media)
+    response.eta_seconds = eta.total if eta else None
+    return response
 
 
 @router.get("/media/", response_model=List[MediaResponse])
@@ -69,14 +119,25 @@ def get_media_list(skip: int = 0, limit: int = 20, session: Session = Depends(ge
 
 
 @router.get("/media/{media_id}", response_model=MediaResponse)
-def get_media_detail(media_id: int, session: Session = Depends(get_session)):
+async def get_media_detail(media_id: int, session: Session = Depends(get_session)):
     """
-    获取单个任务的基础状态
+    获取单个任务的基础状态 (排队 / 处理中的任务附带 ETA)
     """
     media = session.get(SourceMedia, media_id)
     if not media:
         raise HTTPException(status_code=404, detail="任务不存在")
-    return media
+    return await _media_response(session, media)
+
+
+async def _media_response(session: Session, media: SourceMedia) -> MediaResponse:
+    response = MediaResponse.model_validate(media)
+    if media.status == "pending" or media.status in IN_FLIGHT_STATUSES:
+        try:
+            eta = await AdmissionController(await get_redis_pool()).estimate(session, media.duration, media)
+            response.eta_seconds = eta.total
+        except Exception as e:
+            logger.debug(f"[Admission] ETA 估算失败: {e}")
+    return response
 
 
 @router.get("/media/{media_id}/transcript", response_model=TranscriptResponse)
@@ -116,3 +177,208 @@ def get_media_summary(
         "media_id": media_id,
         "summaries": all_summaries,
     }
+
+
+@router.post("/media/{media_id}/summary/{summary_type}", response_model=SummaryDeriveResponse)
+async def derive_media_summary(media_id: int, summary_type: Literal["short", "mindmap"], session: Session = Depends(get_session)):
+    """
+    按需生成新的总结类型：由最新的 detail 总结派生，不重新读取逐字稿
+    """
+    media = session.get(SourceMedia, media_id)
+    if not media:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    detail = session.exec(select(Summary.id).where(Summary.media_id == media_id).where(Summary.summary_type == "detail")).first()
+    if not detail:
+        raise HTTPException(status_code=409, detail="detail 总结尚未生成")
+
+    try:
+        redis = await get_redis_pool()
+        await redis.enqueue_job("derive_summary_task", media_id, summary_type)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis 连接失败: {e}")
+        raise HTTPException(status_code=503, detail="任务队列不可用")
+    return {"media_id": media_id, "summary_type": summary_type, "status": "queued"}
+
+
+@router.post("/feeds/", response_model=FeedResponse)
+async def create_feed(request: FeedCreateRequest, session: Session = Depends(get_session)):
+    """
+    订阅 RSS -> 入库 -> 立即触发一次轮询 (之后由定时任务增量收录)
+    """
+    feed_url = str(request.url)
+    feed = session.exec(select(Feed).where(Feed.url == feed_url)).first()
+    if feed:
+        if feed.is_active:
+            return feed
+        # 重新订阅：按新的 backfill 重新收录历史单集 (已存在的链接会跳过)
+        feed.is_active = True
+        feed.backfill = request.backfill
+        feed.last_seen_guid = None
+        feed.last_seen_published = None
+        feed.etag = None
+        feed.last_modified = None
+    else:
+        feed = Feed(url=feed_url, backfill=request.backfill)
+    session.add(feed)
+    session.commit()
+    session.refresh(feed)
+
+    try:
+        redis = await get_redis_pool()
+        await redis.enqueue_job("poll_feeds_task", feed.id)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis 连接失败: {e}")
+
+    return feed
+
+
+@router.get("/feeds/", response_model=List[FeedResponse])
+def get_feed_list(skip: int = 0, limit: int = 50, session: Session = Depends(get_session)):
+    """
+    获取订阅列表
+    """
+    statement = select(Feed).order_by(Feed.created_at.desc()).offset(skip).limit(limit)
+    return session.exec(statement).all()
+
+
+@router.delete("/feeds/{feed_id}", response_model=FeedResponse)
+def delete_feed(feed_id: int, session: Session = Depends(get_session)):
+    """
+    取消订阅 (保留记录，停止轮询)
+    """
+    feed = session.get(Feed, feed_id)
+    if not feed:
+        raise HTTPException(status_code=404, detail="订阅不存在")
+    feed.is_active = False
+    session.add(feed)
+    session.commit()
+    session.refresh(feed)
+    return feed
+
+
+@router.post("/reprocess/", response_model=ReprocessJobResponse)
+async def create_reprocess_job(request: ReprocessCreateRequest, session: Session = Depends(get_session)):
+    """
+    按条件批量重处理历史内容 (升级模型 / 修改 Prompt 后使用)，低优先级分批执行
+    """
+    from backend.services.reprocess import ReprocessPlanner
+
+    if request.stage == "asr" and request.summary_type != "detail":
+        raise HTTPException(status_code=422, detail="asr 阶段会重新生成 detail 总结，summary_type 只能是 detail")
+    filters = request.filters.model_dump(mode="json", exclude_none=True)
+    job = ReprocessPlanner().create_job(session, request.stage, request.summary_type, filters)
+    if job.total == 0:
+        job.status = "completed"
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        return job
+
+    try:
+        redis = await get_redis_pool()
+        await redis.enqueue_job("reprocess_task", job.id)
+    except Exception as e:
+        logger.warning(f"⚠️ Redis 连接失败: {e}")
+    return job
+
+
+@router.get("/reprocess/", response_model=List[ReprocessJobResponse])
+def get_reprocess_jobs(skip: int = 0, limit: int = 20, session: Session = Depends(get_session)):
+    """
+    获取重处理任务列表 (含进度)
+    """
+    statement = select(ReprocessJob).order_by(ReprocessJob.created_at.desc()).offset(skip).limit(limit)
+    return session.exec(statement).all()
+
+
+@router.get("/reprocess/{job_id}", response_model=ReprocessJobResponse)
+def get_reprocess_job(job_id: int, session: Session = Depends(get_session)):
+    job = session.get(ReprocessJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="重处理任务不存在")
+    return job
+
+
+@router.post("/reprocess/{job_id}/cancel", response_model=ReprocessJobResponse)
+def cancel_reprocess_job(job_id: int, session: Session = Depends(get_session)):
+    """
+    取消重处理任务 (正在处理的那一条会完成，之后不再继续)
+    """
+    job = session.get(ReprocessJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="重处理任务不存在")
+    if job.status in ("pending", "running"):
+        job.status = "cancelled"
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+    return job
+
+
+@router.get("/media/{media_id}/speakers", response_model=List[VoiceprintResponse])
+def get_media_speakers(media_id: int, session: Session = Depends(get_session)):
+    """
+    该媒体中提取到声纹的说话人标签，及自动识别出的人名 (用于挑选要登记的标签)
+    """
+    if not session.get(SourceMedia, media_id):
+        raise HTTPException(status_code=404, detail="任务不存在")
+    statement = select(SpeakerVoiceprint, Speaker.name).outerjoin(Speaker, col(SpeakerVoiceprint.speaker_id) == Speaker.id).where(SpeakerVoiceprint.media_id == media_id).order_by(col(SpeakerVoiceprint.seconds).desc())
+    return [VoiceprintResponse(speaker_label=vp.speaker_label, seconds=vp.seconds, speaker_id=vp.speaker_id, speaker_name=name, score=vp.score) for vp, name in session.exec(statement).all()]
+
+
+@router.post("/speakers/", response_model=SpeakerEnrollResponse)
+def enroll_speaker(request: SpeakerEnrollRequest, session: Session = Depends(get_session)):
+    """
+    把某个媒体里的一个说话人标签登记为真实人名 (同名则追加一条声纹样本)
+    同时回填历史单集中声纹相似的标签，不需要重新处理音频
+    """
+    try:
+        speaker, backfilled = get_speaker_index().enroll(session, request.name.strip(), request.media_id, request.speaker_label)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return SpeakerEnrollResponse.model_validate(speaker).model_copy(update={"backfilled": backfilled})
+
+
+@router.get("/speakers/", response_model=List[SpeakerResponse])
+def get_speakers(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)):
+    """
+    已登记的说话人列表
+    """
+    return session.exec(select(Speaker).order_by(col(Speaker.name)).offset(skip).limit(limit)).all()
+
+
+@router.post("/exports/{target}/sync")
+async def sync_export(target: Literal["obsidian", "http"], full: bool = False):
+    """
+    立即触发一次增量导出 (full=true 时忽略水位全量扫描，内容未变化的条目仍会跳过)
+    """
+    try:
+        redis = await get_redis_pool()
+        await redis.enqueue_job("export_task", target, full, _job_id=f"export_task:{target}")
+    except Exception as e:
+        logger.warning(f"⚠️ Redis 连接失败: {e}")
+        raise HTTPException(status_code=503, detail="任务队列不可用")
+    return {"target": target, "full": full, "status": "queued"}
+
+
+@router.get("/exports/", response_model=List[ExportCursorResponse])
+def get_export_cursors(session: Session = Depends(get_session)):
+    """
+    各导出目标的同步水位和最近一次统计
+    """
+    return session.exec(select(ExportCursor)).all()
+
+
+@router.get("/search", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: Literal["fulltext", "semantic", "hybrid"] = "hybrid",
+    tag: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    """
+    搜索逐字稿与总结，返回带媒体 ID 和时间戳的命中片段
+    """
+    hits = get_search_service().search(session, q, mode=mode, limit=limit, tag=tag)
+    return {"query": q, "mode": mode, "count": len(hits), "hits": hits}
@@ -1,11 +1,18 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 
 
 class MediaCreateRequest(BaseModel):
     url: HttpUrl
+    live: bool = Field(default=False, description="直播 / 增长中的录音：边拉流边转录")
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="队列积压时 low 最先被拒绝，high 总是接受")
+
+
+class FeedCreateRequest(BaseModel):
+    url: HttpUrl
+    backfill: int = Field(default=1, ge=0, le=500, description="首次轮询时收录的历史单集数")
 
 
 class TranscriptItem(BaseModel):
@@ -13,6 +20,7 @@ class TranscriptItem(BaseModel):
     end_time: float
     text: str
     speaker_label: str
+    speaker_name: Optional[str] = None
 
 
 class SummaryItem(BaseModel):
@@ -33,6 +41,7 @@ class MediaResponse(BaseModel):
     status: str
     error_msg: Optional[str] = None
     created_at: datetime
+    eta_seconds: Optional[int] = Field(default=None, description="预计还需多久完成 (秒)，仅排队 / 处理中的任务返回")
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -46,3 +55,107 @@ class TranscriptResponse(BaseModel):
 class SummaryResponse(BaseModel):
     media_id: int
     summaries: List[SummaryItem]
+
+
+class SummaryDeriveResponse(BaseModel):
+    media_id: int
+    summary_type: Literal["short", "mindmap"]
+    status: str
+
+
+class FeedResponse(BaseModel):
+    id: int
+    url: str
+    title: Optional[str] = None
+    backfill: int
+    is_active: bool
+    last_polled_at: Optional[datetime] = None
+    error_msg: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SearchHit(BaseModel):
+    media_id: int
+    source: str  # segment / summary
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+    text: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    mode: str
+    count: int
+    hits: List[SearchHit]
+
+
+class ReprocessFilters(BaseModel):
+    media_ids: Optional[List[int]] = None
+    platform: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    model_used: Optional[str] = Field(default=None, description="只选用该 LLM 模型生成过总结的媒体")
+    prompt_version: Optional[str] = Field(default=None, description="只选用该 Prompt 版本生成过总结的媒体")
+    asr_model: Optional[str] = Field(default=None, description="只选用该转录模型生成逐字稿的媒体, 如 whisperx:medium")
+    outdated_only: bool = Field(default=True, description="跳过已经是当前模型 / Prompt 版本的媒体")
+
+
+class ReprocessCreateRequest(BaseModel):
+    stage: Literal["summary", "asr", "speaker"] = Field(default="summary", description="summary: 只重新总结; asr: 重新转录并总结; speaker: 用已有逐字稿的分段提取声纹并识别说话人")
+    summary_type: Literal["detail", "short", "mindmap"] = "detail"
+    filters: ReprocessFilters = ReprocessFilters()
+
+
+class SpeakerEnrollRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    media_id: int
+    speaker_label: str = Field(description="该媒体逐字稿中的原始标签, 如 SPEAKER_01")
+
+
+class SpeakerResponse(BaseModel):
+    id: int
+    name: str
+    samples: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SpeakerEnrollResponse(SpeakerResponse):
+    backfilled: int = Field(default=0, description="本次回填了名字的历史单集数")
+
+
+class VoiceprintResponse(BaseModel):
+    speaker_label: str
+    seconds: float
+    speaker_id: Optional[int] = None
+    speaker_name: Optional[str] = None
+    score: Optional[float] = None
+
+
+class ExportCursorResponse(BaseModel):
+    target_platform: str
+    watermark: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    last_stats: dict = {}
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReprocessJobResponse(BaseModel):
+    id: int
+    stage: str
+    summary_type: str
+    filters: dict
+    status: str
+    total: int
+    processed: int
+    failed: int
+    error_msg: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,60 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+import redis
+from loguru import logger
+
+from backend.core.config import settings
+
+
+class RedisCache:
+    def __init__(self, namespace: str, ttl: int, url: Optional[str] = None):
+        """
+        基于 Redis 的 JSON 缓存 (同步客户端，供线程中的服务调用)
+        Redis 不可用时所有操作静默降级为未命中，不影响主流程
+        :param namespace: key 前缀，如 resolve / probe
+        :param ttl: 默认过期时间 (秒)
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.url = url or settings.REDIS_URL
+        self._client: Optional[redis.Redis] = None
+
+    def _key(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"audigest:{self.namespace}:{digest}"
+
+    def _get_client(self) -> Optional[redis.Redis]:
+        if self._client is None and self.url:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=2, socket_connect_timeout=2)
+        return self._client
+
+    def get(self, key: str) -> Optional[Any]:
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._key(key))
+        except redis.RedisError as e:
+            logger.debug(f"[Cache] 读取失败 ({self.namespace}): {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            client.set(self._key(key), json.dumps(value, ensure_ascii=False), ex=ttl or self.ttl)
+        except (redis.RedisError, TypeError, ValueError) as e:
+            logger.debug(f"[Cache] 写入失败 ({self.namespace}): {e}")
+
+    def delete(self, key: str):
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            client.delete(self._key(key))
+        except redis.RedisError as e:
+            logger.debug(f"[Cache] 删除失败 ({self.namespace}): {e}")
@@ -8,11 +8,148 @@ class Settings(BaseSettings):
     FOREIGN_DOMAINS: List[str] = ["youtube", "x", "tiktok", "RSS"]
     HF_TOKEN: Optional[str] = None
     DEEPGRAM_API_KEY: Optional[str] = None
+    DEEPGRAM_BASE_URL: str = "https://api.deepgram.com"
+    DEEPGRAM_MODEL: str = "nova-2"
+    DEEPGRAM_MAX_CONNECTIONS: int = 32
+    DEEPGRAM_MAX_RETRIES: int = 4
+    DEEPGRAM_BACKOFF_BASE: float = 2.0
+    DEEPGRAM_MAX_BACKOFF: float = 60.0
+    DEEPGRAM_READ_TIMEOUT: float = 600.0
+    DEEPGRAM_UPLOAD_OPUS: bool = True  # 上传前转为低码率单声道 Opus
+    DEEPGRAM_OPUS_BITRATE: str = "32k"
+    ASR_SUBPROCESS: bool = True  # 本地转录放到可强杀的子进程里执行
+    ASR_POOL_SIZE: int = 0  # 转录子进程数，0 表示按 CPU 核数和 ASR_MAX_RSS_MB 自动计算
+    ASR_MAX_RSS_MB: int = 12288  # 单个转录子进程的内存上限，0 表示不限制
+    ASR_TIMEOUT_SECONDS: int = 3300  # 略小于 Worker 的 job_timeout，给存储 / 总结留出时间
+    ASR_WORKER_MAX_JOBS: int = 50  # 子进程处理这么多任务后回收重启
+    CLOUD_MAX_JOBS: int = 32  # 关闭自适应并发时，云端转录每个 Worker 进程同时执行的任务数
+
+    # 自适应并发 (AIMD)：按 CPU 负载、可用内存、外部服务延迟和 429 比例在上下限之间调整
+    CONCURRENCY_ADAPTIVE: bool = True
+    CONCURRENCY_MAX_JOBS: int = 0  # 同时执行的流水线任务上限，0 表示按 CPU 核数自动计算
+    CONCURRENCY_MAX_DOWNLOADS: int = 16
+    CONCURRENCY_MAX_LLM: int = 16
+    CONCURRENCY_SAMPLE_SECONDS: float = 10.0
+    CONCURRENCY_CPU_HIGH: float = 0.9  # 1 分钟负载 / 核数超过该值视为 CPU 过载
+    CONCURRENCY_MEMORY_LOW: float = 0.15  # 可用内存占比低于该值视为内存紧张
+    CONCURRENCY_MAX_429_RATE: float = 0.05
+    CONCURRENCY_LATENCY_FACTOR: float = 2.0  # 外部服务延迟超过基线的倍数时降低并发
+    CONCURRENCY_DEFER_SECONDS: int = 15  # 任务名额已满时延后重试
+    CONCURRENCY_MAX_DEFERS: int = 240  # 超过后放弃本次执行，由对账任务重新入队
+    PROCESS_MAX_RETRIES: int = 2  # 执行被中断 (Worker 崩溃 / 重启) 后最多重跑的次数，不含任务名额已满时的延后
+
+    # 准入控制与 ETA
+    ADMISSION_MAX_BACKLOG_SECONDS: int = 6 * 3600  # 预计排队时间超过该值时拒绝 normal 优先级的提交 (0 表示不限制)
+    ADMISSION_LOW_PRIORITY_BACKLOG_SECONDS: int = 3600  # low 优先级 (含 RSS 自动收录) 的积压阈值
+    ETA_DEFAULT_DURATION: int = 1800  # 时长未知时按该值估算
+    THROUGHPUT_WINDOW: int = 200  # 每个阶段保留的吞吐量样本数
+    RECONCILE_INTERVAL_MINUTES: int = 5
+    RECONCILE_PENDING_SECONDS: int = 300  # pending 超过该时间仍不在队列中的任务重新入队
+    RECONCILE_STALE_SECONDS: int = 5400  # 处理中状态超过该时间未更新，视为 Worker 已丢失该任务
+
+    # 导出 (Obsidian 仓库 / HTTP 文档服务)，增量同步按 EXPORT_HOUR 每天执行一次
+    EXPORT_TARGETS: List[str] = []  # 如 ["obsidian", "http"]，为空时不定时同步
+    EXPORT_HOUR: int = 3
+    EXPORT_OBSIDIAN_VAULT: str = "data/obsidian"
+    EXPORT_OBSIDIAN_FOLDER: str = "Audigest"
+    EXPORT_HTTP_URL: str = ""
+    EXPORT_HTTP_TOKEN: str = ""
+    EXPORT_BATCH_SIZE: int = 200
+    EXPORT_CONCURRENCY: int = 8
+    EXPORT_INCLUDE_TRANSCRIPT: bool = True
+    WHISPERX_MODEL: str = "medium"
     DATABASE_URL: Optional[str] = None
     REDIS_URL: Optional[str] = None
+    AUTO_INIT_DB: bool = False  # 启动时自动建表 (仅建议本地开发使用，生产请执行 python -m backend.migrate)
+
+    # 语种识别 (LID) 配置
+    LANG_DETECT_MODEL: str = "tiny"
+    LANG_DETECT_SECONDS: int = 30
+    LANG_DETECT_WINDOWS: int = 3
+    LANG_DETECT_MIN_PROB: float = 0.5
+
+    # RSS 订阅轮询配置
+    FEED_POLL_MINUTES: int = 5
+    FEED_POLL_CONCURRENCY: int = 50
+    FEED_POLL_TIMEOUT: float = 15.0
+    FEED_MAX_NEW_PER_POLL: int = 50
+
+    # 链接解析配置
+    RESOLVER_CONNECT_TIMEOUT: float = 5.0
+    RESOLVER_READ_TIMEOUT: float = 10.0
+    RESOLVER_POOL_SIZE: int = 16
+    RESOLVER_CACHE_TTL: int = 6 * 3600
+    RESOLVER_MAX_HEAD_BYTES: int = 256 * 1024
+
+    # 元数据预取配置
+    PROBE_CACHE_TTL: int = 3600
+    PROBE_TIMEOUT: float = 15.0
+    PROBE_MAX_JOBS: int = 8  # Worker 内独立的预取并发数，不占用 max_jobs
+
+    # 分段下载配置
+    DOWNLOAD_CONNECTIONS: int = 4
+    DOWNLOAD_CHUNK_MB: int = 8
+    DOWNLOAD_HOST_CONNECTIONS: int = 8
+    DOWNLOAD_HOST_BANDWIDTH: int = 0  # 单 host 带宽上限 (字节/秒)，0 为不限速
+    DOWNLOAD_READ_TIMEOUT: float = 30.0
+
+    # 搜索配置
+    SEARCH_TS_CONFIG: str = "simple"  # 安装 zhparser 等中文分词后可改为对应配置
+    SEARCH_EMBEDDINGS_ENABLED: bool = True
+    SEARCH_EMBEDDING_MODEL: str = "intfloat/multilingual-e5-small"
+    SEARCH_WINDOW_SECONDS: float = 60.0
+    SEARCH_INDEX_DIR: str = "data/index/segments"
+
+    # 说话人声纹识别 (按已登记的声纹自动填写 TranscriptSegment.speaker_name)
+    SPEAKER_ID_ENABLED: bool = True
+    SPEAKER_EMBEDDING_BACKEND: str = "auto"  # funasr (cam++) / pyannote / auto (优先 funasr)
+    SPEAKER_INDEX_DIR: str = "data/index/speakers"
+    SPEAKER_MATCH_THRESHOLD: float = 0.6  # 余弦相似度，低于该值视为未登记的说话人
+    SPEAKER_MIN_SECONDS: float = 8.0  # 语音少于该时长的标签不提取声纹 (误判 / 插话)
+    SPEAKER_MAX_SECONDS: float = 60.0  # 每个标签最多取最长的若干片段，总时长不超过该值
+    SPEAKER_BACKFILL_LIMIT: int = 10000  # 登记新声纹时最多回填的历史单集声纹数
+
+    # 监控配置
+    WORKER_METRICS_PORT: int = 9101
+    OTEL_EXPORTER_OTLP_ENDPOINT: Optional[str] = None
+
+    # 存储生命周期 (0 / 空表示关闭对应策略)
+    AUDIO_COMPRESS_BITRATE: str = "24k"  # 完成后转为 Opus 的码率
+    AUDIO_RETENTION_DAYS: int = 7  # 超过天数未使用的音频移到对象存储 (未配置则删除)
+    TRANSCRIPT_RETENTION_DAYS: int = 30  # 本地 json / srt / txt 保留天数，数据库中的片段不受影响
+    AUDIO_DISK_QUOTA_GB: float = 0.0  # 本地音频目录配额，超出时按 LRU 淘汰
+    LIFECYCLE_INTERVAL_MINUTES: int = 30
+    LIFECYCLE_BATCH_SIZE: int = 200
+    OBJECT_STORE_ENDPOINT: Optional[str] = None  # S3 兼容地址，如 MinIO http://localhost:9000
+    OBJECT_STORE_BUCKET: str = "audigest"
+    OBJECT_STORE_ACCESS_KEY: Optional[str] = None
+    OBJECT_STORE_SECRET_KEY: Optional[str] = None
+    OBJECT_STORE_REGION: str = "us-east-1"
+
+    # 转录后处理 (合并片段 / 平滑说话人 / 规范文本)
+    POSTPROCESS_ENABLED: bool = True
+    POSTPROCESS_MAX_SEGMENT_SECONDS: float = 30.0
+    POSTPROCESS_MAX_GAP_SECONDS: float = 1.5
+    POSTPROCESS_MIN_SPEAKER_SECONDS: float = 1.0
+
+    # 批量重处理 (低优先级)
+    REPROCESS_BATCH_SIZE: int = 5  # 每批处理的媒体数，处理完一批重新入队，让新提交的任务可以插队
+    REPROCESS_MAX_QUEUE_DEPTH: int = 0  # 主队列中等待的任务超过该数时延后重处理
+    REPROCESS_DEFER_SECONDS: int = 60
+
+    # 实时转录 (直播 / 增长中的录音)
+    LIVE_ASR_MODEL: str = "small"
+    LIVE_WINDOW_SECONDS: float = 30.0
+    LIVE_STEP_SECONDS: float = 5.0
+    LIVE_STABLE_MARGIN: float = 3.0
+    LIVE_MAX_LAG_SECONDS: float = 20.0  # 端到端延迟上限，识别跟不上时丢弃最旧的音频
+    LIVE_SUMMARY_INTERVAL: float = 600.0  # 每转录多少秒音频滚动更新一次纪要
+    LIVE_MAX_SECONDS: int = 6 * 3600
 
     # LLM 相关配置
     DEFAULT_LLM_PROVIDER: str = "deepseek"
+    # 处理完成后自动生成的总结类型；detail 之外的类型都由 detail 派生，不再读取整份逐字稿
+    AUTO_SUMMARY_TYPES: List[str] = ["detail"]
 
     # 厂商 1: DeepSeek
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
@@ -23,7 +160,16 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434/v1"
     OLLAMA_API_KEY: str = "ollama"
     OLLAMA_MODEL: str = "qwen2.5:7b"
-    OLLAMA_CONTEXT: int = 16000
+    OLLAMA_CONTEXT: int = 16000  # num_ctx 上限，实际按输入长度选择档位
+    OLLAMA_CONTEXT_BUCKETS: List[int] = [2048, 4096, 8192, 16384, 32768]
+    OLLAMA_MAX_OUTPUT_TOKENS: int = 2048  # 选择档位时为输出预留的 token 数
+    # 每个字符约合多少 token 的初始值 (中日韩字符 / 其他字符分开)，运行中按 prompt_eval_count 校准
+    OLLAMA_TOKENS_PER_CJK_CHAR: float = 0.75
+    OLLAMA_TOKENS_PER_OTHER_CHAR: float = 0.25
+    OLLAMA_NUM_PARALLEL: int = 4  # 应与 Ollama 服务端的 OLLAMA_NUM_PARALLEL 一致
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_TIMEOUT: float = 1800.0
+    OLLAMA_MAX_WAIT: float = 120.0  # 其他档位的请求最多等待多久就强制切换档位
 
     # 厂商 3: OpenAI (官方)
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
@@ -1,4 +1,5 @@
 from loguru import logger
+from sqlalchemy import inspect, text
 from sqlmodel import Session, SQLModel, create_engine
 
 from backend.core.config import settings
@@ -15,5 +16,36 @@ def init_db():
     import backend.models  # noqa: F401
 
     logger.info("🔄 正在初始化数据库表结构...")
+    with engine.begin() as conn:
+        # trigram 索引依赖 pg_trgm 扩展
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+    # create_all 不会给已存在的表补建索引，这里逐个检查补齐
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
     logger.info("✅ 数据库表结构创建完成！")
+
+
+def _add_missing_columns():
+    """
+    create_all 不会修改已存在的表，这里给旧表补上新增的列
+    新增列一律按可空添加，带 server_default 的列同时写入默认值
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN IF NOT EXISTS "{column.name}" {column.type.compile(dialect=engine.dialect)}'
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(default)}"
+                logger.info(f"🔧 补充列 {table.name}.{column.name}")
+                conn.execute(text(ddl))
@@ -0,0 +1,148 @@
+import importlib.util
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.propagate import extract, inject
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from backend.core.config import settings
+
+
+def _has_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+HAS_OTEL_SDK = _has_module("opentelemetry.sdk")
+HAS_OTLP_EXPORTER = _has_module("opentelemetry.exporter.otlp.proto.http")
+
+STAGE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+# ---------- Prometheus 指标 ----------
+STAGE_SECONDS = Histogram("audigest_stage_seconds", "各流水线阶段耗时", ["stage", "engine"], buckets=STAGE_BUCKETS)
+DOWNLOAD_MBPS = Histogram("audigest_download_mbps", "下载速度 (MB/s)", ["platform"], buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 50, 100))
+ASR_RTF = Histogram("audigest_asr_real_time_factor", "转录实时率 (耗时 / 音频时长)", ["engine"], buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5))
+ASR_PEAK_RSS_MB = Histogram("audigest_asr_peak_rss_mb", "本地转录子进程每个任务的峰值内存 (MB)", ["engine"], buckets=(512, 1024, 2048, 4096, 6144, 8192, 12288, 16384, 24576, 32768))
+ASR_WORKER_KILLS = Counter("audigest_asr_worker_kills_total", "被终止的转录子进程", ["reason"])
+ASR_UPLOAD_BYTES = Counter("audigest_asr_upload_bytes_total", "上传给云端转录服务的字节数", ["engine"])
+PROVIDER_REQUESTS = Counter("audigest_provider_requests_total", "外部服务请求结果 (按 HTTP 状态码)", ["provider", "status"])
+PROVIDER_SECONDS = Histogram("audigest_provider_seconds", "外部服务请求耗时", ["provider"], buckets=STAGE_BUCKETS)
+LLM_SECONDS = Histogram("audigest_llm_seconds", "LLM 调用耗时", ["provider", "model"], buckets=STAGE_BUCKETS)
+LLM_TOKENS = Counter("audigest_llm_tokens_total", "LLM token 用量", ["provider", "model", "kind"])
+LLM_NUM_CTX = Histogram("audigest_llm_num_ctx", "本地 LLM 每次请求使用的 num_ctx", ["model"], buckets=(2048, 4096, 8192, 16384, 32768, 65536))
+LLM_MODEL_LOADS = Counter("audigest_llm_model_loads_total", "本地 LLM 模型 (重新) 加载次数", ["model"])
+DB_WRITE_SECONDS = Histogram("audigest_db_write_seconds", "数据库写入耗时", ["table"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+QUEUE_WAIT_SECONDS = Histogram("audigest_queue_wait_seconds", "任务在队列中的等待时间", ["function"], buckets=STAGE_BUCKETS)
+QUEUE_DEPTH = Gauge("audigest_queue_depth", "队列中等待的任务数")
+INFLIGHT = Gauge("audigest_inflight", "正在执行的任务 / 阶段数", ["stage"])
+JOBS_TOTAL = Counter("audigest_jobs_total", "任务执行结果", ["function", "status"])
+LIVE_LAG_SECONDS = Histogram("audigest_live_lag_seconds", "实时转录延迟 (句子结束到提交)", buckets=(1, 2, 5, 10, 15, 20, 30, 60, 120))
+LIVE_DROPPED_SECONDS = Counter("audigest_live_dropped_seconds_total", "实时转录因识别落后而丢弃的音频时长")
+CONCURRENCY_LIMIT = Gauge("audigest_concurrency_limit", "自适应并发控制的当前上限", ["stage"])
+CONCURRENCY_DECISIONS = Counter("audigest_concurrency_decisions_total", "自适应并发控制的调整次数", ["stage", "action", "reason"])
+HOST_LOAD = Gauge("audigest_host_load_per_cpu", "1 分钟平均负载 / CPU 核数")
+HOST_MEMORY_AVAILABLE = Gauge("audigest_host_memory_available_ratio", "可用内存占比")
+HTTP_SECONDS = Histogram("audigest_http_request_seconds", "API 请求耗时", ["method", "route", "status"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+tracer = trace.get_tracer("audigest")
+
+# 进程内的阶段耗时订阅者 (例如基准测试收集原始样本)
+_stage_observers: List[Callable[[str, str, float], None]] = []
+
+
+# 进程内的外部服务请求订阅者 (自适应并发控制根据延迟和 429 比例调整)
+_provider_observers: List[Callable[[str, str, float], None]] = []
+
+
+def add_stage_observer(observer: Callable[[str, str, float], None]):
+    _stage_observers.append(observer)
+
+
+def add_provider_observer(observer: Callable[[str, str, float], None]):
+    _provider_observers.append(observer)
+
+
+def record_provider(provider: str, status: str, seconds: float):
+    """
+    记录一次外部服务请求 (Deepgram / LLM)
+    :param status: HTTP 状态码，网络错误为 "error"
+    """
+    PROVIDER_REQUESTS.labels(provider=provider, status=status).inc()
+    PROVIDER_SECONDS.labels(provider=provider).observe(seconds)
+    for observer in _provider_observers:
+        observer(provider, status, seconds)
+
+
+@contextmanager
+def track_stage(stage: str, engine: str = "", **attributes):
+    """
+    记录一个流水线阶段：Prometheus 直方图 + 在途数量 + OpenTelemetry span
+    用法: with track_stage("asr", engine="whisperx"): ...
+    """
+    INFLIGHT.labels(stage=stage).inc()
+    started = time.perf_counter()
+    with tracer.start_as_current_span(f"stage.{stage}", attributes={"engine": engine, **attributes}):
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            INFLIGHT.labels(stage=stage).dec()
+            STAGE_SECONDS.labels(stage=stage, engine=engine).observe(elapsed)
+            for observer in _stage_observers:
+                observer(stage, engine, elapsed)
+
+
+# ---------- 链路追踪 ----------
+
+
+def setup_tracing(service_name: str):
+    """
+    配置 OpenTelemetry
+    只有设置了 OTEL_EXPORTER_OTLP_ENDPOINT 且安装了 SDK / OTLP exporter 时才真正导出，否则 span 为 no-op
+    """
+    if not settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        return
+    if not (HAS_OTEL_SDK and HAS_OTLP_EXPORTER):
+        logger.warning("⚠️ [Metrics] 未安装 opentelemetry-sdk / opentelemetry-exporter-otlp，跳过链路追踪")
+        return
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip('/')}/v1/traces")))
+    trace.set_tracer_provider(provider)
+    logger.info(f"🔭 [Metrics] 链路追踪已启用: {service_name} -> {settings.OTEL_EXPORTER_OTLP_ENDPOINT}")
+
+
+def inject_context() -> Dict[str, str]:
+    """把当前 span 上下文序列化，随任务参数传给 Worker"""
+    carrier: Dict[str, str] = {}
+    inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attached_context(carrier: Optional[Dict[str, str]]):
+    """在 Worker 中恢复 API 请求的 span 上下文，使各阶段 span 挂在同一条链路下"""
+    token = otel_context.attach(extract(carrier or {}))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+def start_metrics_server(port: int):
+    """Worker 进程单独暴露 /metrics 端口"""
+    try:
+        start_http_server(port)
+        logger.info(f"📈 [Metrics] 指标端口已启动: :{port}/metrics")
+    except OSError as e:
+        logger.warning(f"⚠️ [Metrics] 指标端口启动失败 (:{port}): {e}")
@@ -1,13 +1,55 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict, Optional
+
 from arq.connections import ArqRedis, RedisSettings, create_pool
 
 from backend.core.config import settings
 
+if TYPE_CHECKING:
+    from backend.models import SourceMedia
+
 REDIS_SETTINGS = RedisSettings.from_dsn(settings.REDIS_URL)
+# 元数据预取的独立队列：不和长时间的转录任务共用 FIFO 和任务名额
+PROBE_QUEUE_NAME = "arq:queue:probe"
+
+
+_redis_pool: Optional[ArqRedis] = None
+_redis_pool_lock = asyncio.Lock()
 
 
 async def get_redis_pool() -> ArqRedis:
     """
-    创建并返回一个 Redis 连接池
-    用于 API 层推送任务
+    返回进程内共享的 Redis 连接池 (第一次调用时创建)
+    用于 API 层推送任务；Redis 不可用时抛异常，下次调用再重试连接
+    """
+    global _redis_pool
+    async with _redis_pool_lock:
+        if _redis_pool is None:
+            _redis_pool = await create_pool(REDIS_SETTINGS)
+    return _redis_pool
+
+
+async def close_redis_pool():
+    """API 关闭时释放共享连接池"""
+    global _redis_pool
+    if _redis_pool is not None:
+        await _redis_pool.aclose()
+        _redis_pool = None
+
+
+def media_job_id(function: str, media_id: int) -> str:
+    """
+    按媒体生成确定的任务 ID：同一媒体的同一任务在排队 / 执行中只会有一份，重复推送 (如对账补推) 是幂等的
+    对应的 Worker 函数需设置 keep_result=0，否则任务结束后结果键会挡住下一次推送
     """
-    return await create_pool(REDIS_SETTINGS)
+    return f"{function}:{media_id}"
+
+
+async def enqueue_media(redis: ArqRedis, media: "SourceMedia", trace_ctx: Optional[Dict[str, str]] = None, defer_by: Optional[int] = None):
+    """推送一条媒体的处理任务：直播走 live_media_task，时长未知时先预取元数据"""
+    if media.is_live:
+        await redis.enqueue_job("live_media_task", media.id, trace_ctx=trace_ctx, _job_id=media_job_id("live_media_task", media.id))
+        return
+    if not media.duration:
+        await redis.enqueue_job("probe_media_task", media.id, trace_ctx=trace_ctx, _job_id=media_job_id("probe_media_task", media.id), _queue_name=PROBE_QUEUE_NAME)
+    await redis.enqueue_job("process_media_task", media.id, trace_ctx=trace_ctx, _job_id=media_job_id("process_media_task", media.id), _defer_by=defer_by)
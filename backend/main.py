@@ -1,26 +1,33 @@
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
+from prometheus_client import make_asgi_app
 
 from backend.api.routes import router as api_router
+from backend.core.config import settings
 from backend.core.database import init_db
+from backend.core.metrics import HTTP_SECONDS, setup_tracing
+from backend.core.queue import close_redis_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     生命周期管理器：
-    - 启动前：初始化数据库
+    - 启动前：配置链路追踪 (建表已移到 python -m backend.migrate)
     - 运行中：提供服务
-    - 关闭后：清理资源 (比如关闭 Redis 连接池，如果以后需要的话)
+    - 关闭后：清理资源 (关闭共享的 Redis 连接池)
     """
     logger.info("🚀 Audigest API 正在启动...")
 
-    # 1. 自动建表 (防止第一次运行报错)
-    init_db()
+    if settings.AUTO_INIT_DB:
+        init_db()
+    setup_tracing("audigest-api")
     yield
+    await close_redis_pool()
     logger.info("👋 Audigest API 已关闭")
 
 
@@ -43,6 +50,20 @@ app.add_middleware(
 # 注册路由
 app.include_router(api_router, prefix="/api/v1")
 
+# Prometheus 指标
+app.mount("/metrics", make_asgi_app())
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """按路由模板统计请求耗时 (不用原始路径，避免 ID 导致标签爆炸)"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    HTTP_SECONDS.labels(method=request.method, route=path, status=response.status_code).observe(time.perf_counter() - started)
+    return response
+
 
 @app.get("/")
 def root():
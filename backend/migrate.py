@@ -0,0 +1,13 @@
+"""
+数据库迁移 (一次性步骤)
+
+    uv run python -m backend.migrate
+
+部署 / 升级时在启动 API 和 Worker 之前执行一次。
+API 与 Worker 启动时默认不再建表 (本地开发可设置 AUTO_INIT_DB=true 恢复自动建表)。
+"""
+
+from backend.core.database import init_db
+
+if __name__ == "__main__":
+    init_db()
@@ -1,10 +1,12 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from sqlalchemy import Text
+from sqlalchemy import Index, Text, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Column, Field, Relationship, SQLModel
 
+from backend.core.config import settings
+
 
 def utc_now():
     return datetime.now(timezone.utc)
@@ -17,6 +19,10 @@ class TimestampMixin(SQLModel):
 
 
 #  2. 核心媒体表
+# 提交时还不知道标题，下载 / 预取元数据时再替换
+TITLE_PLACEHOLDER = "获取中..."
+
+
 class SourceMedia(TimestampMixin, table=True):
     __tablename__ = "source_media"  # type: ignore
 
@@ -29,15 +35,24 @@ class SourceMedia(TimestampMixin, table=True):
     duration: Optional[int] = Field(default=None, description="时长(秒)")
     status: str = Field(default="pending", index=True)
     local_audio_path: Optional[str] = Field(default=None, description="本地音频文件的相对路径")
+    audio_state: str = Field(default="local", index=True, sa_column_kwargs={"server_default": "local"}, description="音频存储状态: local/compressed/archived/evicted")
+    audio_object_key: Optional[str] = Field(default=None, description="音频归档到对象存储后的 Key")
+    audio_accessed_at: Optional[datetime] = Field(default=None, index=True, description="最近一次使用音频的时间，用于保留期和 LRU 淘汰")
+    is_live: bool = Field(default=False, sa_column_kwargs={"server_default": "false"}, description="直播 / 增长中的录音，走 live_media_task")
     error_msg: Optional[str] = Field(default=None, description="最近一次报错信息")
     segments: List["TranscriptSegment"] = Relationship(back_populates="media", sa_relationship_kwargs={"cascade": "all, delete"})
     summaries: List["Summary"] = Relationship(back_populates="media", sa_relationship_kwargs={"cascade": "all, delete"})
     export_logs: List["ExportLog"] = Relationship(back_populates="media", sa_relationship_kwargs={"cascade": "all, delete"})
+    voiceprints: List["SpeakerVoiceprint"] = Relationship(back_populates="media", sa_relationship_kwargs={"cascade": "all, delete"})
 
 
 # 3. 逐字稿切片表
 class TranscriptSegment(SQLModel, table=True):
     __tablename__ = "transcript_segment"  # type: ignore
+    __table_args__ = (
+        # 全文检索: 中文等无空格语言走 trigram 索引 (tsvector 表达式索引见文件末尾)
+        Index("ix_transcript_segment_text_trgm", "text", postgresql_using="gin", postgresql_ops={"text": "gin_trgm_ops"}),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     media_id: int = Field(foreign_key="source_media.id", index=True)
@@ -46,12 +61,17 @@ class TranscriptSegment(SQLModel, table=True):
     text: str = Field(sa_column=Column(Text), description="文本内容")
     speaker_label: str = Field(description="原始标签, 如 SPEAKER_01")
     speaker_name: Optional[str] = Field(default=None, description="真实人名, 如 Elon Musk")
+    asr_model: Optional[str] = Field(default=None, description="产生该片段的转录引擎与模型, 如 whisperx:medium")
     media: SourceMedia = Relationship(back_populates="segments")
 
 
 # 4. 智能总结表
 class Summary(TimestampMixin, table=True):
     __tablename__ = "summary"  # type: ignore
+    __table_args__ = (
+        Index("ix_summary_content_trgm", "content", postgresql_using="gin", postgresql_ops={"content": "gin_trgm_ops"}),
+        Index("ix_summary_tags", "tags", postgresql_using="gin"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     media_id: int = Field(foreign_key="source_media.id", index=True)
@@ -59,17 +79,93 @@ class Summary(TimestampMixin, table=True):
     content: str = Field(sa_column=Column(Text), description="Markdown 格式的总结内容")
     tags: List[str] = Field(default=[], sa_column=Column(JSONB))
     model_used: str = Field(default="gpt-4o", description="使用的 LLM 模型")
+    prompt_version: Optional[str] = Field(default=None, index=True, description="生成时所用 Prompt 文件内容的哈希")
     media: SourceMedia = Relationship(back_populates="summaries")
 
 
 # 5. 导出记录表
 class ExportLog(TimestampMixin, table=True):
     __tablename__ = "export_log"  # type: ignore
+    __table_args__ = (Index("ix_export_log_media_target", "media_id", "target_platform", unique=True),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     media_id: int = Field(foreign_key="source_media.id", index=True)
-    target_platform: str = Field(description="目标平台: notion/obsidian/feishu")
+    target_platform: str = Field(description="目标平台: notion/obsidian/feishu/http")
     external_id: Optional[str] = Field(default=None, index=True)
     status: str = Field(default="success")
     error_msg: Optional[str] = Field(default=None)
+    content_hash: Optional[str] = Field(default=None, description="上次成功导出内容的 SHA-256，内容未变化时跳过")
     media: SourceMedia = Relationship(back_populates="export_logs")
+
+
+# 6. RSS 订阅表
+class Feed(TimestampMixin, table=True):
+    __tablename__ = "feed"  # type: ignore
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    url: str = Field(unique=True, index=True, description="RSS 订阅地址")
+    title: Optional[str] = Field(default=None, description="播客名称")
+    etag: Optional[str] = Field(default=None, description="上次响应的 ETag，用于条件请求")
+    last_modified: Optional[str] = Field(default=None, description="上次响应的 Last-Modified，用于条件请求")
+    last_seen_guid: Optional[str] = Field(default=None, description="已收录的最新单集 GUID")
+    last_seen_published: Optional[datetime] = Field(default=None, description="已收录的最新单集发布时间，GUID 从订阅中消失时用作水位")
+    backfill: int = Field(default=1, description="首次轮询时收录的历史单集数")
+    is_active: bool = Field(default=True, index=True)
+    last_polled_at: Optional[datetime] = Field(default=None, description="最近一次轮询时间")
+    error_msg: Optional[str] = Field(default=None, description="最近一次轮询报错信息")
+
+
+# 7. 批量重处理任务表
+class ReprocessJob(TimestampMixin, table=True):
+    __tablename__ = "reprocess_job"  # type: ignore
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    stage: str = Field(description="重跑的阶段: summary (只重新总结) / asr (重新转录并总结) / speaker (只识别说话人)")
+    summary_type: str = Field(default="detail", description="stage=summary 时重新生成的总结类型")
+    filters: dict = Field(default={}, sa_column=Column(JSONB), description="筛选条件: platform / created_after / model_used / prompt_version / asr_model ...")
+    status: str = Field(default="pending", index=True, description="pending/running/completed/cancelled/failed")
+    total: int = Field(default=0, description="创建时匹配的媒体数")
+    processed: int = Field(default=0)
+    failed: int = Field(default=0)
+    cursor: int = Field(default=0, description="已处理到的最大 media_id，按 ID 顺序分批推进")
+    pending_media_ids: list = Field(default=[], sa_column=Column(JSONB), description="asr 阶段已推送 process_media_task、尚未结束的媒体")
+    error_msg: Optional[str] = Field(default=None)
+
+
+# 8. 导出进度表 (每个目标一行，记录增量同步的水位)
+class ExportCursor(TimestampMixin, table=True):
+    __tablename__ = "export_cursor"  # type: ignore
+
+    target_platform: str = Field(primary_key=True)
+    watermark: Optional[datetime] = Field(default=None, description="已同步到的内容更新时间")
+    watermark_media_id: int = Field(default=0, description="同一更新时间内已同步到的 media_id")
+    last_run_at: Optional[datetime] = Field(default=None)
+    last_stats: dict = Field(default={}, sa_column=Column(JSONB), description="最近一次同步的统计: exported / skipped / failed")
+
+
+# 9. 已登记的说话人 (声纹向量按 id 存在 SPEAKER_INDEX_DIR/known)
+class Speaker(TimestampMixin, table=True):
+    __tablename__ = "speaker"  # type: ignore
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(index=True, unique=True, description="真实人名, 写入 TranscriptSegment.speaker_name")
+    samples: int = Field(default=0, description="已登记的声纹样本数")
+
+
+# 10. 单集说话人声纹 (每个媒体的每个 diarization 标签一条，向量按 id 存在 SPEAKER_INDEX_DIR/episodes)
+class SpeakerVoiceprint(TimestampMixin, table=True):
+    __tablename__ = "speaker_voiceprint"  # type: ignore
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    media_id: int = Field(foreign_key="source_media.id", index=True)
+    speaker_label: str = Field(description="该媒体内的原始标签, 如 SPEAKER_01")
+    seconds: float = Field(default=0.0, description="用于提取声纹的语音时长")
+    speaker_id: Optional[int] = Field(default=None, foreign_key="speaker.id", index=True, description="匹配到的已登记说话人")
+    score: Optional[float] = Field(default=None, description="与该说话人的余弦相似度，手动登记为 1")
+    media: SourceMedia = Relationship(back_populates="voiceprints")
+
+
+# 11. 全文检索表达式索引 (需要引用已定义的列，因此放在最后)
+# 注意: 修改 SEARCH_TS_CONFIG 后需要重建这两个索引，查询时使用同一个配置才能命中索引
+Index("ix_transcript_segment_text_tsv", func.to_tsvector(settings.SEARCH_TS_CONFIG, TranscriptSegment.__table__.c.text), postgresql_using="gin")
+Index("ix_summary_content_tsv", func.to_tsvector(settings.SEARCH_TS_CONFIG, Summary.__table__.c.content), postgresql_using="gin")
@@ -0,0 +1,151 @@
+import json
+import os
+import socket
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, col, select
+
+from backend.core.config import settings
+from backend.models import SourceMedia
+
+STATS_KEY = "audigest:throughput:{stage}:{engine}"
+WORKERS_KEY = "audigest:worker_slots"
+# 参与 ETA 计算的阶段，以及没有历史样本时使用的默认耗时比 (处理秒数 / 音频秒数)
+ETA_STAGES = ("download", "asr", "summarize")
+DEFAULT_RATIOS = {"download": 0.01, "asr_cloud": 0.03, "asr_local": 0.5, "summarize": 0.02}
+IN_FLIGHT_STATUSES = ("downloading", "transcribing", "summarizing")
+
+
+@dataclass
+class Eta:
+    wait_seconds: int  # 排在前面的任务预计还需多久
+    processing_seconds: int  # 本任务自身的预计处理时间
+
+    @property
+    def total(self) -> int:
+        return self.wait_seconds + self.processing_seconds
+
+
+class ThroughputStats:
+    def __init__(self, redis):
+        """
+        各阶段吞吐量的滚动统计，存在 Redis 里由 API 和所有 Worker 共享
+        每个 阶段+引擎 保留最近 THROUGHPUT_WINDOW 条 "耗时,音频时长" 样本，读取时取中位数
+        :param redis: ArqRedis (redis.asyncio) 连接
+        """
+        self.redis = redis
+
+    async def record(self, stage: str, seconds: float, duration: Optional[float], engine: str = ""):
+        if not duration:
+            return
+        key = STATS_KEY.format(stage=stage, engine=engine)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lpush(key, f"{seconds:.3f},{duration:.1f}")
+        pipe.ltrim(key, 0, settings.THROUGHPUT_WINDOW - 1)
+        await pipe.execute()
+
+    async def ratio(self, stage: str, engines: Iterable[str] = ("",)) -> Optional[float]:
+        """处理秒数 / 音频秒数 的中位数，没有样本时返回 None"""
+        ratios: List[float] = []
+        for engine in engines:
+            for sample in await self.redis.lrange(STATS_KEY.format(stage=stage, engine=engine), 0, -1):
+                seconds, duration = (sample.decode() if isinstance(sample, bytes) else sample).split(",")
+                if float(duration) > 0:
+                    ratios.append(float(seconds) / float(duration))
+        return statistics.median(ratios) if ratios else None
+
+    async def publish_slots(self, limits: Dict[str, int]):
+        """Worker 定期上报当前各阶段的并发上限，API 据此估算整体处理能力"""
+        await self.redis.hset(WORKERS_KEY, worker_id(), json.dumps({"at": time.time(), "limits": limits}))
+
+    async def slots(self) -> Dict[str, int]:
+        """所有存活 Worker 的并发上限之和，长时间未上报的 Worker 视为已下线"""
+        totals: Dict[str, int] = {}
+        stale_after = settings.CONCURRENCY_SAMPLE_SECONDS * 3
+        for worker, raw in (await self.redis.hgetall(WORKERS_KEY)).items():
+            entry = json.loads(raw)
+            if time.time() - entry["at"] > stale_after:
+                await self.redis.hdel(WORKERS_KEY, worker)
+                continue
+            for stage, limit in entry["limits"].items():
+                totals[stage] = totals.get(stage, 0) + limit
+        return totals
+
+
+class AdmissionController:
+    def __init__(self, redis):
+        """
+        提交时的准入控制与 ETA 估算
+        ETA = 排在前面的积压 (音频总时长 × 瓶颈阶段的耗时比 / 该阶段总并发) + 本任务各阶段耗时之和
+        积压超过阈值时按优先级拒绝 (返回 Retry-After)，high 优先级总是接受
+        """
+        self.stats = ThroughputStats(redis)
+
+    async def estimate(self, session: Session, duration: Optional[int], media: Optional[SourceMedia] = None) -> Eta:
+        """
+        :param duration: 音频时长 (秒)，未知时按 ETA_DEFAULT_DURATION 估算
+        :param media: 已入库的任务：排队中的只计算排在它前面的积压，处理中的只计算剩余阶段
+        """
+        ratios = await self._ratios()
+        remaining = ETA_STAGES
+        wait = 0.0
+        if media is not None and media.status in IN_FLIGHT_STATUSES:
+            remaining = ETA_STAGES[IN_FLIGHT_STATUSES.index(media.status) :]
+        else:
+            slots = await self.stats.slots()
+            backlog = self.backlog_audio_seconds(session, before_id=media.id if media is not None else None)
+            wait = max(backlog * ratios[stage] / max(slots.get(self._slot_name(stage), 1), 1) for stage in ETA_STAGES)
+        processing = sum(ratios[stage] for stage in remaining) * (duration or settings.ETA_DEFAULT_DURATION)
+        return Eta(wait_seconds=int(wait), processing_seconds=int(processing))
+
+    @staticmethod
+    def retry_after(eta: Eta, priority: str) -> Optional[int]:
+        """
+        判断是否接受提交
+        :return: None 表示接受；否则为建议的 Retry-After 秒数
+        """
+        if priority == "high":
+            return None
+        limit = settings.ADMISSION_LOW_PRIORITY_BACKLOG_SECONDS if priority == "low" else settings.ADMISSION_MAX_BACKLOG_SECONDS
+        if not limit or eta.wait_seconds <= limit:
+            return None
+        return min(max(eta.wait_seconds - limit, 60), 3600)
+
+    @staticmethod
+    def backlog_audio_seconds(session: Session, before_id: Optional[int] = None) -> float:
+        """
+        排队 / 处理中的音频总时长；处理中的按一半计，时长未知的按 ETA_DEFAULT_DURATION 计
+        :param before_id: 只统计 ID 更小 (更早提交) 的排队任务
+        """
+        duration = func.coalesce(SourceMedia.duration, settings.ETA_DEFAULT_DURATION)
+        statement = select(SourceMedia.status, func.sum(duration)).where(col(SourceMedia.status).in_(("pending", *IN_FLIGHT_STATUSES))).where(col(SourceMedia.is_live).is_(False))
+        if before_id:
+            statement = statement.where((SourceMedia.status != "pending") | (SourceMedia.id < before_id)).where(SourceMedia.id != before_id)
+        total = 0.0
+        for status, seconds in session.exec(statement.group_by(SourceMedia.status)).all():
+            total += float(seconds or 0) * (0.5 if status in IN_FLIGHT_STATUSES else 1.0)
+        return total
+
+    async def _ratios(self) -> Dict[str, float]:
+        cloud = bool(settings.DEEPGRAM_API_KEY)
+        asr_engines = ("deepgram",) if cloud else ("whisperx", "funasr")
+        ratios = {
+            "download": await self.stats.ratio("download"),
+            "asr": await self.stats.ratio("asr", asr_engines),
+            "summarize": await self.stats.ratio("summarize"),
+        }
+        defaults = {"download": DEFAULT_RATIOS["download"], "asr": DEFAULT_RATIOS["asr_cloud" if cloud else "asr_local"], "summarize": DEFAULT_RATIOS["summarize"]}
+        return {stage: value if value is not None else defaults[stage] for stage, value in ratios.items()}
+
+    @staticmethod
+    def _slot_name(stage: str) -> str:
+        # summarize 阶段占用的是 llm 名额
+        return "llm" if stage == "summarize" else stage
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
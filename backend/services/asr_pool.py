@@ -0,0 +1,217 @@
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from backend.core.config import settings
+from backend.core.metrics import ASR_PEAK_RSS_MB, ASR_WORKER_KILLS
+from backend.services.transcriber import TranscriptionError
+
+POLL_INTERVAL = 0.5
+
+
+def _worker_main(conn: Connection, transcriber_kwargs: Dict):
+    """子进程入口：常驻一个 AudioTranscriber，模型加载一次后在多个任务间复用"""
+    from backend.services.transcriber import AudioTranscriber
+
+    transcriber = AudioTranscriber(**transcriber_kwargs)
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if request is None:
+            break
+        audio_path, language = request
+        try:
+            conn.send(("ok", transcriber.transcribe(audio_path, language=language)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+def default_pool_size() -> int:
+    """ASR_POOL_SIZE 未配置时：每 4 核一个子进程，且总内存上限不超过物理内存"""
+    if settings.ASR_POOL_SIZE:
+        return settings.ASR_POOL_SIZE
+    by_cpu = (os.cpu_count() or 1) // 4
+    total_mb = _read_meminfo_kb("MemTotal") / 1024
+    by_memory = int(total_mb // settings.ASR_MAX_RSS_MB) if settings.ASR_MAX_RSS_MB and total_mb else by_cpu
+    return max(1, min(by_cpu, by_memory))
+
+
+def _read_meminfo_kb(field: str) -> int:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _read_status_kb(pid: int, field: str) -> int:
+    """读取 /proc/<pid>/status 中的内存字段 (kB)，非 Linux 或进程已退出时返回 0"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _reset_peak(pid: int) -> bool:
+    """清零进程的 VmHWM (峰值 RSS)，使之后读到的是本任务的峰值"""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class _Worker:
+    def __init__(self, ctx, transcriber_kwargs: Dict):
+        self.conn, child_conn = ctx.Pipe()
+        # 不设 daemon：引擎内部 (torch / modelscope) 可能还会再起子进程
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, transcriber_kwargs), name="asr-worker")
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def rss_mb(self) -> float:
+        return _read_status_kb(self.pid, "VmRSS") / 1024
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self):
+        """正常退出 (回收时使用)，超时未退出则强杀"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=10)
+        self.kill()
+
+
+class ASRProcessPool:
+    def __init__(
+        self,
+        transcriber_kwargs: Dict,
+        size: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        本地转录的子进程池
+        - 每个子进程常驻一个 AudioTranscriber，模型只加载一次
+        - 任务超时、协程被取消 (ARQ job_timeout / abort) 或子进程 RSS 超过上限时直接杀掉子进程，不再留下跑到底的线程
+        - 引擎 OOM / 段错误只影响子进程，Worker 本身继续运行，下个任务重新拉起子进程
+        - 每个任务结束后记录子进程的峰值 RSS
+        :param transcriber_kwargs: 传给子进程内 AudioTranscriber 的参数
+        :param size: 子进程数 (= 同时进行的本地转录数)
+        :param max_rss_mb: 单个子进程的 RSS 上限，0 表示不限制
+        :param timeout: 单个转录任务的最长时间 (秒)
+        """
+        self.transcriber_kwargs = transcriber_kwargs
+        self.size = size or default_pool_size()
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else settings.ASR_MAX_RSS_MB
+        self.timeout = timeout or settings.ASR_TIMEOUT_SECONDS
+        # CUDA 不能在 fork 出的子进程里初始化
+        self._ctx = mp.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def transcribe(self, audio_path: str, language: str = "auto", engine: str = "") -> List[Dict]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            worker = self._acquire()
+            try:
+                status, payload = await self._run(worker, audio_path, language, engine)
+            except BaseException:
+                # 超时 / 取消 / 超内存 / 子进程崩溃：连同已加载的模型一起丢弃
+                worker.kill()
+                raise
+            self._release(worker)
+        if status == "error":
+            raise TranscriptionError(payload)
+        return payload
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().stop()
+
+    def _acquire(self) -> _Worker:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive():
+                return worker
+            worker.kill()
+        logger.info("🧵 [ASRPool] 启动转录子进程")
+        return _Worker(self._ctx, self.transcriber_kwargs)
+
+    def _release(self, worker: _Worker):
+        worker.jobs += 1
+        if settings.ASR_WORKER_MAX_JOBS and worker.jobs >= settings.ASR_WORKER_MAX_JOBS:
+            # 定期回收，避免内存碎片和泄漏累积
+            logger.info(f"♻️ [ASRPool] 子进程已处理 {worker.jobs} 个任务，回收 pid={worker.pid}")
+            worker.stop()
+            return
+        self._idle.append(worker)
+
+    async def _run(self, worker: _Worker, audio_path: str, language: str, engine: str):
+        exact_peak = _reset_peak(worker.pid)
+        worker.conn.send((audio_path, language))
+
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = worker.conn.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        deadline = time.monotonic() + self.timeout
+        sampled_peak = 0.0
+        try:
+            while not ready.done():
+                rss = worker.rss_mb()
+                sampled_peak = max(sampled_peak, rss)
+                if self.max_rss_mb and rss > self.max_rss_mb:
+                    ASR_WORKER_KILLS.labels(reason="memory").inc()
+                    raise TranscriptionError(f"转录子进程内存 {rss:.0f}MB 超过上限 {self.max_rss_mb}MB，已终止")
+                if time.monotonic() > deadline:
+                    ASR_WORKER_KILLS.labels(reason="timeout").inc()
+                    raise TranscriptionError(f"转录超过 {self.timeout}s，已终止子进程")
+                await asyncio.wait({ready}, timeout=POLL_INTERVAL)
+        except asyncio.CancelledError:
+            ASR_WORKER_KILLS.labels(reason="cancelled").inc()
+            logger.warning(f"🛑 [ASRPool] 任务被取消，终止转录子进程 pid={worker.pid}")
+            raise
+        finally:
+            loop.remove_reader(fd)
+
+        peak_mb = _read_status_kb(worker.pid, "VmHWM") / 1024 if exact_peak else sampled_peak
+        try:
+            message = await asyncio.to_thread(worker.conn.recv)
+        except (EOFError, OSError):
+            ASR_WORKER_KILLS.labels(reason="crashed").inc()
+            worker.process.join(timeout=5)
+            raise TranscriptionError(f"转录子进程异常退出 (exitcode={worker.process.exitcode}，可能是 OOM)")
+        ASR_PEAK_RSS_MB.labels(engine=engine).observe(peak_mb)
+        logger.info(f"📊 [ASRPool] 转录子进程峰值内存 {peak_mb:.0f}MB (pid={worker.pid})")
+        return message
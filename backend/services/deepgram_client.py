@@ -0,0 +1,221 @@
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from backend.core.config import settings
+from backend.core.metrics import ASR_UPLOAD_BYTES, record_provider
+
+HAS_IJSON = importlib.util.find_spec("ijson") is not None
+
+PARAGRAPHS_PREFIX = "results.channels.item.alternatives.item.paragraphs.paragraphs.item"
+UTTERANCES_PREFIX = "results.channels.item.alternatives.item.utterances.item"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+UPLOAD_CHUNK = 256 * 1024
+
+
+class DeepgramError(Exception):
+    pass
+
+
+class DeepgramClient:
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_connections: Optional[int] = None, max_retries: Optional[int] = None):
+        """
+        异步 Deepgram 客户端
+        - 进程内共享一个 keep-alive 连接池，不再每个任务新建连接
+        - 429 / 5xx / 网络错误按指数退避重试 (优先遵循 Retry-After)
+        - 上传前可转为低码率单声道 Opus，上传字节数约为 192k MP3 的 1/6
+        - 安装了 ijson 时边下载边解析响应，只保留需要的段落，不把整份 JSON 读进内存
+        :param max_connections: 连接池上限，也就是同时在途的转录请求数
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or settings.DEEPGRAM_BASE_URL).rstrip("/")
+        self.max_connections = max_connections or settings.DEEPGRAM_MAX_CONNECTIONS
+        self.max_retries = max_retries if max_retries is not None else settings.DEEPGRAM_MAX_RETRIES
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def transcribe(self, audio_path: str, language: str = "auto") -> List[Dict]:
+        params = {
+            "model": settings.DEEPGRAM_MODEL,
+            "smart_format": "true",
+            "diarize": "true",  # 开启说话人分离
+            "punctuate": "true",
+            "utterances": "true",
+        }
+        if language and language != "auto":
+            params["language"] = language
+        else:
+            params["detect_language"] = "true"
+
+        upload_path, content_type, cleanup = await self._prepare_upload(audio_path)
+        try:
+            return await self._post_with_retry(upload_path, content_type, params)
+        finally:
+            if cleanup:
+                Path(upload_path).unlink(missing_ok=True)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ---------- 请求 ----------
+
+    async def _post_with_retry(self, upload_path: str, content_type: str, params: Dict) -> List[Dict]:
+        size = os.path.getsize(upload_path)
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                client = self._get_client()
+                headers = {"Authorization": f"Token {self.api_key}", "Content-Type": content_type, "Content-Length": str(size)}
+                async with client.stream("POST", f"{self.base_url}/v1/listen", params=params, headers=headers, content=self._iter_file(upload_path)) as response:
+                    if response.status_code == 200:
+                        ASR_UPLOAD_BYTES.labels(engine="deepgram").inc(size)
+                        segments = await self._parse_response(response)
+                        record_provider("deepgram", "200", time.perf_counter() - started)
+                        logger.success(f"[Deepgram] 转录完成，共 {len(segments)} 个段落 ({time.perf_counter() - started:.1f}s)")
+                        return segments
+                    record_provider("deepgram", str(response.status_code), time.perf_counter() - started)
+                    body = (await response.aread())[:500].decode("utf-8", "ignore")
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                        raise DeepgramError(f"Deepgram API 报错 ({response.status_code}): {body}")
+                    delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                    logger.warning(f"⚠️ [Deepgram] {response.status_code}，{delay:.1f}s 后第 {attempt + 1} 次重试")
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                record_provider("deepgram", "error", time.perf_counter() - started)
+                if attempt == self.max_retries:
+                    raise DeepgramError(f"Deepgram 请求失败: {e}") from e
+                delay = self._retry_delay(attempt, None)
+                logger.warning(f"⚠️ [Deepgram] 网络错误 {type(e).__name__}，{delay:.1f}s 后第 {attempt + 1} 次重试")
+            await asyncio.sleep(delay)
+        raise DeepgramError("Deepgram 重试次数用尽")
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.DEEPGRAM_MAX_BACKOFF)
+            except ValueError:
+                pass
+        # 指数退避 + 抖动，避免大量任务同时重试
+        return min(settings.DEEPGRAM_BACKOFF_BASE * 2**attempt, settings.DEEPGRAM_MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """连接池绑定事件循环：同一循环内复用，换了循环 (如同步调用 asyncio.run) 则重建"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections, keepalive_expiry=60)
+            timeout = httpx.Timeout(settings.DEEPGRAM_READ_TIMEOUT, connect=10.0, write=settings.DEEPGRAM_READ_TIMEOUT)
+            self._client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=False)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    async def _iter_file(path: str) -> AsyncIterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+
+    # ---------- 上传前压缩 ----------
+
+    async def _prepare_upload(self, audio_path: str) -> Tuple[str, str, bool]:
+        """
+        :return: (上传文件路径, Content-Type, 上传后是否删除)
+        """
+        if not settings.DEEPGRAM_UPLOAD_OPUS or audio_path.endswith((".opus", ".ogg")):
+            return audio_path, "audio/ogg" if audio_path.endswith((".opus", ".ogg")) else "audio/*", False
+        fd, tmp_path = tempfile.mkstemp(suffix=".ogg", prefix="deepgram_")
+        os.close(fd)
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", audio_path, "-vn", "-ac", "1", "-c:a", "libopus", "-b:a", settings.DEEPGRAM_OPUS_BITRATE, "-application", "voip", tmp_path]
+        try:
+            await asyncio.to_thread(subprocess.run, cmd, check=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            Path(tmp_path).unlink(missing_ok=True)
+            logger.warning(f"⚠️ [Deepgram] Opus 转码失败，上传原文件: {e}")
+            return audio_path, "audio/*", False
+        logger.debug(f"[Deepgram] 已转为 Opus: {os.path.getsize(audio_path) / 1024 / 1024:.1f}MB -> {os.path.getsize(tmp_path) / 1024 / 1024:.1f}MB")
+        return tmp_path, "audio/ogg", True
+
+    # ---------- 解析 ----------
+
+    async def _parse_response(self, response: httpx.Response) -> List[Dict]:
+        paragraphs: List[Dict] = []
+        utterances: List[Dict] = []
+        if HAS_IJSON:
+            async for prefix, item in self._stream_items(response):
+                (paragraphs if prefix == PARAGRAPHS_PREFIX else utterances).append(item)
+        else:
+            data = json.loads(await response.aread())
+            try:
+                alternative = data["results"]["channels"][0]["alternatives"][0]
+            except (KeyError, IndexError):
+                logger.warning("Deepgram 返回了空结果或格式异常 (可能是静音文件)")
+                return []
+            paragraphs = (alternative.get("paragraphs") or {}).get("paragraphs") or []
+            utterances = alternative.get("utterances") or []
+
+        if paragraphs:
+            return [self._paragraph_to_segment(p) for p in paragraphs if p.get("sentences")]
+        return [{"start": float(u["start"]), "end": float(u["end"]), "text": u["transcript"].strip(), "speaker": f"Speaker_{u.get('speaker', 0)}"} for u in utterances]
+
+    @staticmethod
+    def _paragraph_to_segment(paragraph: Dict) -> Dict:
+        sentences = paragraph["sentences"]
+        return {
+            "start": float(sentences[0]["start"]),
+            "end": float(sentences[-1]["end"]),
+            "text": " ".join(s["text"] for s in sentences).strip(),
+            "speaker": f"Speaker_{paragraph.get('speaker', 0)}",
+        }
+
+    @staticmethod
+    async def _stream_items(response: httpx.Response) -> AsyncIterator[Tuple[str, Dict]]:
+        """用 ijson 增量解析，只构建段落 / utterance 对象，其余字段 (逐词结果等) 读过即丢"""
+        import ijson
+
+        reader = _AsyncByteReader(response.aiter_bytes())
+        builder = None
+        target = None
+        async for prefix, event, value in ijson.parse_async(reader):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == target and event == "end_map":
+                    yield target, builder.value
+                    builder = None
+            elif event == "start_map" and prefix in (PARAGRAPHS_PREFIX, UTTERANCES_PREFIX):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                target = prefix
+
+
+class _AsyncByteReader:
+    """把 httpx 的字节流包装成 ijson 需要的 async read(n) 接口"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    async def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -1,15 +1,16 @@
 import os
+import subprocess
 import uuid
 from pathlib import Path
 from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
 
-import feedparser
-import requests
-import yt_dlp
-from bs4 import BeautifulSoup
 from loguru import logger
 
+from backend.core.cache import RedisCache
 from backend.core.config import settings
+from backend.services.http_downloader import SegmentedDownloader
+from backend.services.resolver import URLResolver
 
 
 class DownloadError(Exception):
@@ -33,7 +34,7 @@ class YtDlpLogger:
 
 
 class MediaDownloader:
-    def __init__(self, output_dir: str = "data/audio", proxy_url: Optional[str] = None, foreign_domains: Optional[List[str]] = None):
+    def __init__(self, output_dir: str = "data/audio", proxy_url: Optional[str] = None, foreign_domains: Optional[List[str]] = None, resolver: Optional[URLResolver] = None):
         """
         初始化下载器
         :param output_dir: 音频保存目录
@@ -43,54 +44,172 @@ class MediaDownloader:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.proxy_url = proxy_url or settings.PROXY_URL
         self.foreign_domains = foreign_domains or settings.FOREIGN_DOMAINS
+        self.resolver = resolver or URLResolver()
+        self.probe_cache = RedisCache("probe", settings.PROBE_CACHE_TTL)
+        self.segmented = SegmentedDownloader()
         logger.info(f"[Downloader] 初始化完成 | 目录: {self.output_dir} | 代理: {self.proxy_url or '无'}")
 
-    def download(self, url: str, platform: str) -> Dict[str, Any]:
-        real_url = self._resolve_real_url(url)
-        file_uuid = str(uuid.uuid4())
-
-        ydl_opts = self._build_ydl_opts(file_uuid, platform)
+    def download(self, url: str, platform: str, media_id: Optional[int] = None) -> Dict[str, Any]:
+        resolved = self.resolver.resolve(url)
+        real_url = resolved["url"]
+        # 按 media_id 固定文件名，重试时可以续传已下载的部分，而不是从零开始
+        file_stem = f"media_{media_id}" if media_id is not None else str(uuid.uuid4())
 
         logger.info(f"[Downloader] 开始处理任务: {real_url}")
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(real_url, download=True)
-
-                final_filename = f"{file_uuid}.mp3"
-                abs_path = self.output_dir / final_filename
-
-                if not abs_path.exists():
-                    raise DownloadError("文件下载流程结束，但在硬盘上未找到 MP3 文件")
-                try:
-                    rel_path = abs_path.relative_to(os.getcwd())
-                except ValueError:
-                    rel_path = abs_path
-
-                logger.success(f"✅ [Downloader] 下载成功: {rel_path}")
-
-                return {
-                    "success": True,
-                    "uuid": file_uuid,
-                    "title": info.get("title", "Unknown Title"),
-                    "author": info.get("uploader", info.get("artist", "Unknown Author")),
-                    "duration": info.get("duration", 0),
-                    "platform": platform,
-                    "original_url": real_url,
-                    "local_path": str(rel_path),
-                }
+            if self.resolver.is_direct_audio(real_url):
+                info = self._download_direct(real_url, file_stem, platform, resolved)
+            else:
+                info = self._download_ytdlp(real_url, file_stem, platform)
+
+            abs_path = self.output_dir / f"{file_stem}.mp3"
+            if not abs_path.exists():
+                raise DownloadError("文件下载流程结束，但在硬盘上未找到 MP3 文件")
+            try:
+                rel_path = abs_path.relative_to(os.getcwd())
+            except ValueError:
+                rel_path = abs_path
+
+            logger.success(f"✅ [Downloader] 下载成功: {rel_path}")
+
+            return {
+                "success": True,
+                "uuid": file_stem,
+                "title": info.get("title"),
+                "author": info.get("uploader") or info.get("artist"),
+                "duration": info.get("duration") or 0,
+                "platform": platform,
+                "original_url": real_url,
+                "local_path": str(rel_path),
+            }
 
         except Exception as e:
             logger.exception(f"[Downloader] 任务失败: {real_url}")
             raise DownloadError(f"底层下载失败: {str(e)}") from e
 
-    def _build_ydl_opts(self, file_uuid: str, platform: str) -> Dict:
+    def _download_ytdlp(self, real_url: str, file_stem: str, platform: str) -> Dict[str, Any]:
+        import yt_dlp
+
+        ydl_opts = self._build_ydl_opts(file_stem, platform)
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            cached_info = self.probe_cache.get(real_url)
+            if cached_info:
+                # 预取阶段已经解析过，直接复用 info 下载，省去一次 extract
+                logger.debug(f"⏭️ [Downloader] 复用预取的元数据: {real_url}")
+                return ydl.process_ie_result(cached_info, download=True)
+            return ydl.extract_info(real_url, download=True)
+
+    def _download_direct(self, real_url: str, file_stem: str, platform: str, resolved: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        直链音频 / 播客单集：多连接分段下载 (可续传)，非 MP3 再转码
+        """
+        ext = Path(urlparse(real_url).path).suffix.lower()
+        mp3_path = self.output_dir / f"{file_stem}.mp3"
+        source_path = self.output_dir / f"{file_stem}.source{ext}"
+        proxy = self.proxy_url if self.proxy_url and platform in self.foreign_domains else None
+
+        if not mp3_path.exists():
+            self.segmented.fetch(real_url, source_path, proxy_url=proxy)
+            if ext == ".mp3":
+                source_path.replace(mp3_path)
+            else:
+                # 先转码到临时文件再原子替换：中途崩溃 / 超时不会留下被当作已完成的半截 MP3
+                tmp_path = mp3_path.with_suffix(".mp3.tmp")
+                cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", str(source_path), "-vn", "-codec:a", "libmp3lame", "-b:a", "192k", "-f", "mp3", str(tmp_path)]
+                subprocess.run(cmd, check=True)
+                tmp_path.replace(mp3_path)
+                source_path.unlink(missing_ok=True)
+
+        # 只返回确实知道的信息，不编造标题 / 作者，避免覆盖订阅源或预取阶段写入的元数据
+        return {
+            "title": resolved.get("title"),
+            "uploader": resolved.get("author"),
+            "duration": self._probe_direct_duration(str(mp3_path)) or 0,
+        }
+
+    def live_source(self, url: str, platform: str) -> Dict[str, Any]:
+        """
+        解析直播 / 仍在增长的录音的实时音频地址 (不下载)，交给 ffmpeg 边拉边解码
+        :return: {"url": 音频流地址, "title", "author", "headers": 拉流需要的 HTTP 头, "is_live"}
+        """
+        resolved = self.resolver.resolve(url)
+        real_url = resolved["url"]
+        if self.resolver.is_direct_audio(real_url):
+            return {"url": real_url, "title": resolved.get("title"), "author": resolved.get("author"), "headers": {}, "is_live": False}
+
+        import yt_dlp
+
+        opts = self._build_ydl_opts("live", platform)
+        opts.pop("postprocessors")
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(real_url, download=False)
+        return {
+            "url": info["url"],
+            "title": info.get("title"),
+            "author": info.get("uploader") or info.get("artist"),
+            "headers": info.get("http_headers") or {},
+            "is_live": bool(info.get("is_live")),
+        }
+
+    def probe(self, url: str, platform: str) -> Dict[str, Any]:
+        """
+        只获取元数据 (标题 / 作者 / 时长)，不下载音频
+        - 直链音频: HTTP HEAD + ffprobe 读取时长
+        - 其他平台: yt-dlp extract_info(download=False)，原始 info 缓存给后续下载复用
+        """
+        resolved = self.resolver.resolve(url)
+        real_url = resolved["url"]
+        logger.info(f"🔎 [Downloader] 预取元数据: {real_url}")
+
+        if self.resolver.is_direct_audio(real_url):
+            return {
+                "title": resolved.get("title") or Path(urlparse(real_url).path).stem,
+                "author": resolved.get("author"),
+                "duration": self._probe_direct_duration(real_url),
+                "filesize": self._probe_direct_size(real_url),
+            }
+
+        import yt_dlp
+
+        try:
+            with yt_dlp.YoutubeDL(self._build_ydl_opts("probe", platform)) as ydl:
+                info = ydl.sanitize_info(ydl.extract_info(real_url, download=False))
+        except Exception as e:
+            raise DownloadError(f"元数据获取失败: {str(e)}") from e
+        self.probe_cache.set(real_url, info)
+        return {
+            "title": info.get("title") or resolved.get("title"),
+            "author": info.get("uploader", info.get("artist", resolved.get("author"))),
+            "duration": int(info["duration"]) if info.get("duration") else None,
+            "filesize": info.get("filesize") or info.get("filesize_approx"),
+        }
+
+    def _probe_direct_size(self, url: str) -> Optional[int]:
+        try:
+            resp = self.resolver.session.head(url, timeout=self.resolver.timeout, allow_redirects=True)
+            return int(resp.headers["Content-Length"]) if "Content-Length" in resp.headers else None
+        except Exception as e:
+            logger.debug(f"[Downloader] HEAD 请求失败: {e}")
+            return None
+
+    def _probe_direct_duration(self, source: str) -> Optional[int]:
+        """ffprobe 只读取文件头即可拿到时长"""
+        cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", source]
+        try:
+            out = subprocess.run(cmd, capture_output=True, text=True, timeout=settings.PROBE_TIMEOUT, check=True).stdout.strip()
+            return int(float(out)) if out and out != "N/A" else None
+        except Exception as e:
+            logger.debug(f"[Downloader] ffprobe 获取时长失败: {e}")
+            return None
+
+    def _build_ydl_opts(self, file_stem: str, platform: str) -> Dict:
         """
         构建 yt-dlp 的配置字典
         """
         opts = {
             "format": "bestaudio/best",
-            "outtmpl": f"{self.output_dir}/{file_uuid}.%(ext)s",
+            "outtmpl": f"{self.output_dir}/{file_stem}.%(ext)s",
             "postprocessors": [
                 {
                     "key": "FFmpegExtractAudio",
@@ -114,29 +233,3 @@ class MediaDownloader:
             opts["proxy"] = self.proxy_url
 
         return opts
-
-    def _resolve_real_url(self, url: str) -> str:
-        if url.endswith(".xml") or "rss" in url or "feed" in url:
-            try:
-                logger.debug(f"[解析] 正在解析 RSS Feed: {url}")
-                feed = feedparser.parse(url)
-                if feed.entries:
-                    for link in feed.entries[0].links:
-                        if link["type"].startswith("audio"):
-                            return link["href"]
-            except Exception as e:
-                logger.warning(f"RSS 解析异常: {e}")
-
-        if "xiaoyuzhoufm.com" in url:
-            try:
-                logger.debug(f"[解析] 正在解析小宇宙页面: {url}")
-                headers = {"User-Agent": "Mozilla/5.0"}
-                resp = requests.get(url, headers=headers)
-                soup = BeautifulSoup(resp.text, "html.parser")
-                meta = soup.find("meta", property="og:audio")
-                if meta:
-                    return meta["content"]
-            except Exception as e:
-                logger.warning(f"小宇宙解析异常: {e}")
-
-        return url
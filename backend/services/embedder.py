@@ -0,0 +1,51 @@
+import threading
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+from backend.core.config import settings
+
+
+class TextEmbedder:
+    def __init__(self, model_name: Optional[str] = None, batch_size: int = 32):
+        """
+        本地 CPU 文本向量模型 (默认 multilingual-e5-small，中英文通用)
+        模型在第一次调用时才加载
+        """
+        self.model_name = model_name or settings.SEARCH_EMBEDDING_MODEL
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._model = None
+
+    def embed_passages(self, texts: List[str]) -> np.ndarray:
+        return self._embed([f"passage: {t}" for t in texts])
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed([f"query: {text}"])[0]
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        import torch
+
+        tokenizer, model = self._load()
+        outputs = []
+        with torch.inference_mode():
+            for i in range(0, len(texts), self.batch_size):
+                batch = tokenizer(texts[i : i + self.batch_size], padding=True, truncation=True, max_length=512, return_tensors="pt")
+                hidden = model(**batch).last_hidden_state
+                # mean pooling
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                outputs.append(torch.nn.functional.normalize(pooled, dim=-1).numpy())
+        return np.concatenate(outputs).astype(np.float32)
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from transformers import AutoModel, AutoTokenizer
+
+                logger.info(f"⏳ [Embedder] 正在加载向量模型 ({self.model_name})...")
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                self._model = AutoModel.from_pretrained(self.model_name).eval()
+            return self._tokenizer, self._model
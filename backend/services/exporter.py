@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+from sqlalchemy import and_, func, or_
+from sqlmodel import Session, col, select
+
+from backend.core.config import settings
+from backend.core.utils import format_seconds
+from backend.models import ExportCursor, ExportLog, SourceMedia, Summary, TranscriptSegment, utc_now
+from backend.services.summarizer import Summarizer
+
+# Obsidian 文件名里不能出现的字符
+UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|#^\[\]\n\r\t]+')
+SUMMARY_ORDER = ("short", "detail", "mindmap", "live")
+
+
+class ExportError(Exception):
+    pass
+
+
+@dataclass
+class ExportDocument:
+    media_id: int
+    title: str
+    markdown: str
+    tags: List[str]
+    source_url: str
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.markdown.encode("utf-8")).hexdigest()
+
+
+class ExportTarget(ABC):
+    """导出目标的基类：upsert 返回外部 ID，传入已有外部 ID 时原地更新"""
+
+    name = ""
+
+    @abstractmethod
+    async def upsert(self, document: ExportDocument, external_id: Optional[str]) -> str: ...
+
+    async def aclose(self):
+        pass
+
+
+class ObsidianTarget(ExportTarget):
+    name = "obsidian"
+
+    def __init__(self, vault_dir: Optional[str] = None, folder: Optional[str] = None):
+        """
+        导出到本地 Obsidian 仓库 (一条媒体一个 Markdown 文件，带 YAML frontmatter)
+        外部 ID 是文件相对仓库的路径：标题变化后仍写回原文件，用户在 Obsidian 里建立的链接不会失效
+        """
+        self.vault_dir = Path(vault_dir or settings.EXPORT_OBSIDIAN_VAULT)
+        self.folder = folder if folder is not None else settings.EXPORT_OBSIDIAN_FOLDER
+
+    async def upsert(self, document: ExportDocument, external_id: Optional[str]) -> str:
+        relative = external_id or str(Path(self.folder) / f"{self._safe_name(document.title)} ({document.media_id}).md")
+        await asyncio.to_thread(self._write, self.vault_dir / relative, document.markdown)
+        return relative
+
+    @staticmethod
+    def _write(path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".md.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        # 原子替换，Obsidian 不会读到写了一半的文件
+        tmp_path.replace(path)
+
+    @staticmethod
+    def _safe_name(title: str) -> str:
+        return UNSAFE_FILENAME_RE.sub(" ", title).strip()[:80] or "untitled"
+
+
+class HttpTarget(ExportTarget):
+    name = "http"
+
+    def __init__(self, base_url: Optional[str] = None, token: Optional[str] = None, max_connections: Optional[int] = None):
+        """
+        通用 HTTP 文档服务 (Notion / 飞书等可按同样的接口做一层适配)
+        - POST   {base_url}/pages        创建，返回 {"id": ...}
+        - PATCH  {base_url}/pages/{id}   原地更新；404 时视为页面已被删除，重新创建
+        本地开发 / 基准测试可以指向 benchmarks/stubs.py 的替身服务
+        """
+        self.base_url = (base_url or settings.EXPORT_HTTP_URL).rstrip("/")
+        if not self.base_url:
+            raise ExportError("未配置 EXPORT_HTTP_URL")
+        headers = {"Authorization": f"Bearer {token or settings.EXPORT_HTTP_TOKEN}"} if (token or settings.EXPORT_HTTP_TOKEN) else {}
+        limit = max_connections or settings.EXPORT_CONCURRENCY
+        self.client = httpx.AsyncClient(headers=headers, timeout=30.0, limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit))
+
+    async def upsert(self, document: ExportDocument, external_id: Optional[str]) -> str:
+        payload = {"title": document.title, "content": document.markdown, "tags": document.tags, "source_url": document.source_url, "media_id": document.media_id}
+        if external_id:
+            response = await self.client.patch(f"{self.base_url}/pages/{external_id}", json=payload)
+            if response.status_code != 404:
+                self._check(response)
+                return external_id
+            logger.info(f"[Export] 远端页面 {external_id} 已不存在，重新创建")
+        response = await self.client.post(f"{self.base_url}/pages", json=payload)
+        self._check(response)
+        return str(response.json()["id"])
+
+    @staticmethod
+    def _check(response: httpx.Response):
+        if response.status_code >= 400:
+            raise ExportError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+TARGETS = {"obsidian": ObsidianTarget, "http": HttpTarget}
+
+
+class Exporter:
+    def __init__(self, target: ExportTarget, batch_size: Optional[int] = None, concurrency: Optional[int] = None):
+        """
+        增量批量导出
+        - 按内容更新时间 (媒体与其总结的 updated_at 取最大值) 的水位增量扫描，水位存在 ExportCursor
+        - 每批渲染后按 EXPORT_CONCURRENCY 并发推送到目标
+        - 渲染结果的哈希与 ExportLog 一致时跳过；已有 external_id 时原地更新
+        - 上次失败的条目在下一次同步时重试，不受水位限制
+        """
+        self.target = target
+        self.batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        self.concurrency = concurrency or settings.EXPORT_CONCURRENCY
+
+    async def sync(self, session: Session, full: bool = False) -> Dict[str, int]:
+        """
+        :param full: 忽略水位从头扫描 (内容未变化的条目仍会按哈希跳过)
+        """
+        name = self.target.name
+        cursor = session.get(ExportCursor, name) or ExportCursor(target_platform=name)
+        if full:
+            cursor.watermark, cursor.watermark_media_id = None, 0
+        stats = {"exported": 0, "skipped": 0, "failed": 0}
+
+        retry_ids = set(session.exec(select(ExportLog.media_id).where(ExportLog.target_platform == name).where(ExportLog.status == "failed")).all())
+        if retry_ids:
+            await self._export_batch(session, sorted(retry_ids), stats)
+
+        while True:
+            batch = self._next_batch(session, cursor)
+            if not batch:
+                break
+            await self._export_batch(session, [media_id for media_id, _ in batch if media_id not in retry_ids], stats)
+            cursor.watermark_media_id, cursor.watermark = batch[-1]
+            session.add(cursor)
+            session.commit()
+
+        cursor.last_run_at = utc_now()
+        cursor.last_stats = stats
+        session.add(cursor)
+        session.commit()
+        logger.success(f"📤 [Export] {name} 同步完成: {stats}")
+        return stats
+
+    def _next_batch(self, session: Session, cursor: ExportCursor) -> List[Tuple[int, datetime]]:
+        """按 (内容更新时间, media_id) 键集分页，同一时间戳的大批数据也不会卡住或漏掉"""
+        latest_summary = select(Summary.media_id, func.max(Summary.updated_at).label("summary_at")).group_by(Summary.media_id).subquery()
+        changed_at = func.greatest(SourceMedia.updated_at, func.coalesce(latest_summary.c.summary_at, SourceMedia.updated_at)).label("changed_at")
+        statement = select(SourceMedia.id, changed_at).outerjoin(latest_summary, latest_summary.c.media_id == SourceMedia.id).where(SourceMedia.status == "completed")
+        if cursor.watermark is not None:
+            statement = statement.where(or_(changed_at > cursor.watermark, and_(changed_at == cursor.watermark, SourceMedia.id > cursor.watermark_media_id)))
+        statement = statement.order_by(changed_at, col(SourceMedia.id)).limit(self.batch_size)
+        return [(media_id, at) for media_id, at in session.exec(statement).all()]
+
+    async def _export_batch(self, session: Session, media_ids: List[int], stats: Dict[str, int]):
+        logs = {log.media_id: log for log in session.exec(select(ExportLog).where(ExportLog.target_platform == self.target.name).where(col(ExportLog.media_id).in_(media_ids))).all()}
+        pending: List[Tuple[ExportDocument, ExportLog]] = []
+        for media_id in media_ids:
+            document = self.render(session, media_id)
+            if document is None:
+                continue
+            log = logs.get(media_id) or ExportLog(media_id=media_id, target_platform=self.target.name, status="pending")
+            if log.status == "success" and log.content_hash == document.content_hash and log.external_id:
+                stats["skipped"] += 1
+                continue
+            pending.append((document, log))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def push(document: ExportDocument, log: ExportLog) -> Optional[Exception]:
+            async with semaphore:
+                try:
+                    log.external_id = await self.target.upsert(document, log.external_id)
+                except Exception as e:
+                    return e
+            return None
+
+        errors = await asyncio.gather(*(push(document, log) for document, log in pending))
+        for (document, log), error in zip(pending, errors):
+            if error is None:
+                log.status, log.error_msg, log.content_hash = "success", None, document.content_hash
+                stats["exported"] += 1
+            else:
+                log.status, log.error_msg = "failed", str(error)[:500]
+                stats["failed"] += 1
+                logger.warning(f"⚠️ [Export] {self.target.name} 导出失败 MediaID={document.media_id}: {error}")
+            session.add(log)
+        session.commit()
+
+    def render(self, session: Session, media_id: int) -> Optional[ExportDocument]:
+        media = session.get(SourceMedia, media_id)
+        if not media:
+            return None
+        summaries = [s for s in (Summarizer.latest_summary(session, media_id, summary_type) for summary_type in SUMMARY_ORDER) if s]
+        tags = sorted({tag for s in summaries for tag in (s.tags or [])})
+
+        lines = [
+            "---",
+            f"title: {_yaml_str(media.title)}",
+            f"author: {_yaml_str(media.author or '')}",
+            f"source: {_yaml_str(media.original_url)}",
+            f"platform: {media.platform}",
+            f"duration: {media.duration or 0}",
+            f"created: {media.created_at.date().isoformat()}",
+            f"tags: [{', '.join(_yaml_str(tag) for tag in tags)}]",
+            "---",
+            "",
+            f"# {media.title}",
+        ]
+        for summary in summaries:
+            lines += ["", f"## 总结 ({summary.summary_type})", "", summary.content.strip()]
+        if settings.EXPORT_INCLUDE_TRANSCRIPT:
+            segments = session.exec(select(TranscriptSegment).where(TranscriptSegment.media_id == media_id).order_by(col(TranscriptSegment.start_time))).all()
+            if segments:
+                lines += ["", "## 逐字稿", ""]
+                lines += [f"[{format_seconds(seg.start_time)}] **{seg.speaker_name or seg.speaker_label}**: {seg.text}" for seg in segments]
+        return ExportDocument(media_id=media.id, title=media.title, markdown="\n".join(lines) + "\n", tags=tags, source_url=media.original_url)
+
+
+def _yaml_str(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_target(name: str) -> ExportTarget:
+    if name not in TARGETS:
+        raise ExportError(f"不支持的导出目标: {name}")
+    return TARGETS[name]()
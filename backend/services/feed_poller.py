@@ -0,0 +1,226 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+import feedparser
+import httpx
+from loguru import logger
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, select
+
+from backend.core.config import settings
+from backend.models import Feed, SourceMedia, utc_now
+
+USER_AGENT = "Mozilla/5.0 (compatible; Audigest FeedPoller)"
+
+
+@dataclass
+class FeedFetchResult:
+    feed_id: int
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    parsed: Any = None
+    error: Optional[str] = None
+    entries: List[Any] = field(default_factory=list)
+
+
+class FeedPoller:
+    def __init__(self, concurrency: Optional[int] = None, timeout: Optional[float] = None, proxy_url: Optional[str] = None):
+        """
+        RSS 订阅轮询器
+        并发拉取所有订阅，使用条件请求 (ETag / Last-Modified) 节省带宽，只收录上次之后的新单集
+        :param concurrency: 同时拉取的订阅数上限
+        :param timeout: 单个请求超时 (秒)
+        """
+        self.concurrency = concurrency or settings.FEED_POLL_CONCURRENCY
+        self.timeout = timeout or settings.FEED_POLL_TIMEOUT
+        self.proxy_url = proxy_url
+
+    async def poll(self, session: Session, feed_ids: Optional[List[int]] = None) -> List[int]:
+        """
+        轮询订阅并入库新单集
+        :return: 新创建的 SourceMedia ID 列表
+        """
+        statement = select(Feed).where(Feed.is_active == True)  # noqa: E712
+        if feed_ids:
+            statement = statement.where(col(Feed.id).in_(feed_ids))
+        feeds = session.exec(statement).all()
+        if not feeds:
+            return []
+
+        logger.info(f"📡 [Feed] 开始轮询 {len(feeds)} 个订阅...")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True, proxy=self.proxy_url, headers={"User-Agent": USER_AGENT}) as client:
+            results = await asyncio.gather(*[self._fetch(client, semaphore, feed) for feed in feeds])
+
+        feeds_by_id = {feed.id: feed for feed in feeds}
+        new_ids: List[int] = []
+        for result in results:
+            feed = feeds_by_id[result.feed_id]
+            try:
+                # 每个订阅一个 savepoint：单个订阅的数据异常不影响其他订阅入库
+                with session.begin_nested():
+                    created = self._apply(session, feed, result)
+                new_ids.extend(created)
+            except Exception as e:
+                logger.exception(f"❌ [Feed] 处理订阅失败 {feed.url}")
+                feed.last_polled_at = utc_now()
+                feed.error_msg = f"处理失败: {e}"[:500]
+                session.add(feed)
+        session.commit()
+
+        unchanged = sum(1 for r in results if r.not_modified)
+        logger.success(f"✅ [Feed] 轮询完成 | 未变化: {unchanged} | 新单集: {len(new_ids)}")
+        return new_ids
+
+    async def _fetch(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, feed: Feed) -> FeedFetchResult:
+        headers = {}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+
+        async with semaphore:
+            try:
+                resp = await client.get(feed.url, headers=headers)
+            except httpx.HTTPError as e:
+                return FeedFetchResult(feed_id=feed.id, error=f"请求失败: {e}")
+
+        if resp.status_code == 304:
+            return FeedFetchResult(feed_id=feed.id, not_modified=True)
+        if resp.status_code != 200:
+            return FeedFetchResult(feed_id=feed.id, error=f"HTTP {resp.status_code}")
+
+        # 解析是 CPU 密集操作，放到线程里避免阻塞其他请求
+        parsed = await asyncio.to_thread(feedparser.parse, resp.content)
+        return FeedFetchResult(
+            feed_id=feed.id,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            parsed=parsed,
+            entries=list(parsed.entries),
+        )
+
+    def _apply(self, session: Session, feed: Feed, result: FeedFetchResult) -> List[int]:
+        """根据拉取结果更新订阅状态，并批量创建新单集"""
+        feed.last_polled_at = utc_now()
+        session.add(feed)
+        if result.error:
+            logger.warning(f"⚠️ [Feed] 拉取失败 {feed.url}: {result.error}")
+            feed.error_msg = result.error
+            return []
+        feed.error_msg = None
+        if result.not_modified:
+            return []
+
+        feed.title = feed.title or result.parsed.feed.get("title")
+
+        new_entries, drained = self._new_entries(feed, result.entries)
+        if new_entries:
+            # 水位只推进到实际收录的最新一条
+            self._mark_seen(feed, new_entries[0])
+        elif result.entries:
+            # 没有新单集：水位对齐到订阅里最新的一条 (首次订阅且 backfill=0，或原来的 GUID 已从订阅中消失)
+            self._mark_seen(feed, result.entries[0])
+        # 还有未收录的积压时不保存缓存头，下次轮询完整拉取而不是拿到 304
+        feed.etag = result.etag if drained else None
+        feed.last_modified = result.last_modified if drained else None
+        if not new_entries:
+            return []
+
+        author = result.parsed.feed.get("author") or feed.title
+        now = utc_now()
+        rows = []
+        for entry in new_entries:
+            audio_url = self._entry_audio_url(entry)
+            if not audio_url:
+                continue
+            rows.append(
+                {
+                    "original_url": audio_url,
+                    "title": entry.get("title") or "未命名单集",
+                    "author": author,
+                    "platform": "podcast",
+                    "duration": self._parse_duration(entry.get("itunes_duration")),
+                    "status": "pending",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        if not rows:
+            return []
+
+        # 批量插入，已存在的链接直接跳过
+        statement = insert(SourceMedia).values(rows).on_conflict_do_nothing(index_elements=["original_url"]).returning(SourceMedia.id)
+        new_ids = list(session.execute(statement).scalars().all())
+        logger.info(f"🆕 [Feed] {feed.title or feed.url}: 新增 {len(new_ids)} 集")
+        return new_ids
+
+    def _new_entries(self, feed: Feed, entries: List[Any]) -> Tuple[List[Any], bool]:
+        """
+        返回本次要收录的单集 (新的在前)；首次轮询按 backfill 收录历史单集
+        上次之后的新单集超过 FEED_MAX_NEW_PER_POLL 时先收录最早的一批，其余留到下次轮询
+        :return: (单集列表, 是否已全部收录)
+        """
+        if feed.last_seen_guid is None:
+            return entries[: feed.backfill], True
+        new_entries = []
+        for entry in entries:
+            if self._entry_guid(entry) == feed.last_seen_guid:
+                break
+            new_entries.append(entry)
+        else:
+            # 上次的水位单集已不在订阅里 (发布方裁剪了列表或改了 GUID)，不能把整个列表都当成新单集
+            new_entries = self._published_after_watermark(feed, entries)
+        if len(new_entries) > settings.FEED_MAX_NEW_PER_POLL:
+            return new_entries[-settings.FEED_MAX_NEW_PER_POLL :], False
+        return new_entries, True
+
+    def _published_after_watermark(self, feed: Feed, entries: List[Any]) -> List[Any]:
+        """按发布时间找出水位之后的单集；没有发布时间可比时只收录最新的 backfill 集"""
+        watermark = feed.last_seen_published
+        if watermark is not None:
+            watermark = watermark if watermark.tzinfo else watermark.replace(tzinfo=timezone.utc)
+            dated = [(entry, self._entry_published(entry)) for entry in entries]
+            if all(published is not None for _, published in dated):
+                logger.warning(f"⚠️ [Feed] {feed.url}: 上次收录的单集已不在订阅中，按发布时间 {watermark:%Y-%m-%d %H:%M} 之后收录")
+                return [entry for entry, published in dated if published > watermark]
+        logger.warning(f"⚠️ [Feed] {feed.url}: 上次收录的单集已不在订阅中，且无法按发布时间比较，只收录最新的 {feed.backfill} 集")
+        return entries[: feed.backfill]
+
+    def _mark_seen(self, feed: Feed, entry: Any):
+        feed.last_seen_guid = self._entry_guid(entry)
+        feed.last_seen_published = self._entry_published(entry)
+
+    @staticmethod
+    def _entry_published(entry: Any) -> Optional[datetime]:
+        """feedparser 解析出的发布 (或更新) 时间，统一为 UTC"""
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        return datetime(*parsed[:6], tzinfo=timezone.utc) if parsed else None
+
+    @staticmethod
+    def _entry_guid(entry: Any) -> Optional[str]:
+        return entry.get("id") or entry.get("link") or FeedPoller._entry_audio_url(entry)
+
+    @staticmethod
+    def _entry_audio_url(entry: Any) -> Optional[str]:
+        for link in entry.get("links", []):
+            if link.get("type", "").startswith("audio") or link.get("rel") == "enclosure":
+                return link.get("href")
+        return None
+
+    @staticmethod
+    def _parse_duration(value: Optional[str]) -> Optional[int]:
+        """itunes:duration 可能是秒数，也可能是 HH:MM:SS / MM:SS"""
+        if not value:
+            return None
+        try:
+            seconds = 0
+            for part in str(value).strip().split(":"):
+                seconds = seconds * 60 + int(float(part))
+            return seconds
+        except ValueError:
+            return None
@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from backend.core.config import settings
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+STREAM_BLOCK = 64 * 1024
+
+
+class SegmentError(Exception):
+    """分段下载专用异常"""
+
+    pass
+
+
+class HostThrottle:
+    def __init__(self, rate: int):
+        """
+        令牌桶限速 (字节/秒)，同一个 host 的所有连接共享
+        :param rate: 0 表示不限速
+        """
+        self.rate = rate
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: int):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+_host_lock = threading.Lock()
+_host_limits: Dict[str, Tuple[threading.BoundedSemaphore, HostThrottle]] = {}
+
+
+def _host_limit(url: str) -> Tuple[threading.BoundedSemaphore, HostThrottle]:
+    """每个 host 一组连接数上限 + 带宽上限，进程内所有下载共享"""
+    host = urlparse(url).netloc
+    with _host_lock:
+        if host not in _host_limits:
+            _host_limits[host] = (threading.BoundedSemaphore(settings.DOWNLOAD_HOST_CONNECTIONS), HostThrottle(settings.DOWNLOAD_HOST_BANDWIDTH))
+        return _host_limits[host]
+
+
+class SegmentedDownloader:
+    def __init__(self, connections: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        普通 HTTP 媒体文件的多连接分段下载器
+        - 多个 Range 请求并发下载，写入固定的 .part 文件
+        - 每完成一段就记录到 .part.json，中断后只补下载缺失的分段
+        :param connections: 单个文件的并发连接数
+        :param chunk_size: 分段大小 (字节)
+        """
+        self.connections = connections or settings.DOWNLOAD_CONNECTIONS
+        self.chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_MB * 1024 * 1024
+        self.timeout = (settings.RESOLVER_CONNECT_TIMEOUT, settings.DOWNLOAD_READ_TIMEOUT)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(self.connections, settings.DOWNLOAD_HOST_CONNECTIONS) * 2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str, dest: Path, proxy_url: Optional[str] = None) -> Path:
+        """
+        下载到 dest；已存在同名 .part 时断点续传
+        """
+        if dest.exists():
+            return dest
+        part_path = dest.with_name(dest.name + ".part")
+        state_path = dest.with_name(dest.name + ".part.json")
+
+        proxies = {"http": proxy_url, "https": proxy_url} if proxy_url else None
+        size, ranges_ok = self._head(url, proxies)
+        if not size or not ranges_ok:
+            logger.info(f"[Segmented] 服务器不支持 Range，单连接下载: {url}")
+            self._fetch_single(url, part_path, proxies)
+        else:
+            self._fetch_segments(url, size, part_path, state_path, proxies)
+
+        part_path.replace(dest)
+        state_path.unlink(missing_ok=True)
+        return dest
+
+    def _head(self, url: str, proxies: Optional[Dict]) -> Tuple[Optional[int], bool]:
+        try:
+            resp = self.session.head(url, timeout=self.timeout, allow_redirects=True, proxies=proxies)
+        except requests.RequestException as e:
+            logger.debug(f"[Segmented] HEAD 请求失败: {e}")
+            return None, False
+        size = resp.headers.get("Content-Length")
+        ranges_ok = resp.headers.get("Accept-Ranges", "").lower() == "bytes"
+        return (int(size) if size and size.isdigit() else None), ranges_ok
+
+    def _fetch_segments(self, url: str, size: int, part_path: Path, state_path: Path, proxies: Optional[Dict]):
+        state = self._load_state(state_path)
+        if state.get("url") != url or state.get("size") != size or state.get("chunk_size") != self.chunk_size or not part_path.exists():
+            state = {"url": url, "size": size, "chunk_size": self.chunk_size, "done": []}
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+
+        total = (size + self.chunk_size - 1) // self.chunk_size
+        done = set(state["done"])
+        pending = [i for i in range(total) if i not in done]
+        if done:
+            logger.info(f"⏯️ [Segmented] 断点续传: 已完成 {len(done)}/{total} 段")
+        logger.info(f"[Segmented] 开始下载 {size / 1024 / 1024:.1f} MB | {len(pending)} 段 | {self.connections} 连接")
+
+        lock = threading.Lock()
+        started = time.monotonic()
+
+        def worker(index: int):
+            start = index * self.chunk_size
+            end = min(start + self.chunk_size, size) - 1
+            self._fetch_range(url, part_path, start, end, proxies)
+            with lock:
+                done.add(index)
+                state["done"] = sorted(done)
+                self._save_state(state_path, state)
+
+        with ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="segment") as pool:
+            for future in [pool.submit(worker, i) for i in pending]:
+                future.result()
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        fetched = sum(min(self.chunk_size, size - i * self.chunk_size) for i in pending)
+        logger.success(f"✅ [Segmented] 下载完成 | {fetched / 1024 / 1024 / elapsed:.1f} MB/s")
+
+    def _fetch_range(self, url: str, part_path: Path, start: int, end: int, proxies: Optional[Dict]):
+        semaphore, throttle = _host_limit(url)
+        headers = {"Range": f"bytes={start}-{end}"}
+        with semaphore:
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout, proxies=proxies) as resp:
+                if resp.status_code != 206:
+                    raise SegmentError(f"Range 请求返回 {resp.status_code}")
+                offset = start
+                with open(part_path, "r+b") as f:
+                    f.seek(offset)
+                    for block in resp.iter_content(STREAM_BLOCK):
+                        throttle.consume(len(block))
+                        f.write(block)
+                        offset += len(block)
+        if offset != end + 1:
+            raise SegmentError(f"分段不完整: {start}-{end} 实际到 {offset}")
+
+    def _fetch_single(self, url: str, part_path: Path, proxies: Optional[Dict]):
+        semaphore, throttle = _host_limit(url)
+        with semaphore:
+            with self.session.get(url, stream=True, timeout=self.timeout, proxies=proxies) as resp:
+                resp.raise_for_status()
+                with open(part_path, "wb") as f:
+                    for block in resp.iter_content(STREAM_BLOCK):
+                        throttle.consume(len(block))
+                        f.write(block)
+
+    @staticmethod
+    def _load_state(state_path: Path) -> Dict:
+        if not state_path.exists():
+            return {}
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_state(state_path: Path, state: Dict):
+        tmp_path = state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        tmp_path.replace(state_path)
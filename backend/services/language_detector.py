@@ -0,0 +1,164 @@
+import hashlib
+import importlib.util
+import json
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from backend.core.config import settings
+from backend.core.utils import detect_language_from_title
+
+HAS_FASTER_WHISPER = importlib.util.find_spec("faster_whisper") is not None
+
+SAMPLE_RATE = 16000
+FINGERPRINT_BYTES = 1024 * 1024
+
+
+class LanguageDetector:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        sample_seconds: Optional[int] = None,
+        num_windows: Optional[int] = None,
+        cache_path: str = "data/cache/language_id.json",
+    ):
+        """
+        基于音频的语种识别 (LID)
+        只解码少量采样窗口，用 faster-whisper 小模型判断语种，结果按音频指纹缓存
+        :param model_name: faster-whisper 模型名 (默认 tiny)
+        :param sample_seconds: 每个采样窗口的秒数
+        :param num_windows: 采样窗口数 (时长未知时退化为只取开头)
+        """
+        self.model_name = model_name or settings.LANG_DETECT_MODEL
+        self.sample_seconds = sample_seconds or settings.LANG_DETECT_SECONDS
+        self.num_windows = num_windows or settings.LANG_DETECT_WINDOWS
+        self.cache_path = Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._cache: Dict[str, str] = self._load_cache()
+        self._lock = threading.Lock()
+        self._model = None
+
+    def detect(self, audio_path: str, duration: Optional[int] = None, title: Optional[str] = None) -> str:
+        """
+        返回语种代码 (如 zh / en / ja)，识别失败时回退到标题规则
+        """
+        try:
+            fingerprint = self._fingerprint(audio_path)
+        except OSError as e:
+            logger.warning(f"⚠️ [LID] 无法读取音频，回退到标题规则: {e}")
+            return detect_language_from_title(title or "")
+
+        cached = self._cache.get(fingerprint)
+        if cached:
+            logger.debug(f"⏭️ [LID] 命中缓存: {audio_path} -> {cached}")
+            return cached
+
+        if not HAS_FASTER_WHISPER:
+            logger.warning("⚠️ [LID] 未安装 faster-whisper，回退到标题规则")
+            return detect_language_from_title(title or "")
+
+        try:
+            language, prob = self._detect_from_audio(audio_path, duration)
+        except Exception as e:
+            logger.warning(f"⚠️ [LID] 音频语种识别失败，回退到标题规则: {e}")
+            return detect_language_from_title(title or "")
+
+        if prob < settings.LANG_DETECT_MIN_PROB:
+            fallback = detect_language_from_title(title or "")
+            logger.info(f"🤔 [LID] 置信度过低 ({language}, {prob:.2f})，使用标题规则: {fallback}")
+            return fallback
+
+        logger.info(f"🗣️ [LID] 音频语种: {language} (置信度 {prob:.2f})")
+        self._save_cache(fingerprint, language)
+        return language
+
+    def _detect_from_audio(self, audio_path: str, duration: Optional[int]) -> tuple:
+        model = self._get_model()
+        total: Dict[str, float] = {}
+        windows = 0
+        for offset in self._sample_offsets(duration):
+            audio = self._decode_window(audio_path, offset, self.sample_seconds)
+            if audio.size < SAMPLE_RATE:
+                continue
+            _, _, all_probs = model.detect_language(audio=audio)
+            for lang, prob in all_probs:
+                total[lang] = total.get(lang, 0.0) + prob
+            windows += 1
+        if not windows:
+            raise ValueError("采样窗口内没有可用音频")
+        language = max(total, key=total.get)
+        return language, total[language] / windows
+
+    def _sample_offsets(self, duration: Optional[int]) -> List[float]:
+        """
+        在音频中均匀取若干窗口，避开片头音乐
+        时长未知或过短时只取开头
+        """
+        if not duration or self.num_windows <= 1 or duration < self.sample_seconds * (self.num_windows + 1):
+            return [0.0]
+        step = duration / (self.num_windows + 1)
+        return [step * (i + 1) - self.sample_seconds / 2 for i in range(self.num_windows)]
+
+    def _decode_window(self, audio_path: str, offset: float, seconds: int) -> np.ndarray:
+        """用 ffmpeg 只解码指定窗口，输出 16k 单声道 float32"""
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-v",
+            "error",
+            "-ss",
+            f"{max(offset, 0.0):.2f}",
+            "-t",
+            str(seconds),
+            "-i",
+            audio_path,
+            "-ac",
+            "1",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-f",
+            "s16le",
+            "-",
+        ]
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+        return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                logger.info(f"⏳ [LID] 正在加载语种识别模型 ({self.model_name})...")
+                self._model = WhisperModel(self.model_name, device="cpu", compute_type="int8")
+            return self._model
+
+    @staticmethod
+    def _fingerprint(audio_path: str) -> str:
+        """音频指纹：文件大小 + 头部 1MB 的 sha1"""
+        path = Path(audio_path)
+        h = hashlib.sha1(str(path.stat().st_size).encode())
+        with open(path, "rb") as f:
+            h.update(f.read(FINGERPRINT_BYTES))
+        return h.hexdigest()
+
+    def _load_cache(self) -> Dict[str, str]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"⚠️ [LID] 缓存文件损坏，已忽略: {self.cache_path}")
+            return {}
+
+    def _save_cache(self, fingerprint: str, language: str):
+        with self._lock:
+            self._cache[fingerprint] = language
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f)
+            tmp_path.replace(self.cache_path)
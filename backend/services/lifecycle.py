@@ -0,0 +1,189 @@
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+from sqlalchemy import func
+from sqlmodel import Session, col, select
+
+from backend.core.config import settings
+from backend.models import SourceMedia, utc_now
+from backend.services.object_store import ObjectStore, ObjectStoreError
+
+TRANSCRIPT_SUFFIXES = (".json", ".srt", ".txt")
+# 只处理已结束的任务，避免和正在运行的流水线抢同一个文件
+SETTLED_STATUSES = ("completed", "failed")
+
+
+class StorageLifecycle:
+    def __init__(self, audio_dir: str = "data/audio", transcript_dir: str = "data/transcripts", store: Optional[ObjectStore] = None):
+        """
+        音频 / 逐字稿文件的生命周期管理
+        1. 完成后把 192k MP3 转为低码率单声道 Opus
+        2. 超过保留期的音频移到对象存储 (未配置时直接删除，重新处理时从原链接下载)
+        3. 超过保留期的逐字稿文件移到对象存储后删除本地副本 (数据库里的片段才是源数据，可随时重建)
+        4. 本地音频总量超过配额时按最近使用时间 (LRU) 淘汰
+        """
+        self.audio_dir = Path(audio_dir)
+        self.transcript_dir = Path(transcript_dir)
+        self.store = store or ObjectStore()
+
+    def sweep(self, session: Session) -> Dict[str, int]:
+        """执行一轮生命周期策略，返回各动作的处理数量"""
+        stats = {"compressed": 0, "offloaded": 0, "transcripts": 0, "quota_evicted": 0}
+
+        if settings.AUDIO_COMPRESS_BITRATE:
+            for media in self._settled(session, select(SourceMedia).where(SourceMedia.audio_state == "local")):
+                if self._safe(self.compress, session, media):
+                    stats["compressed"] += 1
+
+        if settings.AUDIO_RETENTION_DAYS:
+            cutoff = utc_now() - timedelta(days=settings.AUDIO_RETENTION_DAYS)
+            # 旧数据没有 audio_accessed_at，按最后更新时间计算
+            last_used = func.coalesce(SourceMedia.audio_accessed_at, SourceMedia.updated_at)
+            statement = select(SourceMedia).where(col(SourceMedia.audio_state).in_(["local", "compressed"])).where(last_used < cutoff)
+            for media in self._settled(session, statement):
+                if self._safe(self.offload, session, media):
+                    stats["offloaded"] += 1
+
+        if settings.TRANSCRIPT_RETENTION_DAYS:
+            stats["transcripts"] = self.offload_transcripts(utc_now() - timedelta(days=settings.TRANSCRIPT_RETENTION_DAYS))
+
+        if settings.AUDIO_DISK_QUOTA_GB:
+            stats["quota_evicted"] = self.enforce_quota(session)
+
+        if any(stats.values()):
+            logger.info(f"🧹 [Lifecycle] 本轮处理: {stats}")
+        return stats
+
+    def compress(self, session: Session, media: SourceMedia) -> bool:
+        """把本地音频转为低码率 Opus (语音识别不受影响，体积约为 192k MP3 的 1/8)"""
+        source = Path(media.local_audio_path or "")
+        if not source.is_file():
+            # 记录为本地但文件已不在：标记为已淘汰，重新处理时重新下载
+            media.audio_state = "evicted"
+            session.add(media)
+            session.commit()
+            return False
+        target = source.with_suffix(".opus")
+        tmp = target.with_suffix(".tmp.opus")
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", str(source), "-vn", "-ac", "1", "-c:a", "libopus", "-b:a", settings.AUDIO_COMPRESS_BITRATE, "-application", "voip", str(tmp)]
+        subprocess.run(cmd, check=True)
+        tmp.replace(target)
+        if target != source:
+            source.unlink(missing_ok=True)
+        media.local_audio_path = str(target)
+        media.audio_state = "compressed"
+        session.add(media)
+        session.commit()
+        logger.debug(f"🗜️ [Lifecycle] 已压缩 MediaID={media.id}: {target}")
+        return True
+
+    def offload(self, session: Session, media: SourceMedia) -> bool:
+        """本地音频移到对象存储；未启用对象存储时直接删除"""
+        path = Path(media.local_audio_path or "")
+        if self.store.enabled and path.is_file():
+            key = f"audio/{path.name}"
+            if media.audio_object_key != key:
+                self.store.upload(path, key)
+            media.audio_object_key = key
+            media.audio_state = "archived"
+        else:
+            media.audio_state = "archived" if media.audio_object_key else "evicted"
+        path.unlink(missing_ok=True)
+        session.add(media)
+        session.commit()
+        logger.debug(f"📦 [Lifecycle] 音频已移出本地 MediaID={media.id} ({media.audio_state})")
+        return True
+
+    def offload_transcripts(self, cutoff: datetime) -> int:
+        """按文件修改时间移出过期的逐字稿文件 (需要时由 StorageManager 从数据库重建)"""
+        if not self.transcript_dir.exists():
+            return 0
+        moved = 0
+        for path in self.transcript_dir.iterdir():
+            if path.suffix not in TRANSCRIPT_SUFFIXES or not path.is_file():
+                continue
+            if datetime.fromtimestamp(path.stat().st_mtime, timezone.utc) >= cutoff:
+                continue
+            try:
+                if self.store.enabled:
+                    self.store.upload(path, f"transcripts/{path.name}")
+                path.unlink()
+                moved += 1
+            except (ObjectStoreError, OSError) as e:
+                logger.warning(f"⚠️ [Lifecycle] 逐字稿归档失败 {path.name}: {e}")
+        return moved
+
+    def restore(self, session: Session, media: SourceMedia) -> bool:
+        """
+        从对象存储取回音频
+        :return: 取回成功返回 True；evicted 或取回失败返回 False，由调用方从原链接重新下载
+        """
+        if media.audio_state != "archived" or not media.audio_object_key or not self.store.enabled:
+            return False
+        path = Path(media.local_audio_path or self.audio_dir / Path(media.audio_object_key).name)
+        try:
+            self.store.download(media.audio_object_key, path)
+        except ObjectStoreError as e:
+            logger.warning(f"⚠️ [Lifecycle] 取回音频失败，将重新下载 MediaID={media.id}: {e}")
+            return False
+        media.local_audio_path = str(path)
+        media.audio_state = "compressed" if path.suffix == ".opus" else "local"
+        session.add(media)
+        session.commit()
+        logger.info(f"📥 [Lifecycle] 已从对象存储取回音频 MediaID={media.id}")
+        return True
+
+    def enforce_quota(self, session: Session) -> int:
+        """本地音频总量超过配额时，按最近使用时间从旧到新移出本地"""
+        quota = int(settings.AUDIO_DISK_QUOTA_GB * 1024**3)
+        usage = self._dir_size(self.audio_dir)
+        if usage <= quota:
+            return 0
+        logger.info(f"💽 [Lifecycle] 音频目录 {usage / 1024**3:.2f}GB 超出配额 {settings.AUDIO_DISK_QUOTA_GB}GB，开始 LRU 淘汰")
+        statement = select(SourceMedia).where(col(SourceMedia.audio_state).in_(["local", "compressed"])).order_by(func.coalesce(SourceMedia.audio_accessed_at, SourceMedia.updated_at).asc())
+        evicted = 0
+        for media in self._settled(session, statement):
+            if usage <= quota:
+                break
+            path = Path(media.local_audio_path or "")
+            size = path.stat().st_size if path.is_file() else 0
+            if self._safe(self.offload, session, media):
+                usage -= size
+                evicted += 1
+        return evicted
+
+    @staticmethod
+    def touch(session: Session, media: SourceMedia):
+        """记录音频被使用 (下载 / 转录)，保留期和 LRU 都以此为准"""
+        media.audio_accessed_at = utc_now()
+        session.add(media)
+        session.commit()
+
+    @staticmethod
+    def _settled(session: Session, statement):
+        statement = statement.where(col(SourceMedia.status).in_(SETTLED_STATUSES))
+        return session.exec(statement.limit(settings.LIFECYCLE_BATCH_SIZE)).all()
+
+    @staticmethod
+    def _safe(action, session: Session, media: SourceMedia) -> bool:
+        try:
+            return action(session, media)
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"⚠️ [Lifecycle] {action.__name__} 失败 MediaID={media.id}: {e}")
+            return False
+
+    @staticmethod
+    def _dir_size(path: Path) -> int:
+        total = 0
+        if not path.exists():
+            return 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat().st_size
+        return total
@@ -0,0 +1,196 @@
+import importlib.util
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from backend.core.config import settings
+from backend.core.metrics import LIVE_DROPPED_SECONDS, LIVE_LAG_SECONDS
+from backend.services.transcriber import TranscriptionError
+
+HAS_FASTER_WHISPER = importlib.util.find_spec("faster_whisper") is not None
+
+SAMPLE_RATE = 16000
+READ_SECONDS = 0.5
+
+
+class LiveTranscriber:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        window_seconds: Optional[float] = None,
+        step_seconds: Optional[float] = None,
+        stable_margin: Optional[float] = None,
+        max_lag: Optional[float] = None,
+    ):
+        """
+        直播 / 增长中录音的实时转录
+        ffmpeg 持续解码为 16k PCM，每积累 step 秒新音频就对滑动窗口重新识别一次，
+        窗口内结束时间早于 (窗口末尾 - stable_margin) 的句子视为已稳定，提交后从窗口中移除
+        :param model_name: faster-whisper 模型名
+        :param window_seconds: 滑动窗口最大长度 (秒)，决定单次识别耗时上限
+        :param step_seconds: 每隔多少秒新音频识别一次
+        :param stable_margin: 窗口末尾多少秒内的句子可能还会变化，暂不提交
+        :param max_lag: 允许的最大延迟 (秒)，识别跟不上时丢弃最旧的音频以保证延迟有界
+        """
+        self.model_name = model_name or settings.LIVE_ASR_MODEL
+        self.window_seconds = window_seconds or settings.LIVE_WINDOW_SECONDS
+        self.step_seconds = step_seconds or settings.LIVE_STEP_SECONDS
+        self.stable_margin = stable_margin or settings.LIVE_STABLE_MARGIN
+        self.max_lag = max_lag or settings.LIVE_MAX_LAG_SECONDS
+        self._lock = threading.Lock()
+        self._model = None
+
+    def run(
+        self,
+        source_url: str,
+        on_segments: Callable[[List[Dict]], None],
+        stop_event: threading.Event,
+        language: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        max_seconds: Optional[float] = None,
+    ) -> float:
+        """
+        阻塞运行直到音频流结束、stop_event 被设置或达到 max_seconds
+        :param on_segments: 每次有句子稳定时回调，segments 格式与 AudioTranscriber.transcribe 相同
+        :param language: 已知语种；为空时用第一个窗口识别并固定下来
+        :return: 已处理的音频时长 (秒)
+        """
+        if not HAS_FASTER_WHISPER:
+            raise ImportError("未安装 faster-whisper，无法使用实时转录。请运行 uv add faster-whisper")
+        model = self._get_model()
+        max_seconds = max_seconds or settings.LIVE_MAX_SECONDS
+
+        process = self._open_stream(source_url, headers or {})
+        chunks: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        reader = threading.Thread(target=self._read_pcm, args=(process, chunks), name="live-reader", daemon=True)
+        reader.start()
+
+        buffer = np.zeros(0, dtype=np.float32)
+        buffer_start = 0.0  # buffer[0] 在流中的时间 (秒)
+        received = 0.0
+        last_decode = 0.0
+        prompt = ""
+        finished = False
+        logger.info(f"🔴 [Live] 开始实时转录: {source_url}")
+        try:
+            while not finished and not stop_event.is_set():
+                try:
+                    chunk = chunks.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                pending = [chunk]
+                while not chunks.empty():
+                    pending.append(chunks.get_nowait())
+                if pending[-1] is None:
+                    finished = True
+                    pending.pop()
+                if pending:
+                    buffer = np.concatenate([buffer, *pending])
+                    received += sum(len(c) for c in pending) / SAMPLE_RATE
+                if received >= max_seconds:
+                    logger.info(f"⏹️ [Live] 达到最大时长 {max_seconds:.0f}s，停止转录")
+                    finished = True
+
+                # 识别跟不上实时：丢弃最旧的音频，保证延迟有界
+                overflow = len(buffer) / SAMPLE_RATE - (self.window_seconds + self.max_lag)
+                if overflow > 0:
+                    drop = int(overflow * SAMPLE_RATE)
+                    buffer = buffer[drop:]
+                    buffer_start += drop / SAMPLE_RATE
+                    LIVE_DROPPED_SECONDS.inc(drop / SAMPLE_RATE)
+                    logger.warning(f"⚠️ [Live] 识别落后，丢弃 {drop / SAMPLE_RATE:.1f}s 音频")
+
+                if not finished and received - last_decode < self.step_seconds:
+                    continue
+                last_decode = received
+
+                segments, language = self._decode(model, buffer, buffer_start, language, prompt)
+                buffer_end = buffer_start + len(buffer) / SAMPLE_RATE
+                if finished:
+                    stable = segments
+                else:
+                    stable = [s for s in segments if s["end"] <= buffer_end - self.stable_margin]
+                    if not stable and len(buffer) / SAMPLE_RATE >= self.window_seconds:
+                        # 窗口已满仍没有稳定句子：强制提交除最后一句外的内容
+                        stable = segments[:-1] if len(segments) > 1 else segments
+
+                if stable:
+                    for seg in stable:
+                        LIVE_LAG_SECONDS.observe(max(received - seg["end"], 0.0))
+                    on_segments(stable)
+                    prompt = stable[-1]["text"]
+                    cut = stable[-1]["end"]
+                elif not segments:
+                    # 窗口里只有静音：保留末尾一小段防止截断句首
+                    cut = buffer_end - self.stable_margin
+                else:
+                    cut = buffer_start
+                if cut > buffer_start:
+                    drop = int((cut - buffer_start) * SAMPLE_RATE)
+                    buffer = buffer[drop:]
+                    buffer_start += drop / SAMPLE_RATE
+        finally:
+            process.kill()
+            process.wait()
+        logger.success(f"✅ [Live] 实时转录结束，共处理 {received:.0f}s 音频")
+        return received
+
+    def _decode(self, model, audio: np.ndarray, offset: float, language: Optional[str], prompt: str) -> tuple:
+        if audio.size < SAMPLE_RATE:
+            return [], language
+        started = time.perf_counter()
+        lang = language if language and language != "auto" else None
+        segments, info = model.transcribe(
+            audio,
+            language=lang,
+            beam_size=1,
+            vad_filter=True,
+            condition_on_previous_text=False,
+            initial_prompt=prompt or None,
+        )
+        result = [{"start": offset + s.start, "end": offset + s.end, "text": s.text.strip(), "speaker": "Speaker_0"} for s in segments if s.text.strip()]
+        elapsed = time.perf_counter() - started
+        if elapsed > self.step_seconds:
+            logger.warning(f"⚠️ [Live] 单次识别耗时 {elapsed:.1f}s 超过步长 {self.step_seconds:.0f}s")
+        return result, lang or info.language
+
+    def _open_stream(self, source_url: str, headers: Dict[str, str]) -> subprocess.Popen:
+        cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+        if source_url.startswith("http"):
+            cmd += ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "10"]
+            if headers:
+                cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+        else:
+            # 本地正在写入的录音文件：读到末尾后继续等待新数据
+            cmd += ["-follow", "1"]
+        cmd += ["-i", source_url, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"]
+        try:
+            return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            raise TranscriptionError(f"无法启动 ffmpeg: {e}") from e
+
+    @staticmethod
+    def _read_pcm(process: subprocess.Popen, chunks: "queue.Queue[Optional[np.ndarray]]"):
+        """后台线程持续读取 PCM，避免识别期间 ffmpeg 管道阻塞导致拉流中断"""
+        size = int(SAMPLE_RATE * READ_SECONDS) * 2
+        while True:
+            data = process.stdout.read(size)
+            if not data:
+                break
+            data = data[: len(data) // 2 * 2]
+            chunks.put(np.frombuffer(data, np.int16).astype(np.float32) / 32768.0)
+        chunks.put(None)
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                logger.info(f"⏳ [Live] 正在加载实时识别模型 ({self.model_name})...")
+                self._model = WhisperModel(self.model_name, device="cpu", compute_type="int8")
+            return self._model
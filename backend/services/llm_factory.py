@@ -1,27 +1,52 @@
+import time
+from typing import TYPE_CHECKING
+
 from loguru import logger
-from openai import OpenAI
 
 from backend.core.config import settings
+from backend.core.metrics import LLM_SECONDS, LLM_TOKENS, record_provider, tracer
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+    from backend.services.ollama_scheduler import OllamaScheduler
 
 
 class LLMService:
     def __init__(self, provider: str | None = None):
         self.provider = provider or settings.DEFAULT_LLM_PROVIDER
-        self.client: OpenAI | None = None
+        self.client: "OpenAI | None" = None
+        self.scheduler: "OllamaScheduler | None" = None
         self.model: str = ""
-        self.extra_params: dict = {}
         self._load_config()
         logger.info(f"🤖 [LLM] 服务已加载 | 厂商: {self.provider} | 模型: {self.model}")
 
+    @staticmethod
+    def model_for(provider: str | None = None) -> str:
+        """不创建客户端，只返回厂商当前配置的模型名 (用于筛选用旧模型生成的总结)"""
+        provider = provider or settings.DEFAULT_LLM_PROVIDER
+        return {
+            "deepseek": settings.DEEPSEEK_MODEL,
+            "ollama": settings.OLLAMA_MODEL,
+            "openai": settings.OPENAI_MODEL,
+            "ppio": settings.PPIO_MODEL,
+        }.get(provider, "")
+
     def _load_config(self):
         """配置加载路由表"""
+        if self.provider == "ollama":
+            from backend.services.ollama_scheduler import get_ollama_scheduler
+
+            # 本地模型走调度器：按长度选 num_ctx、同档位请求并发、模型常驻
+            self.scheduler = get_ollama_scheduler()
+            self.model = settings.OLLAMA_MODEL
+            return
+
+        from openai import OpenAI
+
         if self.provider == "deepseek":
             self.client = OpenAI(base_url=settings.DEEPSEEK_BASE_URL, api_key=settings.DEEPSEEK_API_KEY)
             self.model = settings.DEEPSEEK_MODEL
-        elif self.provider == "ollama":
-            self.client = OpenAI(base_url=settings.OLLAMA_BASE_URL, api_key=settings.OLLAMA_API_KEY)
-            self.model = settings.OLLAMA_MODEL
-            self.extra_params = {"options": {"num_ctx": settings.OLLAMA_CONTEXT}}
         elif self.provider == "openai":
             self.client = OpenAI(base_url=settings.OPENAI_BASE_URL, api_key=settings.OPENAI_API_KEY)
             self.model = settings.OPENAI_MODEL
@@ -33,15 +58,30 @@ class LLMService:
 
     def generate(self, system_prompt: str, user_content: str) -> str | None:
         """通用生成函数"""
+        if self.scheduler:
+            try:
+                return self.scheduler.generate(system_prompt, user_content)
+            except Exception as e:
+                logger.exception(f"❌ [LLM] 调用失败 (厂商: {self.provider})")
+                raise e
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}],
-                temperature=0.7,
-                extra_body=self.extra_params if self.extra_params else None,
-            )
+            with tracer.start_as_current_span("llm.generate", attributes={"provider": self.provider, "model": self.model}):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}],
+                    temperature=0.7,
+                )
+            elapsed = time.perf_counter() - started
+            LLM_SECONDS.labels(provider=self.provider, model=self.model).observe(elapsed)
+            record_provider(self.provider, "200", elapsed)
+            if response.usage:
+                LLM_TOKENS.labels(provider=self.provider, model=self.model, kind="prompt").inc(response.usage.prompt_tokens)
+                LLM_TOKENS.labels(provider=self.provider, model=self.model, kind="completion").inc(response.usage.completion_tokens)
             return response.choices[0].message.content
 
         except Exception as e:
+            # openai.APIStatusError 带有 status_code (429 / 5xx)，网络错误没有
+            record_provider(self.provider, str(getattr(e, "status_code", None) or "error"), time.perf_counter() - started)
             logger.exception(f"❌ [LLM] 调用失败 (厂商: {self.provider})")
             raise e
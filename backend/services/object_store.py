@@ -0,0 +1,86 @@
+import importlib.util
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from backend.core.config import settings
+
+HAS_BOTO3 = importlib.util.find_spec("boto3") is not None
+
+
+class ObjectStoreError(Exception):
+    pass
+
+
+class ObjectStore:
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        bucket: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+    ):
+        """
+        S3 兼容的对象存储 (本地用 MinIO 即可)，用于存放冷数据
+        未配置 OBJECT_STORE_ENDPOINT 或未安装 boto3 时 enabled 为 False，生命周期管理退化为直接删除
+        :param endpoint: 如 http://localhost:9000
+        :param bucket: 存储桶名，不存在时自动创建
+        """
+        self.endpoint = endpoint or settings.OBJECT_STORE_ENDPOINT
+        self.bucket = bucket or settings.OBJECT_STORE_BUCKET
+        self.access_key = access_key or settings.OBJECT_STORE_ACCESS_KEY
+        self.secret_key = secret_key or settings.OBJECT_STORE_SECRET_KEY
+        self._client = None
+        if self.endpoint and not HAS_BOTO3:
+            logger.warning("⚠️ [ObjectStore] 已配置对象存储但未安装 boto3，冷数据将直接删除。请运行 uv add boto3")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoint) and HAS_BOTO3
+
+    def upload(self, local_path: Path, key: str):
+        try:
+            self._get_client().upload_file(str(local_path), self.bucket, key)
+        except Exception as e:
+            raise ObjectStoreError(f"上传失败 {key}: {e}") from e
+        logger.debug(f"☁️ [ObjectStore] 已上传: {key}")
+
+    def download(self, key: str, local_path: Path):
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = local_path.with_suffix(local_path.suffix + ".part")
+        try:
+            self._get_client().download_file(self.bucket, key, str(tmp_path))
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            raise ObjectStoreError(f"下载失败 {key}: {e}") from e
+        tmp_path.replace(local_path)
+        logger.debug(f"☁️ [ObjectStore] 已取回: {key}")
+
+    def delete(self, key: str):
+        try:
+            self._get_client().delete_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            raise ObjectStoreError(f"删除失败 {key}: {e}") from e
+
+    def _get_client(self):
+        if not self.enabled:
+            raise ObjectStoreError("对象存储未启用")
+        if self._client is None:
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint,
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+                region_name=settings.OBJECT_STORE_REGION,
+                config=Config(signature_version="s3v4", s3={"addressing_style": "path"}, retries={"max_attempts": 3}),
+            )
+            try:
+                client.head_bucket(Bucket=self.bucket)
+            except Exception:
+                client.create_bucket(Bucket=self.bucket)
+            self._client = client
+        return self._client
@@ -0,0 +1,201 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from backend.core.config import settings
+from backend.core.metrics import LLM_MODEL_LOADS, LLM_NUM_CTX, LLM_SECONDS, LLM_TOKENS, record_provider, tracer
+
+# 中日韩字符 (含全角标点) 一个字约 0.6 ~ 1 个 token，英文等拼音文字一个词约 1.3 个 token，按字符算只有 0.25 左右
+CJK_RE = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+# prompt_eval_count 接近 num_ctx 时输入已被截断，样本不能用来校准
+TRUNCATED_RATIO = 0.95
+
+
+@dataclass
+class OllamaRequest:
+    system_prompt: str
+    user_content: str
+    num_ctx: int
+    estimated_tokens: int
+    future: Future = field(default_factory=Future)
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+class OllamaScheduler:
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        num_parallel: Optional[int] = None,
+        max_context: Optional[int] = None,
+        keep_alive: Optional[str] = None,
+    ):
+        """
+        本地 Ollama 调度器
+        - 走原生 /api/chat，keep_alive 让模型常驻，不必每次重新加载
+        - 按估算的 token 数为每个请求选择 num_ctx 档位，而不是固定 OLLAMA_CONTEXT
+        - Ollama 切换 num_ctx 会重新加载模型，所以同一档位的请求攒在一起并发发送 (占满 OLLAMA_NUM_PARALLEL 个槽位)，
+          一个档位的请求全部完成后才切换档位
+        - system prompt 固定放在第一条消息，相同前缀的 KV cache 可在槽位间复用
+        :param num_parallel: 并发请求数，应与 Ollama 服务端的 OLLAMA_NUM_PARALLEL 一致
+        :param max_context: num_ctx 上限
+        """
+        self.base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/").removesuffix("/v1")
+        self.model = model or settings.OLLAMA_MODEL
+        self.num_parallel = num_parallel or settings.OLLAMA_NUM_PARALLEL
+        self.max_context = max_context or settings.OLLAMA_CONTEXT
+        self.keep_alive = keep_alive or settings.OLLAMA_KEEP_ALIVE
+        self.buckets = sorted(b for b in settings.OLLAMA_CONTEXT_BUCKETS if b < self.max_context) + [self.max_context]
+        # 每个字符约合多少 token (按文字类别分开)，用 Ollama 返回的 prompt_eval_count 持续校准
+        self.tokens_per_char: Dict[str, float] = {"cjk": settings.OLLAMA_TOKENS_PER_CJK_CHAR, "other": settings.OLLAMA_TOKENS_PER_OTHER_CHAR}
+
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(settings.OLLAMA_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(max_connections=self.num_parallel, max_keepalive_connections=self.num_parallel),
+        )
+        self._pool = ThreadPoolExecutor(max_workers=self.num_parallel, thread_name_prefix="ollama")
+        self._pending: Deque[OllamaRequest] = deque()
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._active_ctx: Optional[int] = None
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="ollama-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def estimate_tokens(self, text: str) -> int:
+        cjk, other = self._count_chars(text)
+        return int(cjk * self.tokens_per_char["cjk"] + other * self.tokens_per_char["other"]) + 1
+
+    @staticmethod
+    def _count_chars(text: str) -> Tuple[int, int]:
+        """:return: (中日韩字符数, 其他字符数)"""
+        cjk = len(CJK_RE.findall(text))
+        return cjk, len(text) - cjk
+
+    def pick_num_ctx(self, prompt_tokens: int) -> int:
+        """为输入 + 输出预留选择最小的够用档位"""
+        needed = prompt_tokens + settings.OLLAMA_MAX_OUTPUT_TOKENS
+        for bucket in self.buckets:
+            if needed <= bucket:
+                return bucket
+        logger.warning(f"⚠️ [Ollama] 估算需要 {needed} tokens，超过上限 {self.max_context}，输入将被截断")
+        return self.max_context
+
+    def submit(self, system_prompt: str, user_content: str) -> Future:
+        estimated = self.estimate_tokens(system_prompt) + self.estimate_tokens(user_content)
+        request = OllamaRequest(system_prompt, user_content, self.pick_num_ctx(estimated), estimated)
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify_all()
+        return request.future
+
+    def generate(self, system_prompt: str, user_content: str) -> Optional[str]:
+        """阻塞等待调度结果 (Summarizer 在线程里调用)"""
+        return self.submit(system_prompt, user_content).result()
+
+    # ---------- 调度 ----------
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+                while not batch:
+                    self._cond.wait()
+                    batch = self._next_batch()
+                self._inflight += len(batch)
+                self._active_ctx = batch[0].num_ctx
+            if len(batch) > 1:
+                logger.debug(f"[Ollama] 并发发送 {len(batch)} 个请求 (num_ctx={batch[0].num_ctx})")
+            for request in batch:
+                self._pool.submit(self._run, request)
+
+    def _next_batch(self) -> List[OllamaRequest]:
+        """
+        选出下一批可以发送的请求 (调用方持有锁)
+        有请求在途时只补充同档位的请求；全部空闲后切到最早提交的请求所在档位
+        最早的请求等待过久时停止补充，让在途请求排空后切换，避免其他档位饿死
+        """
+        free = self.num_parallel - self._inflight
+        if free <= 0 or not self._pending:
+            return []
+        if self._inflight and time.perf_counter() - self._pending[0].submitted_at > settings.OLLAMA_MAX_WAIT:
+            return []
+        num_ctx = self._active_ctx if self._inflight else self._pending[0].num_ctx
+        batch = [r for r in self._pending if r.num_ctx == num_ctx][:free]
+        for request in batch:
+            self._pending.remove(request)
+        return batch
+
+    def _run(self, request: OllamaRequest):
+        try:
+            request.future.set_result(self._chat(request))
+        except Exception as e:
+            request.future.set_exception(e)
+        finally:
+            with self._cond:
+                self._inflight -= 1
+                self._cond.notify_all()
+
+    def _chat(self, request: OllamaRequest) -> Optional[str]:
+        started = time.perf_counter()
+        attributes = {"provider": "ollama", "model": self.model, "num_ctx": request.num_ctx, "queue_seconds": started - request.submitted_at}
+        with tracer.start_as_current_span("llm.generate", attributes=attributes):
+            response = self.client.post(
+                "/api/chat",
+                json={
+                    "model": self.model,
+                    "messages": [{"role": "system", "content": request.system_prompt}, {"role": "user", "content": request.user_content}],
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {"num_ctx": request.num_ctx, "temperature": 0.7},
+                },
+            )
+            record_provider("ollama", str(response.status_code), time.perf_counter() - started)
+            response.raise_for_status()
+            data = response.json()
+
+        LLM_SECONDS.labels(provider="ollama", model=self.model).observe(time.perf_counter() - started)
+        LLM_NUM_CTX.labels(model=self.model).observe(request.num_ctx)
+        prompt_tokens = data.get("prompt_eval_count") or 0
+        LLM_TOKENS.labels(provider="ollama", model=self.model, kind="prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(provider="ollama", model=self.model, kind="completion").inc(data.get("eval_count") or 0)
+        # load_duration 单位为纳秒，超过 1 秒说明模型被重新加载了
+        if (data.get("load_duration") or 0) > 1e9:
+            LLM_MODEL_LOADS.labels(model=self.model).inc()
+            logger.info(f"🔄 [Ollama] 模型已重新加载 (num_ctx={request.num_ctx}, {data['load_duration'] / 1e9:.1f}s)")
+        self._calibrate(request, prompt_tokens)
+        return (data.get("message") or {}).get("content")
+
+    def _calibrate(self, request: OllamaRequest, prompt_tokens: int):
+        """
+        用实际的 prompt_eval_count 校准占比较大的那类字符的 token 比例 (指数滑动平均)
+        system prompt 命中 KV cache 时 prompt_eval_count 只统计 user 部分：
+        实际值更接近"只有 user"的估算时按 user 内容校准，否则按 system + user 校准
+        """
+        if not prompt_tokens or prompt_tokens >= request.num_ctx * TRUNCATED_RATIO:
+            return
+        system_tokens = self.estimate_tokens(request.system_prompt)
+        cache_hit = abs(prompt_tokens - (request.estimated_tokens - system_tokens)) < abs(prompt_tokens - request.estimated_tokens)
+        text = request.user_content if cache_hit else request.system_prompt + request.user_content
+        counts = dict(zip(("cjk", "other"), self._count_chars(text)))
+        kind = max(counts, key=lambda k: counts[k] * self.tokens_per_char[k])
+        if not counts[kind]:
+            return
+        # 另一类字符按当前比例扣除，剩下的 token 都算到占比较大的这一类
+        rest = sum(counts[k] * self.tokens_per_char[k] for k in counts if k != kind)
+        sample = max(prompt_tokens - rest, 0) / counts[kind]
+        self.tokens_per_char[kind] = 0.8 * self.tokens_per_char[kind] + 0.2 * sample
+
+
+@lru_cache(maxsize=None)
+def get_ollama_scheduler() -> OllamaScheduler:
+    """进程内共享一个调度器，所有 LLMService 实例的请求一起排队"""
+    return OllamaScheduler()
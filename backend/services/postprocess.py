@@ -0,0 +1,119 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from backend.core.config import settings
+
+CJK = r"぀-ヿ㐀-䶿一-鿿가-힯"
+CJK_CHAR_RE = re.compile(f"[{CJK}　-〿＀-￯]")
+WHITESPACE_RE = re.compile(r"\s+")
+# 中日韩文字 / 全角标点之间不应有空格 (Deepgram 段落用空格拼接、WhisperX 分词都会引入)
+CJK_SPACE_RE = re.compile(f"(?<=[{CJK}　-〿＀-￯])\\s+(?=[{CJK}　-〿＀-￯])")
+SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+(?=[,.!?;:，。！？；：、])")
+REPEATED_PUNCT_RE = re.compile(r"([，。！？；：、,;:])\1+")
+
+
+class TranscriptPostProcessor:
+    def __init__(
+        self,
+        max_segment_seconds: Optional[float] = None,
+        max_gap_seconds: Optional[float] = None,
+        min_speaker_seconds: Optional[float] = None,
+    ):
+        """
+        转录结果后处理 (三种引擎的输出统一走这里)
+        1. 说话人平滑: 夹在同一说话人之间、总时长过短的说话人片段并入两侧
+        2. 片段合并: 相邻、同一说话人、间隔不大的片段合并，单段不超过 max_segment_seconds
+        3. 文本规范化: 合并空白、去掉中文字符间的空格和标点前的空格
+        时间 / 说话人的计算全部基于 numpy 数组，只有最后拼接文本时才逐段处理
+        :param max_segment_seconds: 合并后单段的最长时长
+        :param max_gap_seconds: 间隔超过该值的相邻片段不合并
+        :param min_speaker_seconds: 短于该值的说话人切换视为误判
+        """
+        self.max_segment_seconds = max_segment_seconds or settings.POSTPROCESS_MAX_SEGMENT_SECONDS
+        self.max_gap_seconds = max_gap_seconds or settings.POSTPROCESS_MAX_GAP_SECONDS
+        self.min_speaker_seconds = min_speaker_seconds or settings.POSTPROCESS_MIN_SPEAKER_SECONDS
+
+    def process(self, segments: List[Dict]) -> List[Dict]:
+        if not segments:
+            return segments
+        segments = sorted(segments, key=lambda s: s["start"])
+        starts = np.fromiter((s["start"] for s in segments), dtype=np.float64, count=len(segments))
+        ends = np.fromiter((s["end"] for s in segments), dtype=np.float64, count=len(segments))
+        labels, speakers = np.unique([s["speaker"] for s in segments], return_inverse=True)
+
+        speakers = self.smooth_speakers(starts, ends, speakers)
+        first = self.group_boundaries(starts, ends, speakers)
+        merged_ends = np.maximum.reduceat(ends, first)
+
+        texts = [self.normalize_text(s["text"]) for s in segments]
+        bounds = np.append(first, len(segments))
+        result = []
+        for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            text = self._join([t for t in texts[lo:hi] if t])
+            if not text:
+                continue
+            result.append({"start": float(starts[lo]), "end": float(merged_ends[i]), "text": text, "speaker": str(labels[speakers[lo]])})
+
+        logger.info(f"🧹 [PostProcess] 片段 {len(segments)} -> {len(result)}")
+        return result
+
+    def smooth_speakers(self, starts: np.ndarray, ends: np.ndarray, speakers: np.ndarray) -> np.ndarray:
+        """
+        以"同一说话人的连续片段"(run) 为单位：前后 run 是同一个人、且自身总时长过短的 run 改成前后的说话人
+        迭代到没有变化为止 (每轮都是整体数组运算)
+        """
+        speakers = speakers.copy()
+        for _ in range(5):
+            change = np.flatnonzero(np.diff(speakers)) + 1
+            run_first = np.concatenate(([0], change))
+            if len(run_first) < 3:
+                break
+            run_last = np.append(change - 1, len(speakers) - 1)
+            run_speaker = speakers[run_first]
+            run_duration = ends[run_last] - starts[run_first]
+
+            prev_speaker = np.roll(run_speaker, 1)
+            next_speaker = np.roll(run_speaker, -1)
+            flip = (run_duration < self.min_speaker_seconds) & (prev_speaker == next_speaker)
+            flip[[0, -1]] = False
+            if not flip.any():
+                break
+            run_speaker = np.where(flip, prev_speaker, run_speaker)
+            speakers = np.repeat(run_speaker, run_last - run_first + 1)
+        return speakers
+
+    def group_boundaries(self, starts: np.ndarray, ends: np.ndarray, speakers: np.ndarray) -> np.ndarray:
+        """
+        返回每个合并组第一个片段的下标
+        换人或间隔过大时开新组；同一组内按 max_segment_seconds 的时间窗切分 (按片段开始时间落在哪个窗口)
+        """
+        gaps = starts[1:] - ends[:-1]
+        breaks = np.concatenate(([True], (speakers[1:] != speakers[:-1]) | (gaps > self.max_gap_seconds)))
+        group_id = np.cumsum(breaks) - 1
+        group_start = starts[np.flatnonzero(breaks)][group_id]
+        window = np.floor((starts - group_start) / self.max_segment_seconds).astype(np.int64)
+        window_break = np.concatenate(([False], window[1:] != window[:-1]))
+        return np.flatnonzero(breaks | window_break)
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        text = WHITESPACE_RE.sub(" ", text).strip()
+        text = CJK_SPACE_RE.sub("", text)
+        text = SPACE_BEFORE_PUNCT_RE.sub("", text)
+        return REPEATED_PUNCT_RE.sub(r"\1", text)
+
+    @staticmethod
+    def _join(texts: List[str]) -> str:
+        """中日韩文字之间直接拼接，其余语言用空格"""
+        if not texts:
+            return ""
+        parts = [texts[0]]
+        for text in texts[1:]:
+            if CJK_CHAR_RE.match(parts[-1][-1]) or CJK_CHAR_RE.match(text[0]):
+                parts.append(text)
+            else:
+                parts.append(" " + text)
+        return "".join(parts)
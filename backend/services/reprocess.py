@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from pydantic import TypeAdapter
+from sqlalchemy import exists, func
+from sqlmodel import Session, col, select
+
+from backend.core.config import settings
+from backend.models import ReprocessJob, SourceMedia, SpeakerVoiceprint, Summary, TranscriptSegment
+from backend.services.llm_factory import LLMService
+from backend.services.summarizer import Summarizer
+from backend.services.transcriber import AudioTranscriber
+
+STAGES = ("summary", "asr", "speaker")
+# fromisoformat 在 3.10 上不认识 "Z" 后缀，筛选条件里的时间统一交给 pydantic 解析
+_DATETIME = TypeAdapter(datetime)
+
+
+class ReprocessPlanner:
+    def __init__(self):
+        """
+        批量重处理的选择器：根据筛选条件找出需要重跑的媒体
+        默认 (outdated_only) 只选没有"当前版本"产物的媒体，任务中断后重跑会自动跳过已处理的部分
+        """
+        transcriber = AudioTranscriber(mode="cloud" if settings.DEEPGRAM_API_KEY else "local")
+        self.current_asr_models = {transcriber.model_id_for("zh"), transcriber.model_id_for("en")}
+        self.current_llm_model = LLMService.model_for()
+
+    def create_job(self, session: Session, stage: str, summary_type: str, filters: Dict[str, Any]) -> ReprocessJob:
+        if stage not in STAGES:
+            raise ValueError(f"不支持的阶段: {stage}")
+        job = ReprocessJob(stage=stage, summary_type=summary_type, filters=filters)
+        job.total = session.exec(select(func.count()).select_from(self._base_query(job).subquery())).one()
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        logger.info(f"🔁 [Reprocess] 创建任务 #{job.id}: stage={stage} 匹配 {job.total} 条")
+        return job
+
+    def next_batch(self, session: Session, job: ReprocessJob, limit: Optional[int] = None) -> List[int]:
+        """按 media_id 递增取下一批，cursor 之前的都已处理过"""
+        statement = self._base_query(job).where(SourceMedia.id > job.cursor).order_by(col(SourceMedia.id)).limit(limit or settings.REPROCESS_BATCH_SIZE)
+        return list(session.exec(statement).all())
+
+    def _base_query(self, job: ReprocessJob):
+        filters = job.filters or {}
+        statement = select(SourceMedia.id).where(SourceMedia.status == "completed")
+
+        if filters.get("media_ids"):
+            statement = statement.where(col(SourceMedia.id).in_(filters["media_ids"]))
+        if filters.get("platform"):
+            statement = statement.where(SourceMedia.platform == filters["platform"])
+        if filters.get("created_after"):
+            statement = statement.where(SourceMedia.created_at >= _DATETIME.validate_python(filters["created_after"]))
+        if filters.get("created_before"):
+            statement = statement.where(SourceMedia.created_at < _DATETIME.validate_python(filters["created_before"]))
+
+        summaries = select(Summary.id).where(Summary.media_id == SourceMedia.id).where(Summary.summary_type == job.summary_type)
+        segments = select(TranscriptSegment.id).where(TranscriptSegment.media_id == SourceMedia.id)
+        if filters.get("model_used"):
+            statement = statement.where(exists(summaries.where(Summary.model_used == filters["model_used"])))
+        if filters.get("prompt_version"):
+            statement = statement.where(exists(summaries.where(Summary.prompt_version == filters["prompt_version"])))
+        if filters.get("asr_model"):
+            statement = statement.where(exists(segments.where(TranscriptSegment.asr_model == filters["asr_model"])))
+
+        if filters.get("outdated_only", True):
+            if job.stage == "summary":
+                current_version = Summarizer.prompt_version(Summarizer.prompt_name_for(job.summary_type))
+                up_to_date = summaries.where(Summary.prompt_version == current_version).where(Summary.model_used == self.current_llm_model)
+            elif job.stage == "speaker":
+                up_to_date = select(SpeakerVoiceprint.id).where(SpeakerVoiceprint.media_id == SourceMedia.id)
+            else:
+                up_to_date = segments.where(col(TranscriptSegment.asr_model).in_(self.current_asr_models))
+            statement = statement.where(~exists(up_to_date))
+        return statement
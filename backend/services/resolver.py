@@ -0,0 +1,124 @@
+import html
+import re
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.core.cache import RedisCache
+from backend.core.config import settings
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".aac", ".wav", ".ogg", ".opus", ".flac")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+
+META_TAG_RE = re.compile(rb"<meta\s[^>]*>", re.IGNORECASE)
+META_ATTR_RE = re.compile(rb"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+HEAD_END_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+
+
+class URLResolver:
+    def __init__(self, connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None, cache_ttl: Optional[int] = None):
+        """
+        把分享页 / RSS 地址解析成真实的音频地址
+        共享一个带连接池的 keep-alive Session，单集页面的解析结果按页面地址缓存在 Redis (RSS 的最新一集不缓存)
+        :param connect_timeout: 建连超时 (秒)
+        :param read_timeout: 读取超时 (秒)
+        :param cache_ttl: 解析结果缓存时间 (秒)
+        """
+        self.timeout = (connect_timeout or settings.RESOLVER_CONNECT_TIMEOUT, read_timeout or settings.RESOLVER_READ_TIMEOUT)
+        self.cache = RedisCache("resolve", cache_ttl or settings.RESOLVER_CACHE_TTL)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(
+            pool_connections=settings.RESOLVER_POOL_SIZE,
+            pool_maxsize=settings.RESOLVER_POOL_SIZE,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET", "HEAD"]),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def resolve(self, url: str) -> Dict[str, Optional[str]]:
+        """
+        :return: {"url": 真实音频地址, "title": 标题, "author": 作者}，无法解析时 url 原样返回
+        """
+        if self.is_direct_audio(url):
+            return {"url": url, "title": None, "author": None}
+
+        if url.endswith(".xml") or "rss" in url or "feed" in url:
+            # RSS 解析的是"最新一集"，随时会变，不缓存
+            return self._resolve_rss(url) or {"url": url, "title": None, "author": None}
+
+        cached = self.cache.get(url)
+        if cached:
+            logger.debug(f"⏭️ [Resolver] 命中缓存: {url}")
+            return cached
+
+        result = self._resolve_page_meta(url) if "xiaoyuzhoufm.com" in url else None
+        if not result:
+            return {"url": url, "title": None, "author": None}
+        self.cache.set(url, result)
+        return result
+
+    @staticmethod
+    def is_direct_audio(url: str) -> bool:
+        return urlparse(url).path.lower().endswith(AUDIO_EXTENSIONS)
+
+    def _resolve_rss(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        import feedparser
+
+        try:
+            logger.debug(f"[解析] 正在解析 RSS Feed: {url}")
+            resp = self.session.get(url, timeout=self.timeout)
+            resp.raise_for_status()
+            feed = feedparser.parse(resp.content)
+            if feed.entries:
+                entry = feed.entries[0]
+                for link in entry.links:
+                    if link.get("type", "").startswith("audio"):
+                        return {"url": link["href"], "title": entry.get("title"), "author": feed.feed.get("author") or feed.feed.get("title")}
+        except Exception as e:
+            logger.warning(f"RSS 解析异常: {e}")
+        return None
+
+    def _resolve_page_meta(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        try:
+            logger.debug(f"[解析] 正在解析小宇宙页面: {url}")
+            meta = self._fetch_head_meta(url, wanted=("og:audio", "og:title"))
+        except Exception as e:
+            logger.warning(f"小宇宙解析异常: {e}")
+            return None
+        if not meta.get("og:audio"):
+            return None
+        return {"url": meta["og:audio"], "title": meta.get("og:title"), "author": meta.get("og:site_name")}
+
+    def _fetch_head_meta(self, url: str, wanted: tuple) -> Dict[str, str]:
+        """
+        流式读取页面，只解析 <head> 里的 meta 标签
+        读到 </head> 或所需字段都已找到时立即断开，不下载整页
+        """
+        meta: Dict[str, str] = {}
+        buffer = b""
+        with self.session.get(url, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            for chunk in resp.iter_content(chunk_size=8192):
+                buffer += chunk
+                head_end = HEAD_END_RE.search(buffer)
+                scan = buffer[: head_end.start()] if head_end else buffer
+                meta = self._parse_meta(scan)
+                if head_end or all(k in meta for k in wanted) or len(buffer) > settings.RESOLVER_MAX_HEAD_BYTES:
+                    break
+        return meta
+
+    @staticmethod
+    def _parse_meta(data: bytes) -> Dict[str, str]:
+        meta: Dict[str, str] = {}
+        for tag in META_TAG_RE.findall(data):
+            attrs = {m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3) for m in META_ATTR_RE.finditer(tag)}
+            key = attrs.get(b"property") or attrs.get(b"name")
+            content = attrs.get(b"content")
+            if key and content is not None:
+                meta[key.decode("utf-8", "ignore")] = html.unescape(content.decode("utf-8", "ignore"))
+        return meta
@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import func, or_, select
+from sqlmodel import Session, col
+
+from backend.core.config import settings
+from backend.models import Summary, TranscriptSegment
+from backend.services.embedder import TextEmbedder
+from backend.services.vector_store import VectorStore
+
+RRF_K = 60
+
+
+class SearchService:
+    def __init__(self, index_dir: Optional[str] = None, embedder: Optional[TextEmbedder] = None):
+        """
+        逐字稿 / 总结搜索
+        - 全文检索: PostgreSQL tsvector (GIN) + pg_trgm 模糊匹配 (中文无分词时兜底)
+        - 语义检索: 按时间窗口切分逐字稿，本地模型生成向量，存入 VectorStore
+        """
+        self.store = VectorStore(index_dir or settings.SEARCH_INDEX_DIR)
+        self.embedder = embedder or TextEmbedder()
+        self.ts_config = settings.SEARCH_TS_CONFIG
+
+    # ---------- 建索引 ----------
+
+    def index_segments(self, media_id: int, segments: List[Dict]):
+        """把逐字稿按时间窗口切分后写入向量库 (会先删除该媒体的旧向量)"""
+        windows = self._build_windows(segments)
+        self.store.delete(media_id)
+        if not windows:
+            return
+        vectors = self.embedder.embed_passages([w["text"] for w in windows])
+        self.store.add(vectors, [media_id] * len(windows), [w["start"] for w in windows], [w["end"] for w in windows])
+        logger.success(f"✅ [Search] 向量索引完成 (MediaID: {media_id})，共 {len(windows)} 个窗口")
+
+    @staticmethod
+    def _build_windows(segments: List[Dict]) -> List[Dict]:
+        windows: List[Dict] = []
+        current: Optional[Dict] = None
+        for seg in segments:
+            if current is None:
+                current = {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+            else:
+                current["end"] = seg["end"]
+                current["text"] += " " + seg["text"]
+            if current["end"] - current["start"] >= settings.SEARCH_WINDOW_SECONDS:
+                windows.append(current)
+                current = None
+        if current:
+            windows.append(current)
+        return windows
+
+    # ---------- 查询 ----------
+
+    def search(self, session: Session, query: str, mode: str = "hybrid", limit: int = 20, tag: Optional[str] = None) -> List[Dict]:
+        if mode == "fulltext":
+            return self.fulltext(session, query, limit, tag)
+        if mode == "semantic":
+            return self.semantic(session, query, limit, tag)
+        # hybrid: 两路结果用 Reciprocal Rank Fusion 合并
+        merged: Dict[tuple, Dict] = {}
+        for hits in (self.fulltext(session, query, limit, tag), self.semantic(session, query, limit, tag)):
+            for rank, hit in enumerate(hits):
+                key = (hit["source"], hit["media_id"], hit["start_time"])
+                entry = merged.setdefault(key, {**hit, "score": 0.0})
+                entry["score"] += 1.0 / (RRF_K + rank + 1)
+        return sorted(merged.values(), key=lambda h: h["score"], reverse=True)[:limit]
+
+    def fulltext(self, session: Session, query: str, limit: int = 20, tag: Optional[str] = None) -> List[Dict]:
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        tsquery = func.plainto_tsquery(self.ts_config, query)
+        hits: List[Dict] = []
+
+        seg_text = col(TranscriptSegment.text)
+        seg_tsv = func.to_tsvector(self.ts_config, seg_text)
+        seg_score = func.ts_rank(seg_tsv, tsquery) + func.word_similarity(query, seg_text)
+        statement = select(TranscriptSegment.media_id, TranscriptSegment.start_time, TranscriptSegment.end_time, seg_text, seg_score.label("score")).where(or_(seg_tsv.op("@@")(tsquery), seg_text.ilike(pattern))).order_by(seg_score.desc()).limit(limit)
+        if tag:
+            statement = statement.where(col(TranscriptSegment.media_id).in_(self._tagged_media(tag)))
+        for row in session.execute(statement):
+            hits.append({"source": "segment", "media_id": row.media_id, "start_time": row.start_time, "end_time": row.end_time, "text": row.text, "score": float(row.score)})
+
+        sum_text = col(Summary.content)
+        sum_tsv = func.to_tsvector(self.ts_config, sum_text)
+        sum_score = func.ts_rank(sum_tsv, tsquery) + func.word_similarity(query, sum_text)
+        statement = select(Summary.media_id, sum_text, sum_score.label("score")).where(or_(sum_tsv.op("@@")(tsquery), sum_text.ilike(pattern))).order_by(sum_score.desc()).limit(limit)
+        if tag:
+            statement = statement.where(col(Summary.tags).contains([tag]))
+        for row in session.execute(statement):
+            hits.append({"source": "summary", "media_id": row.media_id, "start_time": None, "end_time": None, "text": row.content, "score": float(row.score)})
+
+        return sorted(hits, key=lambda h: h["score"], reverse=True)[:limit]
+
+    def semantic(self, session: Session, query: str, limit: int = 20, tag: Optional[str] = None) -> List[Dict]:
+        if not settings.SEARCH_EMBEDDINGS_ENABLED or not len(self.store):
+            return []
+        results = self.store.search(self.embedder.embed_query(query), k=limit * 3 if tag else limit)
+        if tag and results:
+            allowed = set(session.execute(self._tagged_media(tag)).scalars().all())
+            results = [r for r in results if r[0] in allowed]
+
+        hits = []
+        for media_id, start, end, score in results[:limit]:
+            statement = (
+                select(col(TranscriptSegment.text)).where(TranscriptSegment.media_id == media_id).where(col(TranscriptSegment.start_time) >= start - 0.01).where(col(TranscriptSegment.end_time) <= end + 0.01).order_by(col(TranscriptSegment.start_time))
+            )
+            text = " ".join(session.execute(statement).scalars().all())
+            hits.append({"source": "segment", "media_id": media_id, "start_time": start, "end_time": end, "text": text, "score": score})
+        return hits
+
+    @staticmethod
+    def _tagged_media(tag: str):
+        return select(Summary.media_id).where(col(Summary.tags).contains([tag]))
@@ -0,0 +1,289 @@
+import importlib.util
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import tuple_, update
+from sqlmodel import Session, col, select
+
+from backend.core.config import settings
+from backend.models import SourceMedia, Speaker, SpeakerVoiceprint, TranscriptSegment, utc_now
+from backend.services.vector_store import VectorStore
+
+HAS_FUNASR = importlib.util.find_spec("funasr") is not None
+HAS_PYANNOTE = importlib.util.find_spec("pyannote") is not None
+
+SAMPLE_RATE = 16000
+# pyannote 3.x 说话人分离管线内部使用的嵌入模型
+PYANNOTE_EMBEDDING_MODEL = "pyannote/wespeaker-voxceleb-resnet34-LM"
+# 未做说话人分离时 WhisperX 给出的标签，不代表某个具体的人
+UNKNOWN_LABELS = {"Unknown"}
+
+
+class SpeakerEmbedder:
+    def __init__(self, backend: Optional[str] = None, hf_token: Optional[str] = None, device: Optional[str] = None):
+        """
+        说话人声纹模型，模型在第一次调用时才加载
+        - funasr: cam++ (FunASR 中文转录做说话人分离时用的同一个模型)
+        - pyannote: WeSpeaker ResNet34 (WhisperX 说话人分离管线内部的嵌入模型)
+        :param backend: funasr / pyannote / auto (默认取 SPEAKER_EMBEDDING_BACKEND)
+        """
+        backend = backend or settings.SPEAKER_EMBEDDING_BACKEND
+        if backend == "auto":
+            backend = "funasr" if HAS_FUNASR else "pyannote"
+        if backend not in ("funasr", "pyannote"):
+            raise ValueError(f"不支持的声纹模型: {backend}")
+        self.backend = backend
+        self.hf_token = hf_token if hf_token is not None else settings.HF_TOKEN
+        self.device = device
+        self._lock = threading.Lock()
+        self._model = None
+
+    def embed(self, waveform: np.ndarray) -> np.ndarray:
+        """
+        :param waveform: 16k 单声道 float32
+        :return: 一维声纹向量 (未归一化)
+        """
+        import torch
+
+        model = self._load()
+        with torch.inference_mode():
+            if self.backend == "funasr":
+                vector = model.generate(input=waveform)[0]["spk_embedding"]
+            else:
+                vector = model({"waveform": torch.from_numpy(waveform).unsqueeze(0), "sample_rate": SAMPLE_RATE})
+        if hasattr(vector, "cpu"):
+            vector = vector.cpu().numpy()
+        return np.asarray(vector, dtype=np.float32).reshape(-1)
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                if self.backend == "funasr" and not HAS_FUNASR:
+                    raise ImportError("未安装 funasr，无法提取声纹。请运行 uv add funasr modelscope")
+                if self.backend == "pyannote" and not HAS_PYANNOTE:
+                    raise ImportError("未安装 pyannote.audio，无法提取声纹。请运行 uv add pyannote-audio")
+                import torch
+
+                device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+                logger.info(f"⏳ [Speaker] 正在加载声纹模型 ({self.backend}, {device})...")
+                if self.backend == "funasr":
+                    from funasr import AutoModel
+
+                    self._model = AutoModel(model="cam++", disable_update=True, device=device)
+                else:
+                    from pyannote.audio import Inference, Model
+
+                    from backend.services.transcriber import _apply_torch_monkey_patch
+
+                    _apply_torch_monkey_patch()
+                    model = Model.from_pretrained(PYANNOTE_EMBEDDING_MODEL, use_auth_token=self.hf_token or None)
+                    self._model = Inference(model, window="whole", device=torch.device(device))
+            return self._model
+
+
+class SpeakerIndex:
+    def __init__(self, index_dir: Optional[str] = None, embedder: Optional[SpeakerEmbedder] = None):
+        """
+        跨单集的说话人声纹库
+        - episodes: 每个媒体的每个说话人标签一条声纹 (key = SpeakerVoiceprint.id)
+        - known: 已登记说话人的声纹样本，同一人可以有多条 (key = Speaker.id)
+        新单集入库时与 known 做最近邻匹配并批量写入 speaker_name；
+        登记新声纹时反过来在 episodes 中检索并回填历史单集，不需要重新做说话人分离
+        known 整体常驻内存 (数万条 × 192 维只有几十 MB)，每集匹配一次矩阵乘，毫秒级
+        """
+        root = Path(index_dir or settings.SPEAKER_INDEX_DIR)
+        self.known = VectorStore(str(root / "known"))
+        self.episodes = VectorStore(str(root / "episodes"))
+        self.embedder = embedder or SpeakerEmbedder()
+        self.threshold = settings.SPEAKER_MATCH_THRESHOLD
+        self._cache_lock = threading.Lock()
+        self._known_cache: Optional[Tuple[Optional[Tuple[int, int]], np.ndarray, np.ndarray, np.ndarray]] = None
+
+    # ---------- 新单集 ----------
+
+    def identify(self, session: Session, media_id: int, audio_path: str, segments: List[Dict]) -> Dict[str, str]:
+        """
+        提取该媒体各说话人的声纹 (替换旧的)，与已登记声纹匹配后写入 speaker_name
+        :param segments: 逐字稿片段，只用其中的 start / end / speaker
+        :return: {speaker_label: 人名}
+        """
+        samples = self.extract(audio_path, segments)
+        for voiceprint in session.exec(select(SpeakerVoiceprint).where(SpeakerVoiceprint.media_id == media_id)).all():
+            self.episodes.delete(voiceprint.id)
+            session.delete(voiceprint)
+        session.execute(update(TranscriptSegment).where(col(TranscriptSegment.media_id) == media_id).values(speaker_name=None))
+        self._touch_media(session, [media_id])
+        if not samples:
+            session.commit()
+            return {}
+
+        voiceprints = [SpeakerVoiceprint(media_id=media_id, speaker_label=label, seconds=seconds) for label, (_, seconds) in samples.items()]
+        session.add_all(voiceprints)
+        session.flush()
+        vectors = np.stack([vector for vector, _ in samples.values()])
+        self.episodes.add(vectors, [voiceprint.id for voiceprint in voiceprints])
+
+        matches = self.match(vectors)
+        matched_ids = [match[0] for match in matches if match]
+        speakers = {s.id: s.name for s in session.exec(select(Speaker).where(col(Speaker.id).in_(matched_ids))).all()} if matched_ids else {}
+        names: Dict[str, str] = {}
+        for voiceprint, match in zip(voiceprints, matches):
+            if match and match[0] in speakers:
+                voiceprint.speaker_id, voiceprint.score = match
+                names[voiceprint.speaker_label] = speakers[match[0]]
+        self._apply_names(session, {(media_id, label): name for label, name in names.items()})
+        session.commit()
+        logger.info(f"🗣️ [Speaker] MediaID={media_id} 提取 {len(voiceprints)} 条声纹，识别出 {names or '无已登记说话人'}")
+        return names
+
+    def extract(self, audio_path: str, segments: List[Dict]) -> Dict[str, Tuple[np.ndarray, float]]:
+        """
+        每个说话人标签一条声纹：取该标签最长的若干片段 (长片段混入他人声音的比例更低)，拼接后提取
+        :return: {speaker_label: (声纹向量, 使用的语音秒数)}，语音过短的标签不提取
+        """
+        spans: Dict[str, List[Tuple[float, float]]] = {}
+        for seg in segments:
+            if seg["speaker"] not in UNKNOWN_LABELS and seg["end"] > seg["start"]:
+                spans.setdefault(seg["speaker"], []).append((seg["start"], seg["end"]))
+
+        samples: Dict[str, Tuple[np.ndarray, float]] = {}
+        for label, label_spans in spans.items():
+            if sum(end - start for start, end in label_spans) < settings.SPEAKER_MIN_SECONDS:
+                continue
+            chosen: List[Tuple[float, float]] = []
+            seconds = 0.0
+            for start, end in sorted(label_spans, key=lambda span: span[0] - span[1]):
+                if seconds >= settings.SPEAKER_MAX_SECONDS:
+                    break
+                length = min(end - start, settings.SPEAKER_MAX_SECONDS - seconds)
+                chosen.append((start, length))
+                seconds += length
+            waveform = np.concatenate([self._decode_window(audio_path, start, length) for start, length in sorted(chosen)])
+            if len(waveform) < SAMPLE_RATE:
+                continue
+            samples[label] = (self.embedder.embed(waveform), len(waveform) / SAMPLE_RATE)
+        return samples
+
+    def match(self, vectors: np.ndarray) -> List[Optional[Tuple[int, float]]]:
+        """
+        与已登记声纹做最近邻匹配，同一说话人的多条样本取最高分
+        同一集里一个说话人最多分给一个标签 (按相似度从高到低贪心分配)
+        :return: 与 vectors 对应的 (Speaker.id, 相似度)，低于阈值为 None
+        """
+        speakers, starts, matrix = self._known_matrix()
+        if not len(speakers):
+            return [None] * len(vectors)
+        scores = VectorStore.normalize(np.asarray(vectors, dtype=np.float32)) @ matrix.T
+        best = np.maximum.reduceat(scores, starts, axis=1)
+
+        top = min(len(vectors), best.shape[1])
+        candidates = np.argpartition(-best, top - 1, axis=1)[:, :top]
+        pairs = sorted(((float(best[row, column]), row, int(column)) for row in range(len(vectors)) for column in candidates[row]), reverse=True)
+        result: List[Optional[Tuple[int, float]]] = [None] * len(vectors)
+        taken = set()
+        for score, row, column in pairs:
+            if score < self.threshold:
+                break
+            if result[row] is None and column not in taken:
+                result[row] = (int(speakers[column]), score)
+                taken.add(column)
+        return result
+
+    # ---------- 登记 / 回填 ----------
+
+    def enroll(self, session: Session, name: str, media_id: int, speaker_label: str) -> Tuple[Speaker, int]:
+        """
+        把某个媒体里的一个说话人标签登记为 name (同名说话人追加一条声纹样本)，并回填历史单集
+        :return: (说话人, 回填的单集数)
+        """
+        voiceprint = session.exec(select(SpeakerVoiceprint).where(SpeakerVoiceprint.media_id == media_id).where(SpeakerVoiceprint.speaker_label == speaker_label)).first()
+        if voiceprint is None:
+            raise ValueError(f"MediaID={media_id} 没有标签 {speaker_label} 的声纹 (语音过短，或尚未识别说话人)")
+        _, vectors = self.episodes.load(voiceprint.id)
+        if not len(vectors):
+            raise ValueError(f"MediaID={media_id} 的声纹向量缺失，请重新识别该媒体的说话人")
+
+        speaker = session.exec(select(Speaker).where(Speaker.name == name)).first() or Speaker(name=name)
+        speaker.samples += 1
+        session.add(speaker)
+        session.flush()
+        self.known.add(vectors[:1], [speaker.id])
+
+        voiceprint.speaker_id, voiceprint.score = speaker.id, 1.0
+        session.add(voiceprint)
+        self._apply_names(session, {(media_id, speaker_label): name})
+        backfilled = self.backfill(session, speaker, vectors[0], exclude_media=media_id)
+        session.commit()
+        session.refresh(speaker)
+        logger.success(f"✅ [Speaker] 已登记 {name} (样本 {speaker.samples} 条)，回填 {backfilled} 个历史单集")
+        return speaker, backfilled
+
+    def backfill(self, session: Session, speaker: Speaker, vector: np.ndarray, exclude_media: Optional[int] = None) -> int:
+        """
+        在历史单集声纹中检索与 vector 相似的标签并写入 speaker_name
+        已被其他说话人以更高相似度认领的标签不覆盖；每个单集最多回填一个标签
+        :return: 回填的单集数
+        """
+        hits = [(key, score) for key, _, _, score in self.episodes.search(vector, k=settings.SPEAKER_BACKFILL_LIMIT) if score >= self.threshold]
+        if not hits:
+            return 0
+        voiceprints = {vp.id: vp for vp in session.exec(select(SpeakerVoiceprint).where(col(SpeakerVoiceprint.id).in_([key for key, _ in hits]))).all()}
+        names: Dict[Tuple[int, str], str] = {}
+        claimed = {exclude_media}
+        for key, score in hits:
+            voiceprint = voiceprints.get(key)
+            if voiceprint is None or voiceprint.media_id in claimed:
+                continue
+            claimed.add(voiceprint.media_id)
+            if voiceprint.speaker_id is not None and (voiceprint.score or 0.0) >= score:
+                continue
+            voiceprint.speaker_id, voiceprint.score = speaker.id, score
+            session.add(voiceprint)
+            names[(voiceprint.media_id, voiceprint.speaker_label)] = speaker.name
+        self._apply_names(session, names)
+        return len(names)
+
+    # ---------- 工具 ----------
+
+    @staticmethod
+    def _apply_names(session: Session, names: Dict[Tuple[int, str], str]):
+        """按 (media_id, 标签) 批量写入 speaker_name，同一人名一条 UPDATE"""
+        by_name: Dict[str, List[Tuple[int, str]]] = {}
+        for pair, name in names.items():
+            by_name.setdefault(name, []).append(pair)
+        for name, pairs in by_name.items():
+            session.execute(update(TranscriptSegment).where(tuple_(col(TranscriptSegment.media_id), col(TranscriptSegment.speaker_label)).in_(pairs)).values(speaker_name=name))
+        SpeakerIndex._touch_media(session, sorted({media_id for media_id, _ in names}))
+
+    @staticmethod
+    def _touch_media(session: Session, media_ids: List[int]):
+        """批量 UPDATE 不会触发 onupdate：手动刷新媒体的 updated_at，增量导出才会重新导出这些单集"""
+        if media_ids:
+            session.execute(update(SourceMedia).where(col(SourceMedia.id).in_(media_ids)).values(updated_at=utc_now()))
+
+    def _known_matrix(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        已登记声纹按 Speaker.id 排序后的矩阵，文件变化 (其他进程登记了新声纹) 时重新加载
+        :return: (说话人 ID, 每个说话人在矩阵中的起始行, 矩阵)
+        """
+        path = self.known.data_path
+        stat = path.stat() if path.exists() else None
+        state = (stat.st_size, stat.st_mtime_ns) if stat else None
+        with self._cache_lock:
+            if self._known_cache is None or self._known_cache[0] != state:
+                keys, matrix = self.known.load()
+                order = np.argsort(keys, kind="stable")
+                speakers, starts = np.unique(keys[order], return_index=True)
+                self._known_cache = (state, speakers, starts, matrix[order])
+            return self._known_cache[1:]
+
+    @staticmethod
+    def _decode_window(audio_path: str, offset: float, seconds: float) -> np.ndarray:
+        """用 ffmpeg 只解码指定窗口，输出 16k 单声道 float32"""
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-ss", f"{max(offset, 0.0):.2f}", "-t", f"{seconds:.2f}", "-i", audio_path, "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"]
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+        return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
@@ -1,20 +1,25 @@
 import json
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from loguru import logger
-from sqlmodel import Session, col, delete
+from sqlmodel import Session, col, delete, select
 
+from backend.core.config import settings
+from backend.core.metrics import DB_WRITE_SECONDS
 from backend.core.utils import format_seconds, seconds_to_srt
 from backend.models import SourceMedia, TranscriptSegment
+from backend.services.search import SearchService
 
 
 class StorageManager:
-    def __init__(self, transcript_dir: str = "data/transcripts"):
+    def __init__(self, transcript_dir: str = "data/transcripts", search: Optional[SearchService] = None):
         self.transcript_dir = Path(transcript_dir)
         self.transcript_dir.mkdir(parents=True, exist_ok=True)
+        self.search = search or SearchService()
 
-    def save_transcript(self, session: Session, media_id: int, segments: List[Dict]) -> str:
+    def save_transcript(self, session: Session, media_id: int, segments: List[Dict], asr_model: Optional[str] = None) -> str:
         media = session.get(SourceMedia, media_id)
         if not media:
             raise ValueError(f"Media ID {media_id} 不存在")
@@ -22,22 +27,69 @@ class StorageManager:
             file_stem = Path(media.local_audio_path).stem
         else:
             file_stem = str(media_id)
-        self._save_to_db(session, media_id, segments)
+        self._save_to_db(session, media_id, segments, asr_model)
         txt_path = self._save_to_files(file_stem, segments)
+        if settings.SEARCH_EMBEDDINGS_ENABLED:
+            try:
+                self.search.index_segments(media_id, segments)
+            except Exception as e:
+                # 向量索引失败不影响主流程，全文检索仍然可用
+                logger.warning(f"⚠️ [Storage] 向量索引失败 (MediaID: {media_id}): {e}")
 
         return txt_path
 
-    def _save_to_db(self, session: Session, media_id: int, segments: List[Dict]):
+    def transcript_file(self, session: Session, media_id: int) -> str:
+        """
+        返回供 LLM 使用的 .txt 路径
+        本地文件被生命周期策略移走后，从数据库中的片段重建
+        """
+        media = session.get(SourceMedia, media_id)
+        if not media:
+            raise ValueError(f"Media ID {media_id} 不存在")
+        file_stem = Path(media.local_audio_path).stem if media.local_audio_path else str(media_id)
+        txt_path = (self.transcript_dir / file_stem).with_suffix(".txt")
+        if txt_path.exists():
+            return str(txt_path)
+        statement = select(TranscriptSegment).where(TranscriptSegment.media_id == media_id).order_by(col(TranscriptSegment.start_time))
+        segments = [{"start": s.start_time, "end": s.end_time, "text": s.text, "speaker": s.speaker_label} for s in session.exec(statement)]
+        logger.info(f"♻️ [Storage] 从数据库重建逐字稿文件 (MediaID: {media_id}, {len(segments)} 条)")
+        return self._save_to_files(file_stem, segments)
+
+    def reset_transcript(self, session: Session, media_id: int, file_stem: str):
+        """清空已有片段和 .txt，实时转录开始前调用"""
+        session.exec(delete(TranscriptSegment).where(col(TranscriptSegment.media_id) == media_id))
+        session.commit()
+        (self.transcript_dir / file_stem).with_suffix(".txt").write_text("", encoding="utf-8")
+
+    def append_segments(self, session: Session, media_id: int, segments: List[Dict], file_stem: str, asr_model: Optional[str] = None) -> str:
+        """
+        实时转录时追加已稳定的片段：只插入新行、在 .txt 末尾追加，不重写已有内容
+        直播结束后再调用 save_transcript 生成完整的 json / srt 并建立向量索引
+        """
+        started = time.perf_counter()
+        session.add_all([TranscriptSegment(media_id=media_id, start_time=seg["start"], end_time=seg["end"], text=seg["text"], speaker_label=seg["speaker"], asr_model=asr_model) for seg in segments])
+        session.commit()
+        DB_WRITE_SECONDS.labels(table="transcript_segment").observe(time.perf_counter() - started)
+
+        txt_path = (self.transcript_dir / file_stem).with_suffix(".txt")
+        with open(txt_path, "a", encoding="utf-8") as f:
+            for seg in segments:
+                f.write(f"[{format_seconds(seg['start'])}] {seg['speaker']}: {seg['text']}\n")
+        return str(txt_path)
+
+    def _save_to_db(self, session: Session, media_id: int, segments: List[Dict], asr_model: Optional[str] = None):
         """将片段存入 PostgreSQL"""
         logger.info(f"💾 [Storage] 正在写入数据库 (MediaID: {media_id})...")
 
+        started = time.perf_counter()
         statement = delete(TranscriptSegment).where(col(TranscriptSegment.media_id) == media_id)
         session.exec(statement)
         db_segments = []
         for seg in segments:
-            db_segments.append(TranscriptSegment(media_id=media_id, start_time=seg["start"], end_time=seg["end"], text=seg["text"], speaker_label=seg["speaker"]))
+            db_segments.append(TranscriptSegment(media_id=media_id, start_time=seg["start"], end_time=seg["end"], text=seg["text"], speaker_label=seg["speaker"], asr_model=asr_model))
         session.add_all(db_segments)
         session.commit()
+        DB_WRITE_SECONDS.labels(table="transcript_segment").observe(time.perf_counter() - started)
         logger.success(f"✅ [Storage] 数据库写入完成，共 {len(db_segments)} 条")
 
     def _save_to_files(self, file_stem: str, segments: List[Dict]) -> str:
@@ -1,18 +1,28 @@
+import hashlib
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from loguru import logger
-from sqlmodel import Session
+from sqlmodel import Session, col, select
 
+from backend.core.utils import format_seconds
 from backend.models import Summary
 from backend.services.llm_factory import LLMService
 
+PROMPT_DIR = Path(__file__).parent.parent / "prompts"
+
+# 由 detail 总结派生的类型：只把 detail 交给 LLM，不再读取整份逐字稿
+DERIVED_SUMMARY_TYPES = {
+    "short": "summary_short",
+    "mindmap": "summary_mindmap",
+}
+
 
 class Summarizer:
     def __init__(self):
         self.llm = LLMService()
-        self.prompt_dir = Path(__file__).parent.parent / "prompts"
+        self.prompt_dir = PROMPT_DIR
 
     def _load_prompt(self, prompt_name: str) -> str:
         file_path = self.prompt_dir / f"{prompt_name}.md"
@@ -21,6 +31,15 @@ class Summarizer:
         with open(file_path, "r", encoding="utf-8") as f:
             return f.read()
 
+    @staticmethod
+    def prompt_version(prompt_name: str) -> str:
+        """Prompt 文件内容的短哈希，写入 Summary.prompt_version，修改 Prompt 后据此筛选需要重新总结的内容"""
+        return hashlib.sha1((PROMPT_DIR / f"{prompt_name}.md").read_bytes()).hexdigest()[:12]
+
+    @staticmethod
+    def prompt_name_for(summary_type: str) -> str:
+        return DERIVED_SUMMARY_TYPES.get(summary_type, f"summary_{summary_type}")
+
     def summarize_content(self, session: Session, media_id: int, transcript_path: str) -> Optional[Summary]:
         logger.info(f"🧠 [Summarizer] 开始分析 MediaID: {media_id}")
         txt_path = Path(transcript_path)
@@ -40,29 +59,91 @@ class Summarizer:
             if not summary_text:
                 logger.warning("⚠️ LLM 未返回总结内容")
                 return None
-
-            tags_list = re.findall(r"#([^#\s.,!?:;\"'()\[\]]+)", summary_text)
-            final_tags = []
-            for t in tags_list:
-                t = t.strip()
-                if len(t) > 1 and not t.isnumeric():
-                    final_tags.append(t)
-            final_tags = final_tags[:10]
-
-            summary_record = Summary(
-                media_id=media_id,
-                content=summary_text,
-                summary_type="detail",
-                model_used=self.llm.model,
-                tags=final_tags,
-            )
-            session.add(summary_record)
-            session.commit()
-            session.refresh(summary_record)
-
-            logger.success(f"✅ [Summarizer] 总结完成 (ID: {summary_record.id}) Tags: {final_tags}")
-            return summary_record
+            return self._save_summary(session, media_id, "detail", summary_text, self._extract_tags(summary_text), self.prompt_version("summary_detail"))
 
         except Exception as e:
             logger.exception("❌ [Summarizer] 总结失败")
             raise e
+
+    def derive_summary(self, session: Session, media_id: int, summary_type: str) -> Optional[Summary]:
+        """
+        基于最新的 detail 总结派生 short / mindmap 等类型
+        输入只有 detail 总结 (通常不到逐字稿的十分之一)，可以随时按需生成
+        """
+        if summary_type not in DERIVED_SUMMARY_TYPES:
+            raise ValueError(f"不支持派生的总结类型: {summary_type}")
+        detail = self.latest_summary(session, media_id, "detail")
+        if not detail:
+            raise ValueError(f"MediaID {media_id} 还没有 detail 总结，无法派生 {summary_type}")
+
+        logger.info(f"🧠 [Summarizer] 从 detail 派生 {summary_type} (MediaID: {media_id})")
+        try:
+            summary_text = self.llm.generate(self._load_prompt(DERIVED_SUMMARY_TYPES[summary_type]), detail.content)
+            if not summary_text:
+                logger.warning(f"⚠️ LLM 未返回 {summary_type} 内容")
+                return None
+            # 派生类型沿用 detail 的标签
+            return self._save_summary(session, media_id, summary_type, summary_text, list(detail.tags or []), self.prompt_version(DERIVED_SUMMARY_TYPES[summary_type]))
+        except Exception as e:
+            logger.exception(f"❌ [Summarizer] 派生 {summary_type} 失败")
+            raise e
+
+    def roll_live_summary(self, session: Session, media_id: int, new_segments: List[Dict]) -> Optional[Summary]:
+        """
+        直播期间滚动更新纪要：只把上一版纪要 + 新增片段交给 LLM，输入长度不随直播时长增长
+        每场直播只保留一条 live 类型的总结，原地更新
+        """
+        if not new_segments:
+            return None
+        current = self.latest_summary(session, media_id, "live")
+        lines = "\n".join(f"[{format_seconds(seg['start'])}] {seg['speaker']}: {seg['text']}" for seg in new_segments)
+        user_content = f"【当前纪要】\n{current.content if current else ''}\n\n【新增逐字稿】\n{lines}"
+        try:
+            summary_text = self.llm.generate(self._load_prompt("summary_live"), user_content)
+        except Exception:
+            # 实时纪要失败不影响转录，下次更新时会带上这批片段重试
+            logger.exception(f"❌ [Summarizer] 实时纪要更新失败 (MediaID: {media_id})")
+            return None
+        if not summary_text:
+            return None
+        if not current:
+            return self._save_summary(session, media_id, "live", summary_text, [], self.prompt_version("summary_live"))
+        current.content = summary_text
+        current.model_used = self.llm.model
+        current.prompt_version = self.prompt_version("summary_live")
+        session.add(current)
+        session.commit()
+        session.refresh(current)
+        logger.info(f"📝 [Summarizer] 实时纪要已更新 (MediaID: {media_id})")
+        return current
+
+    @staticmethod
+    def latest_summary(session: Session, media_id: int, summary_type: str) -> Optional[Summary]:
+        statement = select(Summary).where(Summary.media_id == media_id).where(Summary.summary_type == summary_type).order_by(col(Summary.created_at).desc())
+        return session.exec(statement).first()
+
+    @staticmethod
+    def _extract_tags(summary_text: str) -> List[str]:
+        tags_list = re.findall(r"#([^#\s.,!?:;\"'()\[\]]+)", summary_text)
+        final_tags = []
+        for t in tags_list:
+            t = t.strip()
+            if len(t) > 1 and not t.isnumeric():
+                final_tags.append(t)
+        return final_tags[:10]
+
+    def _save_summary(self, session: Session, media_id: int, summary_type: str, summary_text: str, tags: List[str], prompt_version: Optional[str] = None) -> Summary:
+        summary_record = Summary(
+            media_id=media_id,
+            content=summary_text,
+            summary_type=summary_type,
+            model_used=self.llm.model,
+            tags=tags,
+            prompt_version=prompt_version,
+        )
+        session.add(summary_record)
+        session.commit()
+        session.refresh(summary_record)
+
+        logger.success(f"✅ [Summarizer] {summary_type} 总结完成 (ID: {summary_record.id}) Tags: {tags}")
+        return summary_record
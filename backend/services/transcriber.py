@@ -1,10 +1,15 @@
+import asyncio
 import importlib.util
 import os
-from typing import Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional
 
-import requests
 from loguru import logger
 
+from backend.core.config import settings
+
+if TYPE_CHECKING:
+    from backend.services.deepgram_client import DeepgramClient
+
 HAS_WHISPERX = importlib.util.find_spec("whisperx") is not None
 HAS_FUNASR = importlib.util.find_spec("funasr") is not None
 
@@ -48,8 +53,41 @@ class AudioTranscriber:
         self.api_key = api_key
         self.hf_token = hf_token
         self.device = device
+        self._deepgram: "DeepgramClient | None" = None
+        # 已加载的本地模型，常驻转录子进程里跨任务复用
+        self._models: Dict[str, Any] = {}
         logger.info(f"[Transcriber] 初始化完成 | 模式: {self.mode} | 设备: {self.device}")
 
+    def engine_for(self, language: str = "auto") -> str:
+        """根据模式和语种返回实际使用的引擎名 (用于路由和监控标签)"""
+        if self.mode == "cloud":
+            return "deepgram"
+        return "funasr" if language == "zh" else "whisperx"
+
+    def model_id_for(self, language: str = "auto") -> str:
+        """引擎 + 模型标识，写入 TranscriptSegment.asr_model，升级模型后据此筛选需要重新转录的内容"""
+        engine = self.engine_for(language)
+        if engine == "deepgram":
+            return f"deepgram:{settings.DEEPGRAM_MODEL}"
+        if engine == "funasr":
+            return "funasr:paraformer-zh"
+        return f"whisperx:{settings.WHISPERX_MODEL}"
+
+    async def transcribe_async(self, audio_path: str, language: str = "auto") -> List[Dict]:
+        """
+        异步入口：云端模式直接在事件循环里上传 (共享连接池，单进程可同时跑几十个任务)，本地模式放到线程里
+        """
+        if self.mode != "cloud":
+            return await asyncio.to_thread(self.transcribe, audio_path, language=language)
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"音频文件不存在: {audio_path}")
+        logger.info(f"[Deepgram] 开始上传并转录: {audio_path} (语言: {language})")
+        try:
+            return await self._get_deepgram().transcribe(audio_path, language=language)
+        except Exception as e:
+            logger.exception("❌ [Transcriber] 转录失败")
+            raise TranscriptionError(str(e)) from e
+
     def transcribe(self, audio_path: str, language: str = "auto") -> List[Dict]:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"音频文件不存在: {audio_path}")
@@ -58,12 +96,12 @@ class AudioTranscriber:
 
         try:
             if self.mode == "local":
-                if language == "zh":
+                if self.engine_for(language) == "funasr":
                     logger.info("🇨🇳 检测到中文，切换至 FunASR 引擎...")
                     return self._transcribe_local_funasr(audio_path)
                 else:
                     logger.info("🌐 非中文内容，使用 WhisperX 引擎...")
-                    return self._transcribe_local_whisperx(audio_path)
+                    return self._transcribe_local_whisperx(audio_path, language=language)
             elif self.mode == "cloud":
                 return self._transcribe_cloud_deepgram(audio_path, language=language)
             else:
@@ -72,7 +110,7 @@ class AudioTranscriber:
             logger.exception("❌ [Transcriber] 转录失败")
             raise TranscriptionError(str(e)) from e
 
-    def _transcribe_local_whisperx(self, audio_path: str) -> List[Dict]:
+    def _transcribe_local_whisperx(self, audio_path: str, language: str = "auto") -> List[Dict]:
         if not HAS_WHISPERX:
             raise ImportError("未安装 whisperx 或 torch，无法使用本地模式。请运行 uv add git+https://github.com/m-bain/whisperX.git")
         if not self.hf_token:
@@ -87,18 +125,19 @@ class AudioTranscriber:
             actual_device = "cuda" if torch.cuda.is_available() else "cpu"
             logger.info(f"🖥️ [Auto] 自动检测到运行设备: {actual_device}")
 
-        model_name = "medium"
+        model_name = settings.WHISPERX_MODEL
         compute_type = "int8" if actual_device == "cuda" else "int8"
-        logger.info(f"⏳ [Local] 正在加载 Whisper 模型 ({model_name}, {compute_type})...")
-        model = whisperx.load_model(model_name, actual_device, compute_type=compute_type)
+        model = self._load_model(f"whisperx:{model_name}", lambda: whisperx.load_model(model_name, actual_device, compute_type=compute_type))
         logger.info("[Local] 正在转录文本...")
-        result = model.transcribe(audio_path, batch_size=4)
+        # 已知语种时直接传入，跳过 WhisperX 自身的语种检测
+        whisper_lang = language if language and language != "auto" else None
+        result = model.transcribe(audio_path, batch_size=4, language=whisper_lang)
         logger.info("[Local] 正在对齐时间轴...")
-        model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=actual_device)
+        model_a, metadata = self._load_model(f"align:{result['language']}", lambda: whisperx.load_align_model(language_code=result["language"], device=actual_device))
         result = whisperx.align(result["segments"], model_a, metadata, audio_path, actual_device, return_char_alignments=False)
         if self.hf_token:
             logger.info("[Local] 正在识别说话人 (Diarization)...")
-            diarize_model = DiarizationPipeline(use_auth_token=self.hf_token, device=actual_device)
+            diarize_model = self._load_model("diarize", lambda: DiarizationPipeline(use_auth_token=self.hf_token, device=actual_device))
             diarize_segments = diarize_model(audio_path)
 
             result = whisperx.assign_word_speakers(diarize_segments, result)
@@ -122,21 +161,23 @@ class AudioTranscriber:
             from funasr import AutoModel
         except ImportError:
             raise ImportError("FunASR 导入失败")
-        logger.info("⏳ [FunASR] 正在加载模型 (Paraformer-zh + Cam++)...")
         import torch
 
         actual_device = self.device
         if actual_device is None:
             actual_device = "cuda" if torch.cuda.is_available() else "cpu"
 
-        model = AutoModel(
-            model="paraformer-zh",
-            model_revision="v2.0.4",
-            vad_model="fsmn-vad",
-            punc_model="ct-punc",
-            spk_model="cam++",
-            disable_update=True,
-            device=actual_device,
+        model = self._load_model(
+            "funasr:paraformer-zh",
+            lambda: AutoModel(
+                model="paraformer-zh",
+                model_revision="v2.0.4",
+                vad_model="fsmn-vad",
+                punc_model="ct-punc",
+                spk_model="cam++",
+                disable_update=True,
+                device=actual_device,
+            ),
         )
 
         logger.info("🗣️ [FunASR] 开始转录...")
@@ -167,69 +208,35 @@ class AudioTranscriber:
         logger.success(f"✅ [FunASR] 中文转录完成，共 {len(final_segments)} 条")
         return final_segments
 
-    def _transcribe_cloud_deepgram(self, audio_path: str, language: str = "auto") -> List[Dict]:
-        if not self.api_key:
-            raise ValueError("使用 Deepgram 模式必须提供 api_key")
-
-        url = "https://api.deepgram.com/v1/listen"
-        params = {
-            "model": "nova-2",
-            "smart_format": "true",
-            "diarize": "true",  # 开启说话人分离
-            "punctuate": "true",
-            "utterances": "true",
-        }
-        if language and language != "auto":
-            params["language"] = language
-        else:
-            params["detect_language"] = "true"
-
-        headers = {
-            "Authorization": f"Token {self.api_key}",
-            "Content-Type": "audio/*",
-        }
-
-        logger.info(f"[Deepgram] 开始上传并转录 (语言: {language})...")
-
-        try:
-            with open(audio_path, "rb") as audio_file:
-                response = requests.post(
-                    url,
-                    params=params,
-                    headers=headers,
-                    data=audio_file,
-                    timeout=600,  # 10分钟超时，防止超大文件断连
-                )
-        except Exception as e:
-            raise TranscriptionError(f"Deepgram 请求失败: {e}")
-        if response.status_code != 200:
-            raise TranscriptionError(f"Deepgram API 报错 ({response.status_code}): {response.text}")
-        data = response.json()
+    def _load_model(self, key: str, factory: Callable[[], Any]) -> Any:
+        if key not in self._models:
+            logger.info(f"⏳ [Local] 正在加载模型 {key}...")
+            self._models[key] = factory()
+        return self._models[key]
 
-        final_segments = []
+    def _transcribe_cloud_deepgram(self, audio_path: str, language: str = "auto") -> List[Dict]:
+        """
+        同步入口 (Worker 里走 transcribe_async，不占线程)
+        asyncio.run 每次都是新的事件循环，连接池没法复用：单独建一个客户端，在同一个循环里用完即关
+        """
 
-        try:
-            if "paragraphs" in data["results"]["channels"][0]["alternatives"][0]:
-                paragraphs = data["results"]["channels"][0]["alternatives"][0]["paragraphs"]["paragraphs"]
+        async def run() -> List[Dict]:
+            client = self._new_deepgram()
+            try:
+                return await client.transcribe(audio_path, language=language)
+            finally:
+                await client.aclose()
 
-                for p in paragraphs:
-                    speaker_id = p.get("speaker", 0)
-                    sentences = p["sentences"]
-                    full_text = " ".join([s["text"] for s in sentences])
-                    start_time = sentences[0]["start"]
-                    end_time = sentences[-1]["end"]
+        return asyncio.run(run())
 
-                    final_segments.append({"start": start_time, "end": end_time, "text": full_text.strip(), "speaker": f"Speaker_{speaker_id}"})
-            else:
-                utterances = data["results"]["channels"][0]["alternatives"][0]["utterances"]
-                for utt in utterances:
-                    final_segments.append({"start": utt["start"], "end": utt["end"], "text": utt["transcript"].strip(), "speaker": f"Speaker_{utt.get('speaker', 0)}"})
+    def _get_deepgram(self) -> "DeepgramClient":
+        if self._deepgram is None:
+            self._deepgram = self._new_deepgram()
+        return self._deepgram
 
-        except KeyError:
-            logger.warning("Deepgram 返回了空结果或格式异常 (可能是静音文件)")
-            return []
-        except Exception as e:
-            raise TranscriptionError(f"解析 Deepgram 结果失败: {e}")
+    def _new_deepgram(self) -> "DeepgramClient":
+        if not self.api_key:
+            raise ValueError("使用 Deepgram 模式必须提供 api_key")
+        from backend.services.deepgram_client import DeepgramClient
 
-        logger.success(f"[Deepgram] 转录完成，共 {len(final_segments)} 个段落")
-        return final_segments
+        return DeepgramClient(self.api_key)
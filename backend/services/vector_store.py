@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+SEARCH_BLOCK_ROWS = 1_000_000
+
+
+class VectorStore:
+    def __init__(self, index_dir: str, dim: Optional[int] = None):
+        """
+        追加写入的本地向量库 (暴力内积检索，思路同 FAISS IndexFlatIP)
+        每条记录 = key(int64) + start/end(float32) + 归一化向量(float32)，整条记录一次 O_APPEND 写入，多进程并发追加也不会交错
+        删除采用墓碑标记 (key 置为 -1)，检索时 memmap 分块计算，不把整库读进内存
+        :param index_dir: 存储目录
+        :param dim: 向量维度 (首次写入时确定并记录)；以 index.json 为准，其他进程首次写入后这里也能读到
+        """
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.index_dir / "vectors.bin"
+        self.header_path = self.index_dir / "index.json"
+        self._lock = threading.Lock()
+        self._requested_dim = dim
+        self._header_dim: Optional[int] = None
+
+    @property
+    def dim(self) -> Optional[int]:
+        # 索引可能由其他进程 (Worker) 在本实例创建之后才建立，header 出现前每次都重新检查
+        if self._header_dim is None:
+            self._header_dim = self._load_dim()
+        return self._header_dim or self._requested_dim
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([("key", "<i8"), ("start", "<f4"), ("end", "<f4"), ("vec", "<f4", (self.dim,))])
+
+    def __len__(self) -> int:
+        if not self.dim or not self.data_path.exists():
+            return 0
+        return self.data_path.stat().st_size // self.dtype.itemsize
+
+    def add(self, vectors: np.ndarray, keys: List[int], starts: Optional[List[float]] = None, ends: Optional[List[float]] = None):
+        if len(vectors) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self._ensure_dim(vectors.shape[1])
+        records = np.zeros(len(vectors), dtype=self.dtype)
+        records["key"] = keys
+        records["start"] = starts if starts is not None else 0.0
+        records["end"] = ends if ends is not None else 0.0
+        records["vec"] = self.normalize(vectors)
+
+        fd = os.open(self.data_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            os.write(fd, records.tobytes())
+        finally:
+            os.close(fd)
+
+    def delete(self, key: int) -> int:
+        """墓碑删除某个 key 的全部记录，返回删除条数"""
+        if not len(self):
+            return 0
+        with self._lock:
+            mm = np.memmap(self.data_path, dtype=self.dtype, mode="r+", shape=(len(self),))
+            hits = mm["key"] == key
+            removed = int(hits.sum())
+            if removed:
+                mm["key"][hits] = -1
+                mm.flush()
+            del mm
+        return removed
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[int, float, float, float]]:
+        """
+        :return: [(key, start, end, score)]，按相似度降序
+        """
+        total = len(self)
+        if not total:
+            return []
+        q = self.normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        mm = np.memmap(self.data_path, dtype=self.dtype, mode="r", shape=(total,))
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for offset in range(0, total, SEARCH_BLOCK_ROWS):
+            block = mm[offset : offset + SEARCH_BLOCK_ROWS]
+            scores = np.ascontiguousarray(block["vec"]) @ q
+            scores[block["key"] < 0] = -np.inf
+            take = min(k, len(scores))
+            top = np.argpartition(-scores, take - 1)[:take]
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + offset])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = np.argsort(-best_scores)
+        results = []
+        for i in order:
+            if not np.isfinite(best_scores[i]):
+                continue
+            rec = mm[best_rows[i]]
+            results.append((int(rec["key"]), float(rec["start"]), float(rec["end"]), float(best_scores[i])))
+        return results
+
+    def load(self, key: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        把未删除的记录整体读入内存 (只适合小索引，如说话人声纹)
+        :param key: 只读取该 key 的记录
+        :return: (keys, 归一化向量矩阵)
+        """
+        total = len(self)
+        if not total:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.dim or 0), dtype=np.float32)
+        mm = np.memmap(self.data_path, dtype=self.dtype, mode="r", shape=(total,))
+        live = mm["key"] == key if key is not None else mm["key"] >= 0
+        return np.array(mm["key"][live]), np.ascontiguousarray(mm["vec"][live])
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_dim(self, dim: int):
+        current = self.dim
+        if current is not None and current != dim:
+            raise ValueError(f"向量维度不一致: 索引为 {current}，写入为 {dim}")
+        if self._header_dim is None:
+            with open(self.header_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": dim}, f)
+            self._header_dim = dim
+            logger.info(f"🗂️ [VectorStore] 新建索引: {self.index_dir} (dim={dim})")
+
+    def _load_dim(self) -> Optional[int]:
+        if not self.header_path.exists():
+            return None
+        with open(self.header_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("dim")
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import statistics
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from backend.core.config import settings
+from backend.core.metrics import CONCURRENCY_DECISIONS, CONCURRENCY_LIMIT, HOST_LOAD, HOST_MEMORY_AVAILABLE, add_provider_observer
+
+DECREASE_FACTOR = 0.7
+MIN_PROVIDER_SAMPLES = 3
+
+
+class AdaptiveLimiter:
+    def __init__(self, stage: str, minimum: int, maximum: int, initial: int):
+        """
+        上限可在运行时调整的异步信号量
+        调小上限时不会打断已在执行的任务，只是暂停放行新的任务，直到在途数量降到新上限以下
+        """
+        self.stage = stage
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.active = 0
+        # 本采样周期内是否出现过满载 (有任务因上限而等待 / 被拒)，只有满载时才值得加大上限
+        self.saturated = False
+        self._waiters: Deque[asyncio.Future] = deque()
+        CONCURRENCY_LIMIT.labels(stage=stage).set(self.limit)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        self.saturated = True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已经分到名额但随即被取消：把名额让给下一个
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        self.saturated = True
+        return False
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def set_limit(self, limit: int):
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        CONCURRENCY_LIMIT.labels(stage=self.stage).set(self.limit)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class ConcurrencyController:
+    def __init__(self):
+        """
+        Worker 内的自适应并发控制 (AIMD)
+        - job: 同时执行的流水线任务数 (ARQ 的 max_jobs 只作为上限)
+        - download / asr / llm: 各阶段的并发名额
+        每个采样周期：出现压力 (CPU 过载、内存紧张、外部服务 429 或延迟明显升高) 的阶段按比例减小上限，
+        没有压力且本周期满载过的阶段上限加 1
+        关闭 CONCURRENCY_ADAPTIVE 时各上限固定为最大值
+        """
+        self.cpus = os.cpu_count() or 1
+        self.cloud_asr = bool(settings.DEEPGRAM_API_KEY)
+        adaptive = settings.CONCURRENCY_ADAPTIVE
+        asr_max = settings.DEEPGRAM_MAX_CONNECTIONS if self.cloud_asr else self._local_asr_slots()
+        bounds = {
+            "job": (1, get_max_jobs(), min(self.cpus, get_max_jobs())),
+            "download": (1, settings.CONCURRENCY_MAX_DOWNLOADS, 4),
+            "asr": (1, asr_max, min(4, asr_max) if self.cloud_asr else 1),
+            "llm": (1, settings.CONCURRENCY_MAX_LLM, 4),
+        }
+        self.limiters: Dict[str, AdaptiveLimiter] = {stage: AdaptiveLimiter(stage, low, high, initial if adaptive else high) for stage, (low, high, initial) in bounds.items()}
+        # 阶段 -> 依赖的外部服务
+        self.providers: Dict[str, str] = {"llm": settings.DEFAULT_LLM_PROVIDER}
+        if self.cloud_asr:
+            self.providers["asr"] = "deepgram"
+        self._samples: Dict[str, List[Tuple[str, float]]] = {}
+        self._baseline: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        add_provider_observer(self._on_provider)
+
+    def slot(self, stage: str) -> AdaptiveLimiter:
+        """用法: async with controller.slot("asr"): ..."""
+        return self.limiters[stage]
+
+    def start(self, redis=None):
+        """
+        :param redis: 用于定期上报各阶段上限 (API 据此估算 ETA)，为空时不上报
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(redis))
+        if settings.CONCURRENCY_ADAPTIVE:
+            logger.info(f"🎚️ [Concurrency] 自适应并发已启用 ({self.cpus} 核): {self.describe()}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def describe(self) -> str:
+        return ", ".join(f"{stage}={limiter.limit}/{limiter.maximum}" for stage, limiter in self.limiters.items())
+
+    async def _run(self, redis):
+        from backend.services.admission import ThroughputStats
+
+        stats = ThroughputStats(redis) if redis is not None else None
+        while True:
+            if stats is not None:
+                try:
+                    await stats.publish_slots({stage: limiter.limit for stage, limiter in self.limiters.items()})
+                except Exception as e:
+                    logger.debug(f"[Concurrency] 上报并发上限失败: {e}")
+            await asyncio.sleep(settings.CONCURRENCY_SAMPLE_SECONDS)
+            if settings.CONCURRENCY_ADAPTIVE:
+                try:
+                    self.adjust()
+                except Exception:
+                    logger.exception("❌ [Concurrency] 调整并发失败")
+
+    def adjust(self):
+        """执行一个采样周期的 AIMD 调整"""
+        load = os.getloadavg()[0] / self.cpus if hasattr(os, "getloadavg") else 0.0
+        memory = _memory_available_ratio()
+        HOST_LOAD.set(load)
+        HOST_MEMORY_AVAILABLE.set(memory)
+        host_pressure = None
+        if memory < settings.CONCURRENCY_MEMORY_LOW:
+            host_pressure = "memory"
+        elif load > settings.CONCURRENCY_CPU_HIGH:
+            host_pressure = "cpu"
+
+        samples, self._samples = self._samples, {}
+        provider_pressure = {provider: self._provider_pressure(provider, samples.get(provider, [])) for provider in set(self.providers.values())}
+
+        for stage, limiter in self.limiters.items():
+            if stage in self.providers:
+                # 远端服务的阶段只看对方的反馈，本机 CPU 不是瓶颈
+                reason = provider_pressure[self.providers[stage]]
+            elif stage == "download":
+                reason = "memory" if host_pressure == "memory" else None
+            else:
+                reason = host_pressure
+            if stage == "job" and reason is None and self._backlogged():
+                # 已接的任务还在各阶段排队，再多接只会占用内存
+                reason = "stage_backlog"
+            self._apply(limiter, reason)
+
+    def _apply(self, limiter: AdaptiveLimiter, reason: Optional[str]):
+        old = limiter.limit
+        if reason:
+            limiter.set_limit(int(limiter.limit * DECREASE_FACTOR))
+            action = "decrease"
+        elif limiter.saturated:
+            limiter.set_limit(limiter.limit + 1)
+            action = "increase"
+            reason = "saturated"
+        else:
+            action = None
+        limiter.saturated = False
+        if action and limiter.limit != old:
+            CONCURRENCY_DECISIONS.labels(stage=limiter.stage, action=action, reason=reason).inc()
+            logger.info(f"🎚️ [Concurrency] {limiter.stage}: {old} -> {limiter.limit} ({reason})")
+
+    def _backlogged(self) -> bool:
+        return any(limiter.waiting > limiter.limit for stage, limiter in self.limiters.items() if stage != "job")
+
+    def _on_provider(self, provider: str, status: str, seconds: float):
+        self._samples.setdefault(provider, []).append((status, seconds))
+
+    def _provider_pressure(self, provider: str, samples: List[Tuple[str, float]]) -> Optional[str]:
+        if len(samples) < MIN_PROVIDER_SAMPLES:
+            return None
+        throttled = sum(1 for status, _ in samples if status == "429") / len(samples)
+        if throttled > settings.CONCURRENCY_MAX_429_RATE:
+            return "429"
+        latencies = [seconds for status, seconds in samples if status == "200"]
+        if len(latencies) < MIN_PROVIDER_SAMPLES:
+            return "errors" if len(latencies) < len(samples) / 2 else None
+        median = statistics.median(latencies)
+        # 基线取历史最低的周期中位数，并缓慢上浮，避免一次异常低值永久压低上限
+        baseline = min(self._baseline.get(provider, median), median) * 1.02
+        self._baseline[provider] = baseline
+        if median > baseline * settings.CONCURRENCY_LATENCY_FACTOR:
+            return "latency"
+        return None
+
+    @staticmethod
+    def _local_asr_slots() -> int:
+        if not settings.ASR_SUBPROCESS:
+            return 1
+        from backend.services.asr_pool import default_pool_size
+
+        return default_pool_size()
+
+
+def get_max_jobs() -> int:
+    """ARQ 的 max_jobs：自适应模式下是上限，实际并发由 job 名额控制"""
+    if settings.CONCURRENCY_ADAPTIVE:
+        if settings.CONCURRENCY_MAX_JOBS:
+            return settings.CONCURRENCY_MAX_JOBS
+        # 云端转录不占本机算力，上限主要受内存和外部服务约束
+        return min(256, (os.cpu_count() or 1) * (8 if settings.DEEPGRAM_API_KEY else 2))
+    if settings.DEEPGRAM_API_KEY:
+        return settings.CLOUD_MAX_JOBS
+    if settings.ASR_SUBPROCESS:
+        from backend.services.asr_pool import default_pool_size
+
+        return default_pool_size()
+    return 1
+
+
+def _memory_available_ratio() -> float:
+    total = available = 0
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    total = int(line.split()[1])
+                elif line.startswith("MemAvailable:"):
+                    available = int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return available / total if total else 1.0
+
+
+@lru_cache(maxsize=None)
+def get_controller() -> ConcurrencyController:
+    return ConcurrencyController()
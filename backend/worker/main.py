@@ -1,20 +1,55 @@
+import asyncio
+
+from arq import cron
+from arq.worker import Worker, func
 from loguru import logger
 
 from backend.core.config import settings
 from backend.core.database import init_db
-from backend.core.queue import REDIS_SETTINGS
-from backend.worker.tasks import process_media_task
+from backend.core.metrics import setup_tracing, start_metrics_server
+from backend.core.queue import PROBE_QUEUE_NAME, REDIS_SETTINGS
+from backend.worker.concurrency import get_controller, get_max_jobs
+from backend.worker.tasks import (
+    derive_summary_task,
+    export_task,
+    get_asr_pool,
+    live_media_task,
+    poll_feeds_task,
+    probe_media_task,
+    process_media_task,
+    reconcile_media_task,
+    reprocess_task,
+    storage_lifecycle_task,
+)
 
 
 async def startup(ctx):
-    logger.info("👷 Worker 正在启动，检查数据库连接...")
-    init_db()
+    logger.info("👷 Worker 正在启动...")
+    if settings.AUTO_INIT_DB:
+        init_db()
+    setup_tracing("audigest-worker")
+    start_metrics_server(settings.WORKER_METRICS_PORT)
+    get_controller().start(ctx["redis"])
+    # 元数据预取在同一进程里跑一个独立队列的 Worker：有自己的任务名额，不会排在小时级的转录任务后面
+    probe_worker = Worker(
+        functions=[func(probe_media_task, keep_result=0)],
+        queue_name=PROBE_QUEUE_NAME,
+        redis_settings=REDIS_SETTINGS,
+        max_jobs=settings.PROBE_MAX_JOBS,
+        job_timeout=60,
+        handle_signals=False,
+    )
+    ctx["probe_worker"] = probe_worker
+    ctx["probe_task"] = asyncio.create_task(probe_worker.async_run())
 
 
-def get_max_jobs():
-    if settings.DEEPGRAM_API_KEY:
-        return 5
-    return 1
+async def shutdown(ctx):
+    if "probe_worker" in ctx:
+        await ctx["probe_worker"].close()
+    await get_controller().stop()
+    # 只有用过本地转录时才会创建子进程
+    if get_asr_pool.cache_info().currsize:
+        get_asr_pool().close()
 
 
 class WorkerSettings:
@@ -22,8 +57,27 @@ class WorkerSettings:
     ARQ Worker 配置
     """
 
-    functions = [process_media_task]
+    # 按媒体推送的任务使用确定的任务 ID (见 media_job_id)，不保留结果，以便同一媒体之后可以再次入队
+    functions = [
+        # max_tries 是总次数：名额已满的延后与中断重跑各自的上限在 process_media_task 里分开检查
+        func(process_media_task, keep_result=0, max_tries=settings.CONCURRENCY_MAX_DEFERS + settings.PROCESS_MAX_RETRIES + 1),
+        poll_feeds_task,
+        derive_summary_task,
+        reprocess_task,
+        func(export_task, keep_result=0),
+        # 直播可能持续数小时，单独放宽超时
+        func(live_media_task, timeout=settings.LIVE_MAX_SECONDS + 1800, keep_result=0),
+    ]
+    cron_jobs = [
+        cron(poll_feeds_task, minute=set(range(0, 60, settings.FEED_POLL_MINUTES))),
+        cron(storage_lifecycle_task, minute=set(range(0, 60, settings.LIFECYCLE_INTERVAL_MINUTES))),
+        cron(reconcile_media_task, minute=set(range(0, 60, settings.RECONCILE_INTERVAL_MINUTES))),
+        # 未配置导出目标时不注册，避免每天空跑
+        *([cron(export_task, hour={settings.EXPORT_HOUR}, minute={0})] if settings.EXPORT_TARGETS else []),
+    ]
     redis_settings = REDIS_SETTINGS
+    # 自适应模式下只是上限，实际同时执行的任务数由 ConcurrencyController 调整
     max_jobs = get_max_jobs()
     job_timeout = 3600
     on_startup = startup
+    on_shutdown = shutdown
@@ -1,80 +1,663 @@
 import asyncio
 import os
-from typing import Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
+from arq import Retry
+from arq.constants import default_queue_name, in_progress_key_prefix
 from loguru import logger
-from sqlmodel import Session
+from sqlmodel import Session, col, select
 
 from backend.core.config import settings
 from backend.core.database import engine
-from backend.core.utils import detect_language_from_title
-from backend.models import SourceMedia
-from backend.services.downloader import MediaDownloader
-from backend.services.storage import StorageManager
-from backend.services.summarizer import Summarizer
-from backend.services.transcriber import AudioTranscriber
+from backend.core.metrics import ASR_RTF, DOWNLOAD_MBPS, INFLIGHT, JOBS_TOTAL, QUEUE_DEPTH, QUEUE_WAIT_SECONDS, attached_context, tracer, track_stage
+from backend.core.queue import enqueue_media, media_job_id
+from backend.models import TITLE_PLACEHOLDER, ReprocessJob, SourceMedia, TranscriptSegment, utc_now
+from backend.services.admission import IN_FLIGHT_STATUSES, AdmissionController, ThroughputStats
+from backend.worker.concurrency import get_controller
 
-transcriber_mode = "cloud" if settings.DEEPGRAM_API_KEY else "local"
+if TYPE_CHECKING:
+    from backend.services.asr_pool import ASRProcessPool
+    from backend.services.downloader import MediaDownloader
+    from backend.services.feed_poller import FeedPoller
+    from backend.services.language_detector import LanguageDetector
+    from backend.services.lifecycle import StorageLifecycle
+    from backend.services.postprocess import TranscriptPostProcessor
+    from backend.services.speaker_index import SpeakerIndex
+    from backend.services.storage import StorageManager
+    from backend.services.summarizer import Summarizer
+    from backend.services.transcriber import AudioTranscriber
 
-downloader = MediaDownloader()
-transcriber = AudioTranscriber(
-    mode=transcriber_mode,
-    api_key=settings.DEEPGRAM_API_KEY,
-    hf_token=settings.HF_TOKEN,
-    device=None,
-)
-storage = StorageManager()
-summarizer = Summarizer()
 
+# 每个任务因名额已满被延后的次数，用来把延后和执行中断后的重跑分开计数
+DEFER_COUNT_PREFIX = "audigest:defers:"
+DEFER_COUNT_TTL = 86400
+# 同一导出目标同时只跑一个同步；锁的过期时间与 job_timeout 一致，Worker 崩溃后不会一直占着
+EXPORT_LOCK_KEY = "audigest:export_lock:{target}"
+EXPORT_LOCK_TTL = 3600
 
-async def process_media_task(ctx: Any, media_id: int):
+
+# 服务按需构造：Worker 启动时不导入 yt_dlp / openai / torch 等重依赖，第一次用到时才加载
+@lru_cache(maxsize=None)
+def get_downloader() -> "MediaDownloader":
+    from backend.services.downloader import MediaDownloader
+
+    return MediaDownloader()
+
+
+@lru_cache(maxsize=None)
+def get_transcriber() -> "AudioTranscriber":
+    from backend.services.transcriber import AudioTranscriber
+
+    return AudioTranscriber(
+        mode="cloud" if settings.DEEPGRAM_API_KEY else "local",
+        api_key=settings.DEEPGRAM_API_KEY,
+        hf_token=settings.HF_TOKEN,
+        device=None,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_asr_pool() -> "ASRProcessPool":
+    from backend.services.asr_pool import ASRProcessPool
+
+    transcriber = get_transcriber()
+    return ASRProcessPool({"mode": "local", "hf_token": transcriber.hf_token, "device": transcriber.device})
+
+
+@lru_cache(maxsize=None)
+def get_language_detector() -> "LanguageDetector":
+    from backend.services.language_detector import LanguageDetector
+
+    return LanguageDetector()
+
+
+@lru_cache(maxsize=None)
+def get_postprocessor() -> "TranscriptPostProcessor":
+    from backend.services.postprocess import TranscriptPostProcessor
+
+    return TranscriptPostProcessor()
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> "StorageManager":
+    from backend.services.storage import StorageManager
+
+    return StorageManager()
+
+
+@lru_cache(maxsize=None)
+def get_speaker_index() -> "SpeakerIndex":
+    from backend.services.speaker_index import SpeakerIndex
+
+    return SpeakerIndex()
+
+
+@lru_cache(maxsize=None)
+def get_summarizer() -> "Summarizer":
+    from backend.services.summarizer import Summarizer
+
+    return Summarizer()
+
+
+@lru_cache(maxsize=None)
+def get_lifecycle() -> "StorageLifecycle":
+    from backend.services.lifecycle import StorageLifecycle
+
+    return StorageLifecycle()
+
+
+@lru_cache(maxsize=None)
+def get_feed_poller() -> "FeedPoller":
+    from backend.services.feed_poller import FeedPoller
+
+    return FeedPoller()
+
+
+async def process_media_task(ctx: Any, media_id: int, trace_ctx: Optional[Dict[str, str]] = None):
     """
     [Worker 核心任务] 全流程处理：下载 -> 转录 -> 存储 -> 总结
     被 ARQ 队列调用
+    :param trace_ctx: API 入队时注入的链路上下文，用于把各阶段 span 关联到提交请求
     """
+    redis = ctx.get("redis")
+    if redis is None or not ctx.get("job_id"):
+        # 不经过 ARQ 直接调用 (如 benchmarks.run)：没有可以延后 / 重跑的任务，直接等待任务名额
+        async with get_controller().slot("job"):
+            await _process_media(ctx, media_id, trace_ctx)
+        return
+
+    defer_key = DEFER_COUNT_PREFIX + ctx["job_id"]
+    # job_try 同时计入名额已满的延后 (上限 CONCURRENCY_MAX_DEFERS) 和执行中断后的重跑，扣掉延后次数才是真正的重跑次数
+    retries = ctx.get("job_try", 1) - 1 - int(await redis.get(defer_key) or 0)
+    if retries > settings.PROCESS_MAX_RETRIES:
+        logger.error(f"❌ [Worker] MediaID={media_id} 已被中断重跑 {retries} 次，放弃")
+        JOBS_TOTAL.labels(function="process_media_task", status="failed").inc()
+        with Session(engine) as session:
+            media = session.get(SourceMedia, media_id)
+            if media:
+                media.status = "failed"
+                media.error_msg = f"执行中断次数超过上限 ({settings.PROCESS_MAX_RETRIES})"
+                session.add(media)
+                session.commit()
+        await redis.delete(defer_key)
+        return
+
+    job_slot = get_controller().slot("job")
+    if not job_slot.try_acquire():
+        # 本 Worker 的任务名额已满 (自适应并发调低了上限)：同一任务 ID 延后重试，其间其他 Worker 可以接手
+        logger.debug(f"⏸️ [Worker] 任务名额已满，MediaID={media_id} 延后 {settings.CONCURRENCY_DEFER_SECONDS}s")
+        await redis.incr(defer_key)
+        await redis.expire(defer_key, DEFER_COUNT_TTL)
+        raise Retry(defer=settings.CONCURRENCY_DEFER_SECONDS)
+    try:
+        await _process_media(ctx, media_id, trace_ctx)
+        await redis.delete(defer_key)
+    finally:
+        job_slot.release()
+
+
+async def _process_media(ctx: Any, media_id: int, trace_ctx: Optional[Dict[str, str]] = None):
     logger.info(f"👷 [Worker] 接到任务: MediaID={media_id}")
+    await _observe_queue(ctx, "process_media_task")
+    slots = get_controller()
 
-    with Session(engine) as session:
+    with attached_context(trace_ctx), tracer.start_as_current_span("process_media_task", attributes={"media_id": media_id}), Session(engine) as session:
         # 1. 获取任务信息
         media = session.get(SourceMedia, media_id)
         if not media:
             logger.error(f"❌ 任务不存在: MediaID={media_id}")
             return
+        INFLIGHT.labels(stage="job").inc()
         try:
             # 第一步：下载
             _update_status(session, media, "downloading")
+            if media.audio_state == "archived" and not (media.local_audio_path and os.path.exists(media.local_audio_path)):
+                # 音频已被生命周期策略移到对象存储：先取回，失败再从原链接下载
+                await asyncio.to_thread(get_lifecycle().restore, session, media)
             if media.local_audio_path and os.path.exists(media.local_audio_path):
                 logger.info(f"⏭️ 文件已存在，跳过下载: {media.local_audio_path}")
             else:
-                dl_result = await asyncio.to_thread(downloader.download, media.original_url, media.platform)
+                async with slots.slot("download"):
+                    started = time.perf_counter()
+                    with track_stage("download", engine=media.platform):
+                        dl_result = await asyncio.to_thread(get_downloader().download, media.original_url, media.platform, media.id)
+                elapsed = time.perf_counter() - started
+                size_mb = os.path.getsize(dl_result["local_path"]) / 1024 / 1024
+                DOWNLOAD_MBPS.labels(platform=media.platform).observe(size_mb / max(elapsed, 1e-6))
+                await _record_throughput(ctx, "download", elapsed, dl_result["duration"])
 
-                media.title = dl_result["title"]
-                media.author = dl_result["author"]
-                media.duration = dl_result["duration"]
+                # 订阅源 / 元数据预取已经写入的标题和作者更准确，下载结果只用来补空缺
+                if dl_result["title"] and media.title in (None, "", TITLE_PLACEHOLDER):
+                    media.title = dl_result["title"]
+                media.author = media.author or dl_result["author"]
+                media.duration = dl_result["duration"] or media.duration
                 media.local_audio_path = dl_result["local_path"]
+                media.audio_state = "local"
                 session.add(media)
                 session.commit()
+            get_lifecycle().touch(session, media)
 
             # 第二步：转录
             _update_status(session, media, "transcribing")
-            target_lang = detect_language_from_title(media.title)
-            segments = await asyncio.to_thread(transcriber.transcribe, media.local_audio_path, language=target_lang)
+            with track_stage("language_detect"):
+                target_lang = await asyncio.to_thread(get_language_detector().detect, media.local_audio_path, media.duration, media.title)
+            transcriber = get_transcriber()
+            asr_engine = transcriber.engine_for(target_lang)
+            async with slots.slot("asr"):
+                started = time.perf_counter()
+                with track_stage("asr", engine=asr_engine, language=target_lang):
+                    if transcriber.mode == "local" and settings.ASR_SUBPROCESS:
+                        segments = await get_asr_pool().transcribe(media.local_audio_path, language=target_lang, engine=asr_engine)
+                    else:
+                        segments = await transcriber.transcribe_async(media.local_audio_path, language=target_lang)
+            elapsed = time.perf_counter() - started
+            if media.duration:
+                ASR_RTF.labels(engine=asr_engine).observe(elapsed / media.duration)
+            await _record_throughput(ctx, "asr", elapsed, media.duration, engine=asr_engine)
+
+            if settings.POSTPROCESS_ENABLED:
+                with track_stage("postprocess"):
+                    segments = get_postprocessor().process(segments)
 
             # 第三步：存储
-            txt_path = storage.save_transcript(session, media.id, segments)
+            with track_stage("storage"):
+                txt_path = get_storage().save_transcript(session, media.id, segments, asr_model=transcriber.model_id_for(target_lang))
+            if settings.SPEAKER_ID_ENABLED:
+                await _identify_speakers(session, media, segments)
 
             # 第四步：总结
             _update_status(session, media, "summarizing")
-            await asyncio.to_thread(summarizer.summarize_content, session, media.id, txt_path)
+            summarizer = get_summarizer()
+            async with slots.slot("llm"):
+                started = time.perf_counter()
+                with track_stage("summarize", engine=summarizer.llm.provider):
+                    await asyncio.to_thread(summarizer.summarize_content, session, media.id, txt_path)
+                await _record_throughput(ctx, "summarize", time.perf_counter() - started, media.duration)
+            for summary_type in settings.AUTO_SUMMARY_TYPES:
+                if summary_type == "detail":
+                    continue
+                # 派生总结只是附加产物，失败 (如 detail 未生成) 不影响主流程，之后可以按需补生成
+                try:
+                    async with slots.slot("llm"):
+                        with track_stage("summarize", engine=summarizer.llm.provider, summary_type=summary_type):
+                            await asyncio.to_thread(summarizer.derive_summary, session, media.id, summary_type)
+                except Exception as e:
+                    session.rollback()
+                    logger.warning(f"⚠️ [Worker] 派生 {summary_type} 总结失败，跳过: {e}")
             _update_status(session, media, "completed")
+            JOBS_TOTAL.labels(function="process_media_task", status="completed").inc()
             logger.success(f"🎉 [Worker] 任务 {media_id} 全部流程执行完毕！")
 
         except Exception as e:
             logger.exception(f"❌ [Worker] 任务 {media_id} 失败")
+            JOBS_TOTAL.labels(function="process_media_task", status="failed").inc()
             media.status = "failed"
             media.error_msg = str(e)
             session.add(media)
             session.commit()
+        finally:
+            INFLIGHT.labels(stage="job").dec()
+
+
+async def live_media_task(ctx: Any, media_id: int, trace_ctx: Optional[Dict[str, str]] = None):
+    """
+    [Worker 长任务] 直播 / 增长中录音的实时转录
+    边拉流边识别，稳定的句子立即写入 TranscriptSegment，纪要按 LIVE_SUMMARY_INTERVAL 滚动更新；
+    流结束后重写完整的逐字稿文件并生成 detail 总结
+    """
+    logger.info(f"🔴 [Worker] 接到直播任务: MediaID={media_id}")
+    await _observe_queue(ctx, "live_media_task")
+
+    with attached_context(trace_ctx), tracer.start_as_current_span("live_media_task", attributes={"media_id": media_id}), Session(engine) as session:
+        media = session.get(SourceMedia, media_id)
+        if not media:
+            logger.error(f"❌ 任务不存在: MediaID={media_id}")
+            return
+        INFLIGHT.labels(stage="job").inc()
+        stop_event = threading.Event()
+        summary_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-summary")
+        try:
+            source = await asyncio.to_thread(get_downloader().live_source, media.original_url, media.platform)
+            media.title = source["title"] or media.title
+            media.author = source["author"] or media.author
+            _update_status(session, media, "live")
+
+            from backend.services.live_transcriber import LiveTranscriber
+
+            storage = get_storage()
+            summarizer = get_summarizer()
+            file_stem = str(media.id)
+            # 重新开始时清空上一次中断留下的片段，直播的时间轴从加入时刻重新计算
+            storage.reset_transcript(session, media.id, file_stem)
+
+            live_model = f"faster-whisper:{settings.LIVE_ASR_MODEL}"
+            committed: List[Dict] = []
+            unsummarized: List[Dict] = []
+            lock = threading.Lock()
+            summary_future: Optional[Future] = None
+
+            def roll_summary(batch: List[Dict]):
+                with Session(engine) as summary_session:
+                    if summarizer.roll_live_summary(summary_session, media_id, batch):
+                        return
+                # 更新失败：这批片段留到下一次更新
+                with lock:
+                    unsummarized[:0] = batch
+
+            def on_segments(segments: List[Dict]):
+                nonlocal summary_future
+                with Session(engine) as segment_session:
+                    storage.append_segments(segment_session, media_id, segments, file_stem, asr_model=live_model)
+                with lock:
+                    committed.extend(segments)
+                    unsummarized.extend(segments)
+                    due = unsummarized[-1]["end"] - unsummarized[0]["start"] >= settings.LIVE_SUMMARY_INTERVAL
+                    if due and (summary_future is None or summary_future.done()):
+                        batch = unsummarized[:]
+                        unsummarized.clear()
+                        summary_future = summary_pool.submit(roll_summary, batch)
+
+            with track_stage("live_asr", engine="faster_whisper"):
+                try:
+                    processed = await asyncio.to_thread(LiveTranscriber().run, source["url"], on_segments, stop_event, None, source["headers"])
+                except asyncio.CancelledError:
+                    # 任务超时 / 被取消：通知识别线程尽快退出
+                    stop_event.set()
+                    raise
+            # 识别已结束：等在途的滚动纪要写完，之后写入的 detail 总结和 completed 状态不会被它追在后面覆盖
+            await asyncio.to_thread(summary_pool.shutdown, wait=True, cancel_futures=True)
+
+            media.duration = int(processed)
+            with track_stage("storage"):
+                txt_path = storage.save_transcript(session, media.id, committed, asr_model=live_model)
+            _update_status(session, media, "summarizing")
+            with track_stage("summarize", engine=summarizer.llm.provider):
+                await asyncio.to_thread(summarizer.summarize_content, session, media.id, txt_path)
+            _update_status(session, media, "completed")
+            JOBS_TOTAL.labels(function="live_media_task", status="completed").inc()
+            logger.success(f"🎉 [Worker] 直播任务 {media_id} 处理完毕 ({processed:.0f}s)")
+
+        except Exception as e:
+            logger.exception(f"❌ [Worker] 直播任务 {media_id} 失败")
+            JOBS_TOTAL.labels(function="live_media_task", status="failed").inc()
+            stop_event.set()
+            await asyncio.to_thread(summary_pool.shutdown, wait=True, cancel_futures=True)
+            media.status = "failed"
+            media.error_msg = str(e)
+            session.add(media)
+            session.commit()
+        finally:
+            stop_event.set()
+            # 正常结束 / 失败时上面已经等过；这里只兜底任务被取消的情况，不能在取消时阻塞
+            summary_pool.shutdown(wait=False, cancel_futures=True)
+            INFLIGHT.labels(stage="job").dec()
+
+
+async def probe_media_task(ctx: Any, media_id: int, trace_ctx: Optional[Dict[str, str]] = None):
+    """
+    [Worker 快速任务] 提交后立即预取元数据 (标题 / 作者 / 时长)
+    不下载音频，几秒内即可让前端看到标题，时长供语种识别和调度使用
+    """
+    await _observe_queue(ctx, "probe_media_task", queue_name=None)
+    with attached_context(trace_ctx), track_stage("probe"), Session(engine) as session:
+        media = session.get(SourceMedia, media_id)
+        if not media or media.local_audio_path:
+            return
+        try:
+            meta = await asyncio.to_thread(get_downloader().probe, media.original_url, media.platform)
+        except Exception as e:
+            logger.warning(f"⚠️ [Worker] 元数据预取失败 MediaID={media_id}: {e}")
+            return
+
+        session.refresh(media)
+        if meta.get("title") and media.title in (None, "", TITLE_PLACEHOLDER):
+            media.title = meta["title"]
+        media.author = media.author or meta.get("author")
+        media.duration = media.duration or meta.get("duration")
+        session.add(media)
+        session.commit()
+        logger.info(f"🔎 [Worker] 元数据预取完成: {media.title} ({media.duration}s)")
+
+
+async def derive_summary_task(ctx: Any, media_id: int, summary_type: str):
+    """
+    [Worker 按需任务] 基于已有的 detail 总结派生 short / mindmap 等类型
+    只读取 detail 总结，不重新读取逐字稿
+    """
+    await _observe_queue(ctx, "derive_summary_task")
+    summarizer = get_summarizer()
+    async with get_controller().slot("llm"):
+        with track_stage("summarize", engine=summarizer.llm.provider, summary_type=summary_type), Session(engine) as session:
+            try:
+                await asyncio.to_thread(summarizer.derive_summary, session, media_id, summary_type)
+                JOBS_TOTAL.labels(function="derive_summary_task", status="completed").inc()
+            except Exception:
+                logger.exception(f"❌ [Worker] 派生 {summary_type} 失败 MediaID={media_id}")
+                JOBS_TOTAL.labels(function="derive_summary_task", status="failed").inc()
+
+
+async def reprocess_task(ctx: Any, job_id: int):
+    """
+    [Worker 低优先级任务] 批量重处理
+    每次只处理一批，处理完重新入队；主队列有等待中的任务时延后执行，避免挤占新提交的任务
+    summary 阶段只读取逐字稿重新总结，speaker 阶段只重新提取声纹，都不会重新转录
+    asr 阶段每条媒体单独推送 process_media_task (各自受 job_timeout 约束)，本任务只跟踪这一批是否全部结束
+    """
+    from backend.services.reprocess import ReprocessPlanner
+
+    with Session(engine) as session:
+        job = session.get(ReprocessJob, job_id)
+        if not job or job.status not in ("pending", "running"):
+            return
+        waiting = await _waiting_jobs(ctx, settings.REPROCESS_MAX_QUEUE_DEPTH + 1)
+        if waiting > settings.REPROCESS_MAX_QUEUE_DEPTH:
+            logger.debug(f"⏸️ [Reprocess] 主队列有 {waiting} 个任务等待，#{job_id} 延后 {settings.REPROCESS_DEFER_SECONDS}s")
+            await ctx["redis"].enqueue_job("reprocess_task", job_id, _defer_by=settings.REPROCESS_DEFER_SECONDS)
+            return
+
+        job.status = "running"
+        session.add(job)
+        session.commit()
+        if job.pending_media_ids and not _collect_asr_batch(session, job):
+            await ctx["redis"].enqueue_job("reprocess_task", job_id, _defer_by=settings.REPROCESS_DEFER_SECONDS)
+            return
+        media_ids = await asyncio.to_thread(ReprocessPlanner().next_batch, session, job)
+        if not media_ids:
+            job.status = "completed"
+            session.add(job)
+            session.commit()
+            logger.success(f"✅ [Reprocess] 任务 #{job_id} 完成: 成功 {job.processed} / 失败 {job.failed}")
+            return
+
+        if job.stage == "asr":
+            await _enqueue_asr_batch(ctx, session, job, media_ids)
+            return
+
+        for media_id in media_ids:
+            session.refresh(job)
+            if job.status != "running":
+                logger.info(f"⏹️ [Reprocess] 任务 #{job_id} 已{job.status}")
+                return
+            ok = await _reprocess_one(session, job.stage, job.summary_type, media_id)
+            if ok:
+                job.processed += 1
+            else:
+                job.failed += 1
+            job.cursor = media_id
+            session.add(job)
+            session.commit()
+
+    await ctx["redis"].enqueue_job("reprocess_task", job_id)
+
+
+async def _enqueue_asr_batch(ctx: Any, session: Session, job: ReprocessJob, media_ids: List[int]):
+    """
+    重新转录后总结也随之过期，直接走完整流水线 (音频已归档时会自动取回)
+    先把媒体标回 pending 并记下这一批，再推送任务，避免 Worker 先跑完又被覆盖状态
+    """
+    for media in session.exec(select(SourceMedia).where(col(SourceMedia.id).in_(media_ids))):
+        media.status = "pending"
+        media.error_msg = None
+        session.add(media)
+    job.pending_media_ids = media_ids
+    job.cursor = media_ids[-1]
+    session.add(job)
+    session.commit()
+
+    redis = ctx["redis"]
+    for media_id in media_ids:
+        await redis.enqueue_job("process_media_task", media_id, _job_id=media_job_id("process_media_task", media_id))
+    logger.info(f"🔁 [Reprocess] 任务 #{job.id} 推送 {len(media_ids)} 条重新转录")
+    await redis.enqueue_job("reprocess_task", job.id, _defer_by=settings.REPROCESS_DEFER_SECONDS)
+
+
+def _collect_asr_batch(session: Session, job: ReprocessJob) -> bool:
+    """统计上一批重新转录的结果；还有未结束的媒体时返回 False"""
+    statement = select(SourceMedia.status).where(col(SourceMedia.id).in_(job.pending_media_ids))
+    statuses = list(session.exec(statement).all())
+    if any(status == "pending" or status in IN_FLIGHT_STATUSES for status in statuses):
+        return False
+    completed = sum(1 for status in statuses if status == "completed")
+    job.processed += completed
+    job.failed += len(job.pending_media_ids) - completed
+    job.pending_media_ids = []
+    session.add(job)
+    session.commit()
+    return True
+
+
+async def _reprocess_one(session: Session, stage: str, summary_type: str, media_id: int) -> bool:
+    try:
+        if stage == "speaker":
+            # 只用已有逐字稿的说话人分段重新提取声纹，不重新转录
+            media = session.get(SourceMedia, media_id)
+            if media.audio_state == "archived" and not (media.local_audio_path and os.path.exists(media.local_audio_path)):
+                await asyncio.to_thread(get_lifecycle().restore, session, media)
+            if not (media.local_audio_path and os.path.exists(media.local_audio_path)):
+                logger.warning(f"⚠️ [Reprocess] MediaID={media_id} 本地音频已不存在，无法提取声纹")
+                return False
+            statement = select(TranscriptSegment).where(TranscriptSegment.media_id == media_id)
+            segments = [{"start": s.start_time, "end": s.end_time, "speaker": s.speaker_label} for s in session.exec(statement)]
+            return await _identify_speakers(session, media, segments)
+
+        summarizer = get_summarizer()
+        async with get_controller().slot("llm"):
+            with track_stage("summarize", engine=summarizer.llm.provider, summary_type=summary_type):
+                if summary_type == "detail":
+                    txt_path = await asyncio.to_thread(get_storage().transcript_file, session, media_id)
+                    result = await asyncio.to_thread(summarizer.summarize_content, session, media_id, txt_path)
+                else:
+                    result = await asyncio.to_thread(summarizer.derive_summary, session, media_id, summary_type)
+        return result is not None
+    except Exception:
+        logger.exception(f"❌ [Reprocess] MediaID={media_id} 重处理失败")
+        session.rollback()
+        return False
+
+
+async def _identify_speakers(session: Session, media: SourceMedia, segments: List[Dict]) -> bool:
+    """声纹识别失败不影响主流程，逐字稿保留原始标签"""
+    try:
+        with track_stage("speaker", engine=settings.SPEAKER_EMBEDDING_BACKEND):
+            await asyncio.to_thread(get_speaker_index().identify, session, media.id, media.local_audio_path, segments)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ [Speaker] 说话人识别失败 (MediaID: {media.id}): {e}")
+        session.rollback()
+        return False
+
+
+async def _waiting_jobs(ctx: Any, limit: int) -> int:
+    """主队列中已到期、尚未开始执行的任务数 (只用于判断是否繁忙，最多检查 limit + 100 个)"""
+    try:
+        redis = ctx["redis"]
+        now_ms = int(time.time() * 1000)
+        job_ids = await redis.zrangebyscore(default_queue_name, 0, now_ms, start=0, num=limit + 100)
+        waiting = 0
+        for job_id in job_ids:
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            if job_id != ctx.get("job_id") and not await redis.exists(in_progress_key_prefix + job_id):
+                waiting += 1
+        return waiting
+    except Exception as e:
+        logger.debug(f"[Worker] 读取队列状态失败: {e}")
+        return 0
+
+
+async def storage_lifecycle_task(ctx: Any):
+    """
+    [Worker 定时任务] 执行存储生命周期策略：压缩已完成的音频、归档过期文件、按 LRU 执行磁盘配额
+    """
+    with track_stage("lifecycle"), Session(engine) as session:
+        await asyncio.to_thread(get_lifecycle().sweep, session)
+
+
+async def poll_feeds_task(ctx: Any, feed_id: Optional[int] = None):
+    """
+    [Worker 定时任务] 轮询 RSS 订阅，把新单集入库并推送到处理队列
+    指定 feed_id 时只轮询该订阅 (用于刚订阅时立即收录)
+    """
+    with Session(engine) as session:
+        new_ids = await get_feed_poller().poll(session, [feed_id] if feed_id else None)
+        if not new_ids:
+            return
+        # 自动收录按 low 优先级处理：积压超过阈值时延后入队，不挤占用户手动提交的任务
+        defer_by = None
+        try:
+            eta = await AdmissionController(ctx["redis"]).estimate(session, None)
+            defer_by = AdmissionController.retry_after(eta, "low")
+        except Exception as e:
+            logger.debug(f"[Admission] ETA 估算失败: {e}")
+        if defer_by:
+            logger.info(f"🚦 [Feed] 队列积压，{len(new_ids)} 个新单集延后 {defer_by}s 入队")
+        for media_id in new_ids:
+            media = session.get(SourceMedia, media_id)
+            await enqueue_media(ctx["redis"], media, defer_by=defer_by)
+
+
+async def export_task(ctx: Any, target: Optional[str] = None, full: bool = False):
+    """
+    [Worker 定时任务] 增量导出到 Obsidian 仓库 / HTTP 文档服务
+    未指定 target 时同步 EXPORT_TARGETS 中的所有目标
+    手动触发与定时任务的任务 ID 不同，同一目标用 Redis 锁串行，正在同步时直接跳过 (水位之后的内容下次同步会补上)
+    """
+    from backend.services.exporter import Exporter, build_target
+
+    for name in [target] if target else settings.EXPORT_TARGETS:
+        lock = ctx["redis"].lock(EXPORT_LOCK_KEY.format(target=name), timeout=EXPORT_LOCK_TTL)
+        if not await lock.acquire(blocking=False):
+            logger.info(f"⏭️ [Export] {name} 正在同步中，跳过本次")
+            continue
+        export_target = None
+        try:
+            export_target = build_target(name)
+            with track_stage("export", engine=name), Session(engine) as session:
+                await Exporter(export_target).sync(session, full=full)
+        except Exception:
+            logger.exception(f"❌ [Export] {name} 同步失败")
+        finally:
+            if export_target is not None:
+                await export_target.aclose()
+            await lock.release()
+
+
+async def reconcile_media_task(ctx: Any):
+    """
+    [Worker 定时任务] 对账：把数据库里"应该在跑却不在队列中"的任务重新入队
+    - pending 超过 RECONCILE_PENDING_SECONDS (提交时 Redis 不可用、延后重试次数用尽等)
+    - 处理中状态超过 RECONCILE_STALE_SECONDS 未更新 (Worker 崩溃 / 被杀)
+    任务 ID 是确定的，仍在队列或执行中的任务重复推送不会产生副本
+    """
+    now = utc_now()
+    pending_cutoff = now - timedelta(seconds=settings.RECONCILE_PENDING_SECONDS)
+    stale_cutoff = now - timedelta(seconds=settings.RECONCILE_STALE_SECONDS)
+    with Session(engine) as session:
+        statement = (
+            select(SourceMedia)
+            .where(((SourceMedia.status == "pending") & (SourceMedia.updated_at < pending_cutoff)) | (col(SourceMedia.status).in_(["downloading", "transcribing", "summarizing", "live"]) & (SourceMedia.updated_at < stale_cutoff)))
+            .order_by(col(SourceMedia.id))
+            .limit(settings.LIFECYCLE_BATCH_SIZE)
+        )
+        requeued = 0
+        for media in session.exec(statement).all():
+            if media.status != "pending" and media.status != "live":
+                # 回到 pending，让状态与"重新排队"一致
+                _update_status(session, media, "pending")
+            await enqueue_media(ctx["redis"], media)
+            requeued += 1
+    if requeued:
+        logger.info(f"🔁 [Reconcile] 已补推 {requeued} 个任务")
+
+
+async def _record_throughput(ctx: Any, stage: str, seconds: float, duration: Optional[float], engine: str = ""):
+    """记录阶段吞吐量样本，供 API 估算 ETA (统计失败不影响任务)"""
+    if not ctx.get("redis") or not duration:
+        return
+    try:
+        await ThroughputStats(ctx["redis"]).record(stage, seconds, duration, engine=engine)
+    except Exception as e:
+        logger.debug(f"[Worker] 记录吞吐量失败: {e}")
+
+
+async def _observe_queue(ctx: Any, function: str, queue_name: Optional[str] = default_queue_name):
+    """
+    记录排队等待时间和当前队列长度
+    :param queue_name: 为空时不记录队列长度 (独立队列的任务，避免覆盖主队列的读数)
+    """
+    enqueue_time = ctx.get("enqueue_time")
+    if enqueue_time:
+        QUEUE_WAIT_SECONDS.labels(function=function).observe(max((datetime.now(timezone.utc) - enqueue_time).total_seconds(), 0.0))
+    if queue_name is None:
+        return
+    try:
+        QUEUE_DEPTH.set(await ctx["redis"].zcard(queue_name))
+    except Exception as e:
+        logger.debug(f"[Worker] 读取队列长度失败: {e}")
 
 
 def _update_status(session: Session, media: SourceMedia, status: str):
@@ -0,0 +1,60 @@
+"""
+合成音频语料：用 ffmpeg 生成指定时长的音调 + 底噪 MP3 (不依赖任何外部服务)
+同一时长的文件只生成一次，缓存在 benchmarks/.corpus
+"""
+
+import subprocess
+from pathlib import Path
+from typing import List
+
+CORPUS_DIR = Path(__file__).parent / ".corpus"
+DEFAULT_DURATIONS = [60, 300, 900, 1800, 3600, 10800]
+
+
+def generate(durations: List[int], corpus_dir: Path = CORPUS_DIR) -> List[Path]:
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i, seconds in enumerate(durations):
+        path = corpus_dir / f"tone_{seconds}s.mp3"
+        if not path.exists():
+            print(f"⏳ 生成合成音频 {path.name}...")
+            freq = 220 + 110 * (i % 4)
+            cmd = [
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                "-y",
+                "-f",
+                "lavfi",
+                "-i",
+                f"sine=frequency={freq}:duration={seconds}",
+                "-f",
+                "lavfi",
+                "-i",
+                f"anoisesrc=d={seconds}:a=0.02",
+                "-filter_complex",
+                "amix=inputs=2:duration=shortest",
+                "-ac",
+                "1",
+                "-b:a",
+                "64k",
+                str(path),
+            ]
+            subprocess.run(cmd, check=True)
+        files.append(path)
+    return files
+
+
+def parse_durations(spec: str) -> List[int]:
+    """'60,300,3h' -> [60, 300, 10800]"""
+    durations = []
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if part.endswith("h"):
+            durations.append(int(float(part[:-1]) * 3600))
+        elif part.endswith("m"):
+            durations.append(int(float(part[:-1]) * 60))
+        elif part:
+            durations.append(int(part.rstrip("s")))
+    return durations
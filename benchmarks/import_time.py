@@ -0,0 +1,80 @@
+"""
+启动耗时预算检查
+
+用 python -X importtime 分别导入 API 与 Worker 入口，输出耗时最多的模块，
+并检查: 1) 总导入耗时不超过预算  2) 启动时没有导入重依赖 (yt_dlp / openai / torch ...)
+
+    uv run python -m benchmarks.import_time
+    uv run python -m benchmarks.import_time --api-budget-ms 1500 --worker-budget-ms 1500 --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# 这些模块只应在第一次处理任务时才加载
+HEAVY_MODULES = ["yt_dlp", "feedparser", "openai", "torch", "transformers", "whisperx", "funasr", "faster_whisper", "bs4", "httpx"]
+
+TARGETS = {
+    "api": "backend.main",
+    "worker": "backend.worker.main",
+}
+
+
+def measure(module: str) -> Tuple[List[Tuple[str, int, int]], str]:
+    """
+    :return: ([(模块名, self_us, cumulative_us)], stderr)
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows, proc.stderr
+
+
+def check(target: str, module: str, budget_ms: float, top: int) -> List[str]:
+    # 先预热一次，避免把 .pyc 编译时间算进去
+    measure(module)
+    rows, _ = measure(module)
+    total_ms = max((cum for name, _, cum in rows if name == module), default=0) / 1000
+    loaded: Dict[str, int] = {name: cum for name, _, cum in rows}
+
+    print(f"\n📦 [{target}] import {module}: {total_ms:.0f} ms (预算 {budget_ms:.0f} ms)")
+    for name, _, cum in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"  {cum / 1000:8.1f} ms  {name}")
+
+    problems = []
+    if total_ms > budget_ms:
+        problems.append(f"[{target}] 导入耗时 {total_ms:.0f} ms 超出预算 {budget_ms:.0f} ms")
+    for heavy in HEAVY_MODULES:
+        if heavy in loaded:
+            problems.append(f"[{target}] 启动时导入了重依赖 {heavy} ({loaded[heavy] / 1000:.0f} ms)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audigest 启动耗时预算检查")
+    parser.add_argument("--api-budget-ms", type=float, default=1500)
+    parser.add_argument("--worker-budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    budgets = {"api": args.api_budget_ms, "worker": args.worker_budget_ms}
+    problems = []
+    for target, module in TARGETS.items():
+        problems.extend(check(target, module, budgets[target], args.top))
+
+    if problems:
+        print("\n❌ 启动预算检查未通过:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("\n✅ 启动预算检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+端到端基准测试 (离线运行)
+
+在进程内直接执行 process_media_task，外部服务全部由 benchmarks/stubs.py 替身:
+媒体文件 / RSS 由本地 HTTP 服务提供，转录走假 Deepgram，总结走假 OpenAI 兼容接口。
+需要本地 PostgreSQL / Redis (docker compose up -d db redis 即可)。
+
+    uv run python -m benchmarks.run --durations 60,300,1800 --jobs 12 --concurrency 4
+    uv run python -m benchmarks.run --save-baseline benchmarks/results/baseline.json
+    uv run python -m benchmarks.run --baseline benchmarks/results/baseline.json   # 退化时返回码为 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.corpus import CORPUS_DIR, generate, parse_durations
+from benchmarks.stats import summarize
+from benchmarks.stubs import StubConfig, StubServer
+
+
+def configure_env(base_url: str):
+    """必须在导入 backend 之前调用：把所有外部服务指向替身"""
+    os.environ.update(
+        {
+            "DEEPGRAM_API_KEY": "bench",
+            "DEEPGRAM_BASE_URL": base_url,
+            "DEFAULT_LLM_PROVIDER": "openai",
+            "OPENAI_BASE_URL": f"{base_url}/v1",
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_MODEL": "bench-llm",
+            "PROXY_URL": "",
+            "SEARCH_EMBEDDINGS_ENABLED": "false",
+            # 并发由 --concurrency 固定，不让 Worker 的自适应控制介入
+            "CONCURRENCY_ADAPTIVE": "false",
+        }
+    )
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # Linux 下 ru_maxrss 单位为 KB
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+async def run_jobs(urls: List[str], concurrency: int, stage_samples: Dict[str, List[float]]) -> Dict:
+    from sqlmodel import Session
+
+    from backend.core.database import engine, init_db
+    from backend.core.metrics import add_stage_observer
+    from backend.models import SourceMedia
+    from backend.services.url_parser import URLParser
+    from backend.worker.tasks import process_media_task
+
+    init_db()
+    add_stage_observer(lambda stage, engine_name, seconds: stage_samples[stage].append(seconds))
+
+    with Session(engine) as session:
+        media_ids = []
+        for url in urls:
+            media = SourceMedia(original_url=url, platform=URLParser.detect_platform(url), title="获取中...", status="pending")
+            session.add(media)
+            session.commit()
+            media_ids.append(media.id)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    job_seconds: List[float] = []
+
+    async def one(media_id: int):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await process_media_task({}, media_id)
+            job_seconds.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(mid) for mid in media_ids])
+    wall = time.perf_counter() - started
+
+    with Session(engine) as session:
+        statuses = [session.get(SourceMedia, mid).status for mid in media_ids]
+    return {"wall": wall, "job_seconds": job_seconds, "completed": statuses.count("completed"), "failed": len(statuses) - statuses.count("completed")}
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """返回退化项列表：吞吐下降或阶段 p95 上升超过 tolerance"""
+    regressions = []
+    if result["jobs_per_hour"] < baseline["jobs_per_hour"] * (1 - tolerance):
+        regressions.append(f"jobs/hour {baseline['jobs_per_hour']:.1f} -> {result['jobs_per_hour']:.1f}")
+    for stage, stats in result["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base and base.get("p95") and stats.get("p95", 0) > base["p95"] * (1 + tolerance):
+            regressions.append(f"{stage} p95 {base['p95']:.2f}s -> {stats['p95']:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audigest 端到端基准测试")
+    parser.add_argument("--durations", default="60,300,900", help="合成音频时长列表，如 60,5m,1h,3h")
+    parser.add_argument("--jobs", type=int, default=6, help="任务总数 (按时长列表轮流分配)")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--feed-ratio", type=float, default=0.5, help="通过 RSS 提交的任务比例，其余为直链")
+    parser.add_argument("--asr-rtf", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--baseline", type=Path, help="与基线结果比较")
+    parser.add_argument("--save-baseline", type=Path, help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    args = parser.parse_args()
+
+    files = generate(parse_durations(args.durations))
+    config = StubConfig(media_dir=CORPUS_DIR, asr_rtf=args.asr_rtf, llm_latency=args.llm_latency)
+
+    with StubServer(config) as stub:
+        configure_env(stub.base_url)
+        run_id = uuid.uuid4().hex[:8]
+        urls = []
+        feed_every = round(1 / args.feed_ratio) if args.feed_ratio > 0 else 0
+        for i in range(args.jobs):
+            audio = files[i % len(files)]
+            if feed_every and i % feed_every == 0:
+                urls.append(f"{stub.base_url}/feeds/{audio.stem}.xml?run={run_id}-{i}")
+            else:
+                urls.append(f"{stub.base_url}/media/{audio.name}?run={run_id}-{i}")
+
+        stage_samples: Dict[str, List[float]] = defaultdict(list)
+        outcome = asyncio.run(run_jobs(urls, args.concurrency, stage_samples))
+
+    result = {
+        "jobs": args.jobs,
+        "concurrency": args.concurrency,
+        "durations": args.durations,
+        "completed": outcome["completed"],
+        "failed": outcome["failed"],
+        "wall_seconds": outcome["wall"],
+        "jobs_per_hour": outcome["completed"] / outcome["wall"] * 3600,
+        "job_latency": summarize(outcome["job_seconds"]),
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    print(f"\n📊 完成 {result['completed']}/{args.jobs} | 失败 {result['failed']} | 耗时 {result['wall_seconds']:.1f}s | {result['jobs_per_hour']:.1f} jobs/hour")
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:<16} n={stats['n']:<4} p50={stats['p50']:.2f}s p95={stats['p95']:.2f}s p99={stats['p99']:.2f}s")
+    print(f"  peak RSS: self={result['peak_rss_mb']['self']:.0f}MB children={result['peak_rss_mb']['children']:.0f}MB")
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"💾 基线已保存: {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("❌ 性能退化:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("✅ 未发现性能退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+搜索延迟基准测试
+
+向量检索 (默认，离线即可运行):
+    uv run python -m benchmarks.search_latency --segments 10000000
+
+全文检索 (需要 DATABASE_URL 指向本地 PostgreSQL，--seed-db 会写入一批合成逐字稿):
+    uv run python -m benchmarks.search_latency --fulltext --seed-db 10000000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stats import report
+
+VOCAB = ["人工智能", "创业", "播客", "模型", "数据", "增长", "产品", "market", "startup", "agent", "inference", "GPU", "开源", "融资", "用户", "训练"]
+QUERIES = ["人工智能 创业", "GPU inference", "开源模型", "用户增长", "startup market", "训练数据"]
+
+
+def bench_vectors(args):
+    from backend.services.vector_store import VectorStore
+
+    windows = args.segments // args.segments_per_window
+    store = VectorStore(tempfile.mkdtemp(prefix="audigest-bench-"), dim=args.dim)
+    print(f"⏳ 写入 {windows:,} 个向量窗口 (对应 {args.segments:,} 条片段, dim={args.dim})...")
+    rng = np.random.default_rng(0)
+    block = 200_000
+    started = time.perf_counter()
+    for offset in range(0, windows, block):
+        n = min(block, windows - offset)
+        keys = (np.arange(offset, offset + n) // 60).tolist()
+        starts = (np.arange(n) * 60.0).tolist()
+        store.add(rng.standard_normal((n, args.dim), dtype=np.float32), keys, starts, [s + 60.0 for s in starts])
+    print(f"写入耗时 {time.perf_counter() - started:.1f}s")
+
+    latencies = []
+    for _ in range(args.queries):
+        query = rng.standard_normal(args.dim, dtype=np.float32)
+        t0 = time.perf_counter()
+        store.search(query, k=20)
+        latencies.append(time.perf_counter() - t0)
+    report("vector search", latencies)
+
+
+def seed_db(n):
+    from sqlalchemy import text
+    from sqlmodel import Session
+
+    from backend.core.database import engine
+
+    print(f"⏳ 写入 {n:,} 条合成逐字稿片段...")
+    vocab = "ARRAY[" + ",".join(f"'{w}'" for w in VOCAB) + "]"
+    with Session(engine) as session:
+        media_id = session.execute(
+            text("INSERT INTO source_media (original_url, title, platform, status, created_at, updated_at) VALUES (:url, 'search bench', 'bench', 'completed', now(), now()) ON CONFLICT (original_url) DO UPDATE SET title = EXCLUDED.title RETURNING id"),
+            {"url": f"bench://search/{n}"},
+        ).scalar_one()
+        session.execute(
+            text(
+                f"INSERT INTO transcript_segment (media_id, start_time, end_time, text, speaker_label) "
+                f"SELECT :media_id, g * 5.0, g * 5.0 + 5.0, "
+                f"({vocab})[1 + g % {len(VOCAB)}] || ' ' || ({vocab})[1 + (g / 7) % {len(VOCAB)}] || ' ' || md5(g::text), 'SPEAKER_00' "
+                f"FROM generate_series(1, :n) AS g"
+            ),
+            {"media_id": media_id, "n": n},
+        )
+        session.commit()
+
+
+def bench_fulltext(args):
+    from sqlmodel import Session
+
+    from backend.core.database import engine
+    from backend.services.search import SearchService
+
+    if args.seed_db:
+        seed_db(args.seed_db)
+    service = SearchService()
+    latencies = []
+    with Session(engine) as session:
+        for _ in range(args.queries):
+            t0 = time.perf_counter()
+            service.fulltext(session, random.choice(QUERIES), limit=20)
+            latencies.append(time.perf_counter() - t0)
+    report("fulltext search", latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audigest 搜索延迟基准测试")
+    parser.add_argument("--segments", type=int, default=1_000_000, help="模拟的逐字稿片段数")
+    parser.add_argument("--segments-per-window", type=int, default=12, help="每个向量窗口包含的片段数 (约 60 秒)")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--fulltext", action="store_true", help="测试 PostgreSQL 全文检索而不是向量检索")
+    parser.add_argument("--seed-db", type=int, default=0, help="先向数据库写入 N 条合成片段")
+    args = parser.parse_args()
+
+    if args.fulltext:
+        bench_fulltext(args)
+    else:
+        bench_vectors(args)
+
+
+if __name__ == "__main__":
+    main()
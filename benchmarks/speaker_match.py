@@ -0,0 +1,89 @@
+"""
+声纹匹配检查 + 基准测试
+
+模拟 API 与 Worker 各自持有的 SpeakerIndex：Worker 先启动 (此时声纹库还是空的)，之后 API 登记新的说话人，
+检查 Worker 处理下一集时能否匹配上；再测量已登记 N 条声纹时单集匹配的耗时。离线即可运行，不需要声纹模型
+
+    uv run python -m benchmarks.speaker_match
+    uv run python -m benchmarks.speaker_match --voices 50000 --dim 192 --episodes 200
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.stats import report
+
+
+def noisy(rng: np.random.Generator, vector: np.ndarray, scale: float = 0.05) -> np.ndarray:
+    """同一个人在另一集里的声纹：原向量加少量噪声"""
+    return vector + scale * np.linalg.norm(vector) / np.sqrt(len(vector)) * rng.standard_normal(len(vector), dtype=np.float32)
+
+
+def check_late_enrollment(root: str, dim: int, rng: np.random.Generator) -> List[str]:
+    from backend.services.speaker_index import SpeakerIndex
+
+    worker = SpeakerIndex(root)
+    # Worker 启动后先处理一集：声纹库为空，什么都匹配不上
+    if worker.match(rng.standard_normal((2, dim), dtype=np.float32)) != [None, None]:
+        return ["空声纹库返回了匹配结果"]
+
+    api = SpeakerIndex(root)
+    problems = []
+    voices = rng.standard_normal((2, dim), dtype=np.float32)
+    for speaker_id, voice in enumerate(voices, start=1):
+        # API 登记新说话人 (等价于 enroll 里的 known.add)，Worker 下一集应当直接匹配上
+        api.known.add(voice[None], [speaker_id])
+        result = worker.match(noisy(rng, voice)[None])
+        if not result[0] or result[0][0] != speaker_id:
+            problems.append(f"Worker 启动后登记的说话人 #{speaker_id} 没有被匹配上: {result}")
+    return problems
+
+
+def bench_match(root: str, args, rng: np.random.Generator):
+    from backend.services.speaker_index import SpeakerIndex
+
+    api = SpeakerIndex(root)
+    worker = SpeakerIndex(root)
+    print(f"⏳ 登记 {args.voices:,} 条声纹 (dim={args.dim})...")
+    voices = rng.standard_normal((args.voices, args.dim), dtype=np.float32)
+    api.known.add(voices, rng.integers(1, max(args.voices // 3, 1) + 1, args.voices).tolist())
+
+    started = time.perf_counter()
+    worker.match(noisy(rng, voices[0])[None])
+    print(f"首次加载 + 匹配耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    latencies = []
+    for _ in range(args.episodes):
+        # 每集几个说话人，其中一个是已登记的
+        episode = np.vstack([noisy(rng, voices[rng.integers(len(voices))])[None], rng.standard_normal((args.speakers - 1, args.dim), dtype=np.float32)])
+        t0 = time.perf_counter()
+        worker.match(episode)
+        latencies.append(time.perf_counter() - t0)
+    report("speaker match", latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audigest 声纹匹配检查")
+    parser.add_argument("--voices", type=int, default=10_000, help="已登记的声纹条数")
+    parser.add_argument("--dim", type=int, default=192)
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--speakers", type=int, default=4, help="每集的说话人数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    problems = check_late_enrollment(tempfile.mkdtemp(prefix="audigest-speaker-"), args.dim, rng)
+    if problems:
+        print("\n❌ 声纹匹配检查未通过:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("✅ Worker 启动后登记的说话人可以在下一集匹配上")
+
+    bench_match(tempfile.mkdtemp(prefix="audigest-speaker-"), args, rng)
+
+
+if __name__ == "__main__":
+    main()
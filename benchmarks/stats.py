@@ -0,0 +1,25 @@
+import statistics
+from typing import Dict, List
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": statistics.mean(values),
+        "max": max(values),
+    }
+
+
+def report(name: str, latencies: List[float]):
+    s = summarize(latencies)
+    print(f"{name}: n={s['n']} p50={s['p50'] * 1000:.1f}ms p95={s['p95'] * 1000:.1f}ms mean={s['mean'] * 1000:.1f}ms")
@@ -0,0 +1,243 @@
+"""
+本地 HTTP 替身服务，替代所有外部依赖:
+- GET/HEAD /media/<name>        媒体文件 (支持 Range)
+- GET      /feeds/<name>.xml    单集 RSS (支持 ETag / 304)
+- POST     /v1/listen           假 Deepgram (按上传大小估算时长，按 RTF 模拟延迟，可按比例返回 429)
+- POST     /v1/chat/completions 假 OpenAI 兼容 LLM (固定延迟 + 按输入长度的延迟)
+- POST     /pages               假文档服务：创建页面，返回 {"id": ...}
+- PATCH    /pages/<id>          假文档服务：更新页面，未知 ID 返回 404
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+WORDS = "the quick brown fox jumps over the lazy dog 今天 我们 聊聊 人工智能 的 未来".split()
+
+
+@dataclass
+class StubConfig:
+    media_dir: Path
+    asr_rtf: float = 0.02  # 假 Deepgram 处理耗时 / 音频时长
+    asr_base_latency: float = 0.3
+    llm_latency: float = 1.0
+    llm_seconds_per_1k_tokens: float = 0.05
+    bitrate_kbps: int = 64  # 用于从上传字节数估算音频时长
+    opus_bitrate_kbps: int = 32  # 上传 audio/ogg (Opus) 时的估算码率
+    asr_error_rate: float = 0.0  # 按该比例返回 429 + Retry-After，模拟限流
+    segment_seconds: float = 5.0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: StubConfig
+    # 假文档服务的页面 (内存中，每个 StubServer 一份)
+    pages: Dict[str, dict]
+    pages_lock: threading.Lock
+    # 假 Deepgram 收到的请求 (Content-Type / 字节数)，供测试检查上传格式
+    listen_requests: List[dict]
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---------- 媒体 / RSS ----------
+
+    def do_HEAD(self):
+        self._serve_media(head_only=True)
+
+    def do_GET(self):
+        if self.path.startswith("/feeds/"):
+            return self._serve_feed()
+        return self._serve_media(head_only=False)
+
+    def _media_path(self) -> Optional[Path]:
+        name = self.path.split("?")[0].rsplit("/", 1)[-1]
+        path = self.config.media_dir / name
+        return path if path.is_file() else None
+
+    def _serve_media(self, head_only: bool):
+        path = self._media_path()
+        if path is None:
+            return self._send(404, b"not found", "text/plain")
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[6:].partition("-")
+            start = int(first) if first else 0
+            end = min(int(last), size - 1) if last else size - 1
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head_only:
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(256 * 1024, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def _serve_feed(self):
+        name = self.path.split("?")[0].rsplit("/", 1)[-1].removesuffix(".xml")
+        host = self.headers.get("Host")
+        audio = self.config.media_dir / f"{name}.mp3"
+        if not audio.exists():
+            return self._send(404, b"not found", "text/plain")
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Bench {name}</title><author>Audigest Bench</author>"
+            f"<item><guid>{name}</guid><title>Episode {name}</title>"
+            f'<enclosure url="http://{host}/media/{audio.name}" type="audio/mpeg" length="{audio.stat().st_size}"/></item>'
+            "</channel></rss>"
+        ).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(200, body, "application/rss+xml", {"ETag": etag, "Last-Modified": formatdate(usegmt=True)})
+
+    # ---------- 假 Deepgram / LLM ----------
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith("/v1/listen"):
+            return self._fake_deepgram(len(body), self.headers.get("Content-Type", ""))
+        if self.path.startswith("/v1/chat/completions"):
+            return self._fake_llm(json.loads(body or b"{}"))
+        if self.path.rstrip("/") == "/pages":
+            return self._create_page(json.loads(body or b"{}"))
+        self._send(404, b"not found", "text/plain")
+
+    def do_PATCH(self):
+        body = self._read_body()
+        if self.path.startswith("/pages/"):
+            return self._update_page(self.path.split("?")[0].rsplit("/", 1)[-1], json.loads(body or b"{}"))
+        self._send(404, b"not found", "text/plain")
+
+    def _fake_deepgram(self, size: int, content_type: str):
+        self.listen_requests.append({"content_type": content_type, "size": size})
+        if random.random() < self.config.asr_error_rate:
+            return self._send(429, b'{"err_code":"TOO_MANY_REQUESTS"}', "application/json", {"Retry-After": "1"})
+        bitrate = self.config.opus_bitrate_kbps if content_type.startswith("audio/ogg") else self.config.bitrate_kbps
+        seconds = size * 8 / (bitrate * 1000)
+        time.sleep(self.config.asr_base_latency + seconds * self.config.asr_rtf)
+        paragraphs = []
+        t = 0.0
+        i = 0
+        while t < seconds:
+            end = min(t + self.config.segment_seconds, seconds)
+            text = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(12))
+            paragraphs.append({"speaker": i % 2, "sentences": [{"text": text, "start": t, "end": end}]})
+            t = end
+            i += 1
+        payload = {"results": {"channels": [{"alternatives": [{"transcript": "", "paragraphs": {"paragraphs": paragraphs}}]}]}}
+        self._send(200, json.dumps(payload).encode(), "application/json")
+
+    def _fake_llm(self, request: dict):
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        prompt_tokens = prompt_chars // 2
+        time.sleep(self.config.llm_latency + prompt_tokens / 1000 * self.config.llm_seconds_per_1k_tokens)
+        content = "## 一句话摘要 (TL;DR)\n\n基准测试生成的总结。\n\n## 标签 (Tags)\n\n#基准测试 #Audigest"
+        payload = {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "bench"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 40, "total_tokens": prompt_tokens + 40},
+        }
+        self._send(200, json.dumps(payload).encode(), "application/json")
+
+    # ---------- 假文档服务 (导出目标) ----------
+
+    def _create_page(self, page: dict):
+        with self.pages_lock:
+            page_id = str(len(self.pages) + 1)
+            self.pages[page_id] = page
+        self._send(200, json.dumps({"id": page_id}).encode(), "application/json")
+
+    def _update_page(self, page_id: str, page: dict):
+        with self.pages_lock:
+            if page_id not in self.pages:
+                return self._send(404, b'{"error":"page not found"}', "application/json")
+            self.pages[page_id] = page
+        self._send(200, json.dumps({"id": page_id}).encode(), "application/json")
+
+    # ---------- 工具 ----------
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+        self.listen_requests: List[dict] = []
+        handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config, "pages": {}, "pages_lock": threading.Lock(), "listen_requests": self.listen_requests})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from benchmarks.corpus import CORPUS_DIR
+
+    parser = argparse.ArgumentParser(description="单独启动替身服务 (调试用)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    with StubServer(StubConfig(media_dir=CORPUS_DIR), port=args.port) as server:
+        print(f"🧪 替身服务已启动: {server.base_url}")
+        threading.Event().wait()
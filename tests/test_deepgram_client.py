@@ -0,0 +1,144 @@
+"""
+DeepgramClient 对接本地假 Deepgram (benchmarks/stubs.py) 的测试：429 重试、上传格式、两种响应解析路径
+"""
+
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from backend.core.config import settings
+from backend.services import deepgram_client
+from backend.services.deepgram_client import DeepgramClient, DeepgramError
+from benchmarks import stubs
+from benchmarks.stubs import StubConfig, StubServer
+
+SECONDS = 30
+
+
+@pytest.fixture
+def config(tmp_path):
+    return StubConfig(media_dir=tmp_path, asr_base_latency=0.0, asr_rtf=0.0)
+
+
+@pytest.fixture
+def server(config):
+    with StubServer(config) as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def no_opus(monkeypatch):
+    monkeypatch.setattr(settings, "DEEPGRAM_UPLOAD_OPUS", False)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录退避等待的秒数，不真正等待"""
+    recorded = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        if delay:
+            recorded.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(deepgram_client.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def fake_mp3(tmp_path: Path, config: StubConfig) -> Path:
+    """假 Deepgram 只按字节数估算时长，内容无所谓"""
+    path = tmp_path / "episode.mp3"
+    path.write_bytes(b"\0" * (SECONDS * config.bitrate_kbps * 1000 // 8))
+    return path
+
+
+def transcribe(server: StubServer, audio_path: Path, **kwargs):
+    async def run():
+        client = DeepgramClient("test-key", base_url=server.base_url, **kwargs)
+        try:
+            return await client.transcribe(str(audio_path))
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def script_errors(monkeypatch, draws):
+    """按顺序指定假 Deepgram 每次请求的随机数 (小于 asr_error_rate 时返回 429)"""
+    monkeypatch.setattr(stubs, "random", SimpleNamespace(random=iter(draws).__next__))
+
+
+def test_retries_429_honouring_retry_after(server, config, tmp_path, monkeypatch, sleeps):
+    config.asr_error_rate = 0.5
+    script_errors(monkeypatch, [0.0, 0.0, 0.99])
+    # 指数退避的基数调大：如果没有遵循 Retry-After，等待时间会明显不同
+    monkeypatch.setattr(settings, "DEEPGRAM_BACKOFF_BASE", 10.0)
+
+    segments = transcribe(server, fake_mp3(tmp_path, config), max_retries=3)
+
+    assert sleeps == [1.0, 1.0]
+    assert len(server.listen_requests) == 3
+    assert segments
+
+
+def test_gives_up_after_max_retries(server, config, tmp_path, sleeps):
+    config.asr_error_rate = 1.0
+
+    with pytest.raises(DeepgramError, match="429"):
+        transcribe(server, fake_mp3(tmp_path, config), max_retries=2)
+
+    assert sleeps == [1.0, 1.0]
+    assert len(server.listen_requests) == 3
+
+
+def test_uploads_opus_files_as_ogg(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEEPGRAM_UPLOAD_OPUS", True)
+    path = tmp_path / "episode.opus"
+    path.write_bytes(b"\0" * 4000)
+
+    transcribe(server, path)
+
+    assert server.listen_requests == [{"content_type": "audio/ogg", "size": 4000}]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+def test_transcodes_mp3_to_opus_before_upload(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEEPGRAM_UPLOAD_OPUS", True)
+    path = tmp_path / "tone.mp3"
+    subprocess.run(["ffmpeg", "-nostdin", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={SECONDS}", "-b:a", "192k", str(path)], check=True)
+
+    transcribe(server, path)
+
+    (request,) = server.listen_requests
+    assert request["content_type"] == "audio/ogg"
+    assert request["size"] < path.stat().st_size
+    assert not list(Path(deepgram_client.tempfile.gettempdir()).glob("deepgram_*.ogg"))
+
+
+def test_uploads_original_file_when_opus_disabled(server, config, tmp_path):
+    path = fake_mp3(tmp_path, config)
+
+    transcribe(server, path)
+
+    assert server.listen_requests == [{"content_type": "audio/*", "size": path.stat().st_size}]
+
+
+@pytest.mark.parametrize("streaming", [True, False], ids=["ijson", "json"])
+def test_parses_paragraphs(server, config, tmp_path, monkeypatch, streaming):
+    if streaming:
+        pytest.importorskip("ijson")
+    monkeypatch.setattr(deepgram_client, "HAS_IJSON", streaming)
+
+    segments = transcribe(server, fake_mp3(tmp_path, config))
+
+    assert len(segments) == SECONDS / config.segment_seconds
+    assert segments[0]["start"] == 0.0
+    assert segments[0]["end"] == config.segment_seconds
+    assert segments[0]["text"].startswith("the quick brown fox")
+    assert [s["speaker"] for s in segments[:2]] == ["Speaker_0", "Speaker_1"]
+    assert segments[-1]["end"] == SECONDS